@@ -0,0 +1,107 @@
+"""Micro-benchmark: per-event cost of combo tracking, legacy vs ComboState.
+
+Uso:  python -m benchmarks.bench_combo [--events N] [--bindings N]
+
+La implementación "legacy" replica lo que hacían on_press/on_release antes
+del motor incremental (sorted + join en cada pulsación, split en cada
+soltado).  Ambas variantes resuelven contra el mismo dict de mapeos.
+"""
+
+from __future__ import annotations
+
+import argparse, json, random, string, time
+from typing import Dict, List, Tuple
+
+from src.core.combo_state import ComboState
+
+MODS = ['ctrl', 'alt', 'shift', 'meta']
+KEYS = list(string.ascii_lowercase + string.digits) + ['f1', 'f2', 'f3', 'space', 'enter']
+
+
+def make_trace(n: int, seed: int = 1) -> List[Tuple[bool, str]]:
+    """Secuencia realista de (pulsado, tecla): texto con combos ocasionales."""
+    rnd = random.Random(seed)
+    out: List[Tuple[bool, str]] = []
+    while len(out) < n:
+        mods = rnd.sample(MODS, rnd.choice([0, 0, 0, 1, 2]))
+        key = rnd.choice(KEYS)
+        for m in mods:
+            out.append((True, m))
+        out.append((True, key))
+        if rnd.random() < 0.2:  # auto-repeat
+            out.append((True, key))
+        out.append((False, key))
+        for m in reversed(mods):
+            out.append((False, m))
+    return out[:n]
+
+
+def make_bindings(n: int, seed: int = 2) -> Dict[str, int]:
+    rnd = random.Random(seed)
+    codes = set()
+    while len(codes) < n:
+        mods = rnd.sample(MODS, rnd.choice([0, 1, 2]))
+        codes.add('+'.join(sorted(mods + [rnd.choice(KEYS)])))
+    return {c: i for i, c in enumerate(codes)}
+
+
+def run_legacy(trace, bindings) -> Tuple[float, int]:
+    pressed, fired = set(), set()
+    hits = 0
+    t0 = time.perf_counter()
+    for down, name in trace:
+        if down:
+            pressed.add(name)
+            keys_sorted = sorted(pressed)
+            combo = '+'.join(keys_sorted)
+            if combo not in fired:
+                if bindings.get(combo) is not None:
+                    hits += 1
+                fired.add(combo)
+            if len(keys_sorted) > 1 and name not in ['shift', 'ctrl', 'alt', 'meta']:
+                if name not in fired:
+                    if bindings.get(name) is not None:
+                        hits += 1
+                    fired.add(name)
+        else:
+            if name in pressed:
+                pressed.remove(name)
+            for c in [c for c in fired if name in c.split('+')]:
+                fired.remove(c)
+    return time.perf_counter() - t0, hits
+
+
+def run_combo_state(trace, bindings) -> Tuple[float, int]:
+    state = ComboState(solo_excluded=MODS)
+    for code in bindings:
+        state.add(code)
+    hits = 0
+    t0 = time.perf_counter()
+    for down, name in trace:
+        if down:
+            for combo in state.press(name):
+                if bindings.get(combo) is not None:
+                    hits += 1
+        else:
+            state.release(name)
+    return time.perf_counter() - t0, hits
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--events', type=int, default=200_000)
+    ap.add_argument('--bindings', type=int, default=50)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args(argv)
+    trace = make_trace(args.events)
+    bindings = make_bindings(args.bindings)
+    results = {}
+    for name, fn in (('legacy', run_legacy), ('combo_state', run_combo_state)):
+        best, hits = min(fn(trace, bindings) for _ in range(args.repeat))
+        results[name] = {'ns_per_event': best / len(trace) * 1e9, 'hits': hits}
+    results['speedup'] = results['legacy']['ns_per_event'] / results['combo_state']['ns_per_event']
+    print(json.dumps({'events': len(trace), 'bindings': len(bindings), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Micro-benchmark: allocations and time per event, legacy dataclass vs interned EventSignature.
+
+Uso:  python -m benchmarks.bench_signature [--events N] [--codes N]
+
+La variante "legacy" replica lo que hacían los listeners antes de la firma
+internada: un @dataclass nuevo por evento con su `human` ya formateado y la
+clave de texto `type:vid:pid:code` para indexar/coalescer.  La nueva obtiene
+la firma del pool y la usa directamente como clave.  Ambas resuelven contra
+un dict de mapeos con las mismas firmas.
+"""
+
+from __future__ import annotations
+
+import argparse, json, random, time, tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.types import EventSignature
+
+VID, PID = 0x1234, 0xABCD
+
+
+@dataclass
+class LegacySignature:
+    type: str
+    vendor_id: Optional[int] = None
+    product_id: Optional[int] = None
+    code: str = ''
+    human: str = ''
+
+
+def _legacy_human(code: str) -> str:
+    codes = code.split('+')
+    if len(codes) == 1:
+        return f"HID {VID:04X}:{PID:04X} [{code}]"
+    return f"HID Combo {VID:04X}:{PID:04X} [{'+'.join(sorted(codes))}]"
+
+
+def make_trace(n: int, codes: int, seed: int = 1) -> List[str]:
+    """Reports HID tipo botonera: pocos códigos distintos, muy repetidos."""
+    rnd = random.Random(seed)
+    pool = [f"01-{i:04X}" for i in range(codes)]
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def run_legacy(trace: List[str], bindings: Dict[str, int], keep: Optional[List] = None) -> int:
+    hits = 0
+    for i, code in enumerate(trace):
+        sig = LegacySignature(type='hid', vendor_id=VID, product_id=PID, code=code, human=_legacy_human(code))
+        key = f"{sig.type}:{sig.vendor_id}:{sig.product_id}:{sig.code}"
+        if bindings.get(key) is not None:
+            hits += 1
+        if keep is not None:
+            keep[0][i] = sig; keep[1][i] = key
+    return hits
+
+
+def run_interned(trace: List[str], bindings: Dict[EventSignature, int], keep: Optional[List] = None) -> int:
+    hits = 0
+    for i, code in enumerate(trace):
+        sig = EventSignature(type='hid', vendor_id=VID, product_id=PID, code=code)
+        if bindings.get(sig) is not None:
+            hits += 1
+        if keep is not None:
+            keep[0][i] = sig; keep[1][i] = sig
+    return hits
+
+
+def alloc_per_event(fn: Callable, trace, bindings) -> Tuple[float, float]:
+    """(bytes, bloques) asignados por evento.
+
+    Cada firma/clave producida se retiene en listas ya reservadas, así que el
+    diff de tracemalloc cuenta todo lo que el evento asigna y no solo el pico.
+    """
+    fn(trace[:1000], bindings)  # calentar pool/caches
+    keep = [[None] * len(trace), [None] * len(trace)]
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot()
+    fn(trace, bindings, keep)
+    snap1 = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = [s for s in snap1.compare_to(snap0, 'filename') if s.traceback[0].filename != tracemalloc.__file__]
+    size = sum(s.size_diff for s in diff)
+    count = sum(s.count_diff for s in diff)
+    del keep
+    return size / len(trace), count / len(trace)
+
+
+def timed(fn: Callable, trace, bindings, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(trace, bindings)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--events', type=int, default=200_000)
+    ap.add_argument('--codes', type=int, default=32)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args(argv)
+    trace = make_trace(args.events, args.codes)
+    sigs = [EventSignature(type='hid', vendor_id=VID, product_id=PID, code=f"01-{i:04X}") for i in range(0, args.codes, 2)]
+    legacy_bindings = {s.key: i for i, s in enumerate(sigs)}
+    interned_bindings = {s: i for i, s in enumerate(sigs)}
+    results = {}
+    for name, fn, bindings in (('legacy', run_legacy, legacy_bindings),
+                               ('interned', run_interned, interned_bindings)):
+        size, blocks = alloc_per_event(fn, trace, bindings)
+        results[name] = {
+            'ns_per_event': timed(fn, trace, bindings, args.repeat) / len(trace) * 1e9,
+            'alloc_bytes_per_event': size,
+            'alloc_blocks_per_event': blocks,
+            'hits': fn(trace, bindings),
+        }
+    results['alloc_reduction'] = 1.0 - results['interned']['alloc_bytes_per_event'] / results['legacy']['alloc_bytes_per_event']
+    results['speedup'] = results['legacy']['ns_per_event'] / results['interned']['ns_per_event']
+    print(json.dumps({'events': len(trace), 'codes': args.codes, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""End-to-end trigger latency benchmark: input event -> Sound.play().
+
+Uso:
+    python -m benchmarks.latency [--scenario NAME ...] [--events N] [--rate R]
+                                 [--throughput-events N] [--label v1.0.1] [--out results.json]
+
+Conduce DeviceListener/MultiDeviceListener con SyntheticBackend contra un
+AudioPlayer real bajo el driver de audio "dummy" de SDL, pasando por el
+TriggerDispatcher igual que la app.  Cada escenario corre dos pasadas:
+
+- latencia: eventos espaciados a `--rate` eventos/s (por defecto 200, más
+  rápido que cualquier persona) para que p50/p95/p99 (evento ->
+  Sound.play()) midan el disparo y no la cola acumulada;
+- throughput: una instancia nueva recibe `--throughput-events` eventos tan
+  rápido como se pueda; reporta eventos/s, CPU por evento y memoria.
+
+El resultado es JSON para comparar versiones.
+"""
+
+from __future__ import annotations
+
+import os
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse, json, platform, struct, sys, tempfile, threading, time, tracemalloc, wave
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from src.core.audio_player import AudioPlayer
+from src.core.device_listener import DeviceListener, MultiDeviceListener
+from src.core.hid_decoder import button_code, set_ignore_masks
+from src.core.input_backends import SyntheticBackend
+from src.core.trigger_dispatcher import TriggerDispatcher
+from src.core.types import EventSignature
+
+VID, PID = 0x1234, 0x0001
+# (evento sintético, ¿debe disparar un sonido?)
+Step = Tuple[tuple, bool]
+
+
+class _TimedPlayer(AudioPlayer):
+    """AudioPlayer que marca el instante de cada Sound.play()."""
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.play_times: Deque[float] = deque()
+
+    def _play_sound(self, snd, *a, **kw):
+        self.play_times.append(time.perf_counter())
+        super()._play_sound(snd, *a, **kw)
+
+
+def _make_clip(path: str, ms: int = 50):
+    frames = int(44100 * ms / 1000)
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(2); w.setsampwidth(2); w.setframerate(44100)
+        w.writeframes(struct.pack('<hh', 0, 0) * frames)
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def _rss_kb() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * (os.sysconf('SC_PAGE_SIZE') // 1024)
+    except Exception:
+        return 0
+
+
+# ---- escenarios: devuelven (listener, pasos) ya enlazados a `play` ----
+def scenario_single_key(backend: SyntheticBackend, d: TriggerDispatcher, play: Callable, n: int):
+    l = DeviceListener('keyboard', {}, d, backend=backend)
+    l.bind(EventSignature(type='keyboard', code='a'), play)
+    steps: List[Step] = []
+    while len(steps) < n:
+        steps += [((None, 'key', 'a', True), True), ((None, 'key', 'a', False), False)]
+    return l, steps[:n], {'keyboards': 1}
+
+
+def scenario_modifier_combo(backend: SyntheticBackend, d: TriggerDispatcher, play: Callable, n: int):
+    l = DeviceListener('keyboard', {}, d, backend=backend)
+    l.bind(EventSignature(type='keyboard', code='ctrl+k+shift'), play)
+    steps: List[Step] = []
+    while len(steps) < n:
+        steps += [
+            ((None, 'key', 'Key.ctrl_l', True), False), ((None, 'key', 'Key.shift', True), False),
+            ((None, 'key', 'k', True), True), ((None, 'key', 'k', True), False),  # auto-repeat
+            ((None, 'key', 'k', False), False), ((None, 'key', 'Key.shift', False), False),
+            ((None, 'key', 'Key.ctrl_l', False), False),
+        ]
+    return l, steps[:n], {'keyboards': 1}
+
+
+def scenario_hid_flood(backend: SyntheticBackend, d: TriggerDispatcher, play: Callable, n: int):
+    backend.add_device(VID, PID)
+    l = DeviceListener('hid', {'vendor_id': VID, 'product_id': PID}, d, backend=backend)
+    bound = 256
+    for i in range(bound):
+        l.bind(EventSignature(type='hid', vendor_id=VID, product_id=PID, code=f"01-{i:04X}"), play)
+    steps: List[Step] = []
+    i = 0
+    while len(steps) < n:
+        # 15 reports de ruido (jitter analógico) por cada report mapeado
+        for j in range(15):
+            steps.append(((None, 'hid', VID, PID, [2, j & 0xFF, (i * 7 + j) & 0xFF]), False))
+        first = i < bound
+        steps.append(((None, 'hid', VID, PID, [1, (i % bound) >> 8, (i % bound) & 0xFF]), first))
+        i += 1
+    return l, steps[:n], {'wait_hid': True}
+
+
+def scenario_hid_buttons(backend: SyntheticBackend, d: TriggerDispatcher, play: Callable, n: int):
+    # Botonera de 8 botones (byte 0) con un eje analógico con jitter (byte 1) y un
+    # contador (byte 2); se mapean botones decodificados.  Eje y contador van
+    # enmascarados por config: sin auto-máscara, porque su umbral es por tiempo
+    # y aquí se inyecta a cientos de miles de reports/s (también el byte de botones).
+    pid = PID + 1
+    set_ignore_masks({f"{VID:04X}:{pid:04X}": {'01': [1, 2]}}, auto_noise=False)
+    backend.add_device(VID, pid)
+    l = DeviceListener('hid', {'vendor_id': VID, 'product_id': pid}, d, backend=backend)
+    for bit in range(8):
+        l.bind(EventSignature(type='hid', vendor_id=VID, product_id=pid, code=button_code(1, 0, bit)), play)
+    steps: List[Step] = []
+    i = counter = 0
+    buttons = 0
+
+    def report(trig: bool, jitter: int = 0x80):
+        nonlocal counter
+        counter = (counter + 1) & 0xFF
+        steps.append(((None, 'hid', VID, pid, [1, buttons, jitter, counter]), trig))
+
+    while len(steps) < n:
+        for j in range(6):
+            report(False, 0x80 + ((i + j) % 5) - 2)
+        buttons = 1 << (i % 8)
+        report(True)
+        report(False)
+        buttons = 0
+        report(False)
+        i += 1
+    return l, steps[:n], {'wait_hid': True, 'cleanup': lambda: set_ignore_masks({})}
+
+
+def scenario_multi_device(backend: SyntheticBackend, d: TriggerDispatcher, play: Callable, n: int):
+    backend.add_device(VID, PID)
+    m = MultiDeviceListener(d, backend=backend)
+    bound = 256
+    for i in range(bound):
+        m.bind(EventSignature(type='multi', code=f"hid:{VID}:{PID}:01-{i:04X}+kb:ctrl"), play)
+    steps: List[Step] = []
+    i = 0
+    while len(steps) < n:
+        # Ctrl + botón HID dentro de la ventana multi, con ruido de teclado entre medias
+        steps.append(((None, 'key', 'Key.ctrl_l', True), False))
+        steps.append(((None, 'key', 'x', True), False))
+        steps.append(((None, 'hid', VID, PID, [1, (i % bound) >> 8, (i % bound) & 0xFF]), i < bound))
+        steps.append(((None, 'key', 'x', False), False))
+        steps.append(((None, 'key', 'Key.ctrl_l', False), False))
+        i += 1
+    return m, steps[:n], {'keyboards': 1, 'mice': 1, 'wait_hid': True}
+
+
+SCENARIOS = {
+    'single_key': scenario_single_key,
+    'modifier_combo': scenario_modifier_combo,
+    'hid_flood': scenario_hid_flood,
+    'hid_buttons': scenario_hid_buttons,
+    'multi_device': scenario_multi_device,
+}
+
+
+def _run_pass(name: str, player: _TimedPlayer, clip: str, events: int, rate: Optional[float],
+              trace_mem: bool) -> Dict[str, object]:
+    backend = SyntheticBackend()
+    dispatcher = TriggerDispatcher(capacity=max(1024, events), policy='drop_oldest')
+    dispatcher.start()
+    play = lambda p=clip: player.play(p)
+    listener, steps, attach = SCENARIOS[name](backend, dispatcher, play, events)
+    try:
+        listener.start()
+        backend.wait_attached(attach.get('keyboards', 0), attach.get('mice', 0))
+        if attach.get('wait_hid'):
+            deadline = time.monotonic() + 2.0
+            while not any(dv.opened for dv in backend.devices) and time.monotonic() < deadline:
+                time.sleep(0.005)
+
+        player.play_times.clear()
+        injected: Deque[float] = deque()
+        expected = sum(1 for _, trig in steps if trig)
+        marks = iter([trig for _, trig in steps])
+
+        def on_event(_ev):
+            if next(marks):
+                injected.append(time.perf_counter())
+
+        if trace_mem:
+            tracemalloc.start()
+        rss0 = _rss_kb()
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        # rate=None y eventos sin tiempo: inyección tan rápida como se pueda
+        backend.play([ev for ev, _ in steps], rate=rate, on_event=on_event)
+        wall = time.perf_counter() - t0
+        # esperar a que el worker drene los disparos pendientes
+        deadline = time.monotonic() + 5.0
+        while len(player.play_times) < expected and time.monotonic() < deadline:
+            time.sleep(0.001)
+        cpu = time.process_time() - cpu0
+        mem: Dict[str, int] = {'rss_delta_kb': _rss_kb() - rss0}
+        if trace_mem:
+            cur, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            mem.update({'traced_current_kb': cur // 1024, 'traced_peak_kb': peak // 1024})
+    finally:
+        listener.stop()
+        dispatcher.stop()
+        # Estado global que el escenario haya tocado (p.ej. máscaras HID)
+        cleanup = attach.get('cleanup')
+        if cleanup is not None:
+            cleanup()
+    lat = sorted((p - i) * 1000.0 for i, p in zip(injected, player.play_times))
+    return {
+        'events': len(steps),
+        'expected_triggers': expected,
+        'played': len(player.play_times),
+        'latency_ms': {
+            'p50': _percentile(lat, 50), 'p95': _percentile(lat, 95), 'p99': _percentile(lat, 99),
+            'max': lat[-1] if lat else 0.0, 'samples': len(lat),
+        },
+        'events_per_s': len(steps) / wall if wall else 0.0,
+        'cpu_us_per_event': cpu / len(steps) * 1e6 if steps else 0.0,
+        'memory': mem,
+        'dispatcher': {k: v for k, v in dispatcher.stats().items() if k != 'per_trigger'},
+    }
+
+
+def run_scenario(name: str, player: _TimedPlayer, clip: str, events: int, rate: Optional[float],
+                 trace_mem: bool, throughput_events: int = 0) -> Dict[str, object]:
+    """Latencia con eventos espaciados y, aparte, throughput sin espaciar."""
+    paced = _run_pass(name, player, clip, events, rate, False)
+    result: Dict[str, object] = {
+        'events': paced['events'],
+        'rate': rate,
+        'expected_triggers': paced['expected_triggers'],
+        'played': paced['played'],
+        'latency_ms': paced['latency_ms'],
+        'dispatcher': paced['dispatcher'],
+    }
+    if throughput_events > 0:
+        flood = _run_pass(name, player, clip, throughput_events, None, trace_mem)
+        result['throughput'] = {
+            'events': flood['events'],
+            'expected_triggers': flood['expected_triggers'],
+            'played': flood['played'],
+            'events_per_s': flood['events_per_s'],
+            'cpu_us_per_event': flood['cpu_us_per_event'],
+            'memory': flood['memory'],
+            # Con inyección sin espaciar esto es sobre todo la cola, no la latencia de disparo
+            'backlog_latency_p50_ms': flood['latency_ms']['p50'],
+        }
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Trigger latency benchmark (event -> Sound.play()).')
+    ap.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='repetible; por defecto todos')
+    ap.add_argument('--events', type=int, default=1000, help='eventos de la pasada de latencia')
+    ap.add_argument('--rate', type=float, default=200.0,
+                    help='eventos/s de la pasada de latencia (0 = sin espaciar, solo para comparar)')
+    ap.add_argument('--throughput-events', type=int, default=20000,
+                    help='eventos de la pasada de throughput sin espaciar (0 = omitirla)')
+    ap.add_argument('--label', default='', help='etiqueta de versión para comparar resultados')
+    ap.add_argument('--tracemalloc', action='store_true', help='medir memoria Python con tracemalloc (más lento)')
+    ap.add_argument('--out', help='escribir JSON a este archivo además de stdout')
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix='sp-bench-')
+    clip = os.path.join(tmp, 'clip.wav')
+    _make_clip(clip)
+    player = _TimedPlayer()
+    player.preload([clip])
+    player.wait_ready(5)
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = run_scenario(name, player, clip, args.events, args.rate or None, args.tracemalloc,
+                                     args.throughput_events)
+    player.shutdown()
+
+    report = {
+        'label': args.label,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'threads': threading.active_count(),
+        'scenarios': results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
-from PyQt6.QtWidgets import QApplication
+import time
+_T0 = time.perf_counter()  # referencia de --profile-startup
 import sys, os
 
 # --- Dynamic import of MainWindow with multiple fallbacks for PyInstaller builds ---
@@ -46,7 +47,6 @@ def _import_main_window():
         + " | ".join(attempted)
     )
 
-MainWindow = _import_main_window()
 import argparse
 
 
@@ -76,8 +76,16 @@ def main():
     sys.excepthook = _excepthook
     parser = argparse.ArgumentParser()
     parser.add_argument("--minimized", action="store_true", help="Start minimized to tray")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print a per-phase startup timing breakdown and import costs")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="Quit once background init finishes (with --profile-startup, for CI)")
     args, _ = parser.parse_known_args()
 
+    # Desde aquí, PyQt6/MainWindow y lo que importen entran en el perfil
+    from src.core.startup_profile import StartupProfiler, phase
+    profiler = StartupProfiler(_T0) if args.profile_startup else None
+
     # Adjust CWD to executable dir (PyInstaller) so relative paths (config, audio) work
     try:
         if getattr(sys, 'frozen', False):
@@ -85,14 +93,35 @@ def main():
     except Exception:
         pass
 
-    app = QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)  # keep running in tray
-    app.setApplicationName("Soundpad v1.0.1 - by Aragón")
-    window = MainWindow()
+    with phase(profiler, 'import-qt'):
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QTimer
+    with phase(profiler, 'qapplication'):
+        app = QApplication(sys.argv)
+        app.setQuitOnLastWindowClosed(False)  # keep running in tray
+        app.setApplicationName("Soundpad v1.0.1 - by Aragón")
+    with phase(profiler, 'import-main-window'):
+        MainWindow = _import_main_window()
+    with phase(profiler, 'main-window'):
+        window = MainWindow(profiler=profiler)
     if args.minimized:
         window.hide()
     else:
         window.show()
+    if profiler:
+        profiler.mark('window-shown')
+
+        def on_ready():
+            profiler.mark('background-init-done')
+            profiler.dump(path='startup-profile.log')
+            if args.exit_after_startup:
+                window._on_tray_quit()
+        window.startup_finished.connect(on_ready)
+        QTimer.singleShot(0, lambda: profiler.mark('event-loop'))
+    elif args.exit_after_startup:
+        window.startup_finished.connect(window._on_tray_quit)
+    # Mixer, pynput/pywinusb y enumeración HID después del primer frame
+    QTimer.singleShot(0, window.start_background_init)
     sys.exit(app.exec())
 
 
@@ -1,51 +1,508 @@
+import os
+import threading
 import pygame
-from typing import List, Dict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Dict, Optional, Set, Tuple
+from .sound_cache import SoundCache
+from .pcm_cache import PcmDiskCache
+from .voice_manager import VoiceManager
+from . import loudness
+from .sound_variants import VariantKey, derive, needs_variant, pan_volumes, variant_key
+from .audio_stream import MusicStream, WavChannelStream, can_stream_on_channel, should_stream
+from .audio_tuning import (
+    LATENCY_PROFILES, DEFAULT_PROFILE, MIXER_FREQ, MIXER_SIZE, MIXER_CHANNELS,
+    autotune_buffer, profile_buffer,
+)
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+# Qué hacer cuando un trigger llega antes de que su sonido esté decodificado
+NOT_READY_POLICIES = ('skip', 'play_when_ready')
+
+ProgressCallback = Callable[[int, int], None]
 
 
 class AudioPlayer:
-    def __init__(self, max_channels: int = 64):
+    def __init__(self, max_channels: int = 64, workers: Optional[int] = None,
+                 not_ready_policy: str = 'play_when_ready',
+                 cache_budget_mb: float = 256, pin_below_kb: float = 512,
+                 cache_dir: Optional[str] = None, disk_cache_mb: float = 1024,
+                 latency_profile: str = DEFAULT_PROFILE,
+                 steal_policy: str = 'oldest', channel_groups: Optional[Dict[str, int]] = None,
+                 stream_threshold_mb: float = 32, stream_threshold_s: float = 120,
+                 normalize_dbfs: Optional[float] = None, trim_silence: bool = False,
+                 silence_db: float = -50.0):
+        self.max_channels = max_channels
+        self.voices: Optional[VoiceManager] = None
+        self._channel_groups = dict(channel_groups or {})
+        self._steal_policy = steal_policy
+        # Perfil de latencia: nombre de LATENCY_PROFILES o 'auto' (medido al arrancar)
+        self.latency_profile = latency_profile if latency_profile in LATENCY_PROFILES or latency_profile == 'auto' else DEFAULT_PROFILE
+        self.tuning_report: List[Dict[str, float]] = []
+        self._init_mixer(profile_buffer(self.latency_profile))
+        # Asignación de canales: polifonía, modos de redisparo y robo de voces
+        self.voices = VoiceManager(self.max_channels, steal=steal_policy, groups=self._channel_groups)
+        # LRU acotado por memoria; los clips cortos quedan fijados
+        self.cache = SoundCache(
+            budget_bytes=int(cache_budget_mb * 1024 * 1024),
+            pin_below_bytes=int(pin_below_kb * 1024),
+            on_evict=self._on_evict,
+        )
+        # PCM decodificado en disco: un arranque en caliente no decodifica nada
+        self.disk_cache: Optional[PcmDiskCache] = (
+            PcmDiskCache(cache_dir, max_bytes=int(disk_cache_mb * 1024 * 1024)) if cache_dir else None
+        )
+        if not_ready_policy not in NOT_READY_POLICIES:
+            not_ready_policy = 'play_when_ready'
+        self.not_ready_policy = not_ready_policy
+        # Decodificación en paralelo (pygame libera el GIL al decodificar)
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or min(8, os.cpu_count() or 4),
+            thread_name_prefix='audio-preload',
+        )
+        self._lock = threading.Lock()
+        self._state: Dict[str, str] = {}  # path -> 'pending' | 'ready' | 'failed'
+        self._futures: Dict[str, Future] = {}
+        self._waiters: Dict[str, Dict[str, Any]] = {}  # path -> opciones de play()
+        self._wanted: Set[str] = set()
+        # Pedidos por play() fuera del preload: al terminar van a la caché aunque
+        # ese disparo se haya descartado ('skip'), para que el siguiente suene
+        self._on_demand: Set[str] = set()
+        # Archivos largos: se reproducen en streaming, nunca se decodifican enteros
+        self.stream_threshold_bytes = int(stream_threshold_mb * 1024 * 1024)
+        self.stream_threshold_s = stream_threshold_s
+        self._load_modes: Dict[str, str] = {}  # path -> 'auto' | 'preload' | 'stream'
+        self._streamed: Dict[str, bool] = {}  # path -> ¿cabe en un Channel? (si no, mixer.music)
+        self._decided: Dict[str, str] = {}  # path -> modo de carga con el que el worker decidió
+        self.music = MusicStream()
+        # Buffers derivados (offset de inicio / fade-out) por (path, start_ms, fade_out_ms)
+        self._variants: Dict[str, Set[VariantKey]] = {}
+        self._derived: Dict[Tuple[str, int, int], pygame.mixer.Sound] = {}
+        # Normalización (RMS objetivo en dBFS, None = desactivada) y recorte de
+        # silencios: opt-in, cambiar el volumen/inicio de mapeos existentes no es gratis
+        self.normalize_dbfs = normalize_dbfs
+        self.trim_silence = trim_silence
+        self._warned_no_numpy = False
+        self.silence_db = silence_db
+        self._done = 0
+        self._total = 0
+        # Callback (hecho, total) invocado desde hilos del pool
+        self.on_progress: Optional[ProgressCallback] = None
+        if self.latency_profile == 'auto':
+            self.autotune()
+
+    def _init_mixer(self, buffer: int):
         # Pre-init y init del mixer
-        pygame.mixer.pre_init(44100, -16, 2, 512)
+        pygame.mixer.pre_init(MIXER_FREQ, MIXER_SIZE, MIXER_CHANNELS, buffer)
         pygame.mixer.init()
         # Aumentamos número de canales para permitir varias pistas simultáneas
         try:
-            pygame.mixer.set_num_channels(max_channels)
+            pygame.mixer.set_num_channels(self.max_channels)
         except Exception:
             pass
-        self.max_channels = max_channels
-        self.cache: Dict[str, pygame.mixer.Sound] = {}
+        self.buffer_size = buffer
+        # Formato real concedido por SDL; los Sound decodificados dependen de él
+        self._format = pygame.mixer.get_init()
+        if self.voices is not None:
+            # Los objetos Channel anteriores murieron con el mixer
+            self.voices.resize(self.max_channels)
+
+    def autotune(self) -> int:
+        """Measure callback timing on the output device and switch to the smallest stable buffer.
+
+        La medición abre el dispositivo por defecto, el mismo que usa el mixer:
+        el mixer se cierra mientras tanto (en backends exclusivos/WASAPI no se
+        puede abrir dos veces) y se reabre con el buffer elegido.
+        """
+        self.reinit(None)
+        return self.buffer_size
+
+    def set_latency_profile(self, profile: str):
+        if profile == 'auto':
+            self.latency_profile = profile
+            self.autotune()
+            return
+        if profile not in LATENCY_PROFILES:
+            raise ValueError(f"perfil de latencia desconocido: {profile}")
+        self.latency_profile = profile
+        if profile_buffer(profile) != self.buffer_size:
+            self.reinit(profile_buffer(profile))
+
+    def reinit(self, buffer: Optional[int]):
+        """Restart the mixer with a new buffer; sounds are reloaded only if the format changed.
+
+        `get_init()` no incluye el buffer: si SDL concede el mismo (freq, size,
+        channels) los Sound ya decodificados siguen valiendo y se conservan.
+        `buffer=None` mide (autotune) con el mixer cerrado y usa el elegido.
+        """
+        old_format = self._format
+        with self._lock:
+            wanted = list(self._wanted)
+            for fut in self._futures.values():
+                fut.cancel()
+        # Las decodificaciones en curso deben terminar antes de cerrar el mixer
+        self.wait_ready(5.0)
+        try:
+            pygame.mixer.quit()
+        except Exception:
+            pass
+        if buffer is None:
+            buffer, self.tuning_report = autotune_buffer(sorted(LATENCY_PROFILES.values()))
+            if buffer is None:
+                buffer = profile_buffer(DEFAULT_PROFILE)
+        self._init_mixer(buffer)
+        same = self._format == old_format
+        with self._lock:
+            if same:
+                # Solo se relanza lo que no llegó a estar listo
+                for k in [k for k, st in self._state.items() if st != 'ready']:
+                    self._state.pop(k, None)
+            else:
+                self.cache.clear()
+                self._derived.clear()
+                self._state.clear()
+                self._streamed.clear()  # cabe o no en un Channel depende del formato
+                self._decided.clear()
+            self._futures.clear()
+            self._on_demand.clear()
+            self._wanted = set()
+        if _central_logger and _central_logger.enabled():
+            kept = 'se conservan los sonidos' if same else f'antes {old_format}'
+            _central_logger.log(f"[audio] mixer reiniciado: buffer={buffer} formato={self._format} ({kept})")
+        if wanted:
+            self.preload(wanted)
+
+    def set_load_modes(self, modes: Dict[str, str]):
+        """Per-path load mode ('auto' | 'preload' | 'stream'), applied on the next preload()."""
+        self._load_modes = dict(modes)
+
+    def set_variants(self, variants: Dict[str, Iterable[VariantKey]]):
+        """Per-path (start_ms, fade_out_ms) buffers to derive right after decoding."""
+        self._variants = {p: {v for v in vs if v != (0, 0)} for p, vs in variants.items()}
 
     def preload(self, paths: List[str]):
-        # remove stale entries
-        for k in list(self.cache.keys()):
-            if k not in paths:
-                try:
-                    del self.cache[k]
-                except KeyError:
-                    pass
-        for p in paths:
-            if p and p not in self.cache:
+        """Start loading `paths` in the background; cancels the previous preload.
+
+        Solo registra y encola: decidir streaming o decodificación (stat y
+        lectura de cabecera) lo hace el worker, no el hilo que llama.
+        """
+        wanted = {p for p in paths if p}
+        modes = self._load_modes
+        with self._lock:
+            self._wanted = wanted
+            # Una decisión tomada con otro modo de carga ya no vale: se repite
+            redo = {p for p, m in self._decided.items() if p not in wanted or m != modes.get(p, 'auto')}
+            for p in redo:
+                del self._decided[p]
+                self._streamed.pop(p, None)
+                self.cache.pop(p)
+                if self._state.get(p) == 'ready':
+                    self._state.pop(p, None)
+            # remove stale entries and cancel loads that are no longer needed
+            self._drop_derived_locked(lambda k: k[0] in redo or k[0] not in wanted
+                                      or k[1:] not in self._variants.get(k[0], ()))
+            for k in self.cache.keys():
+                if k not in wanted:
+                    self.cache.pop(k)
+                    self._state.pop(k, None)
+            for k, fut in list(self._futures.items()):
+                if k not in wanted and fut.cancel():
+                    self._futures.pop(k, None)
+                    self._state.pop(k, None)
+            self._waiters = {k: v for k, v in self._waiters.items() if k in wanted}
+            todo = [p for p in wanted if self._state.get(p) != 'ready']
+            self._done = 0
+            self._total = len(todo)
+            for p in todo:
+                if self._state.get(p) != 'pending':
+                    self._submit_locked(p)
+        self._notify_progress()
+
+    def is_ready(self, path: str) -> bool:
+        return self._state.get(path) == 'ready'
+
+    def state(self, path: str) -> Optional[str]:
+        return self._state.get(path)
+
+    def progress(self):
+        return self._done, self._total
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every pending load finishes (tests/benchmarks only)."""
+        with self._lock:
+            futs = list(self._futures.values())
+        _, not_done = wait(futs, timeout=timeout)
+        return not not_done
+
+    def _submit_locked(self, path: str):
+        self._state[path] = 'pending'
+        fut = self._pool.submit(self._load, path)
+        self._futures[path] = fut
+
+    def _decode(self, path: str) -> Optional[pygame.mixer.Sound]:
+        disk = self.disk_cache
+        fmt = pygame.mixer.get_init() if disk else None
+        snd: Optional[pygame.mixer.Sound] = None
+        meta: Dict[str, Any] = {}
+        if disk and fmt:
+            hit = disk.load(path, fmt)
+            if hit:
+                mm, meta = hit
                 try:
-                    self.cache[p] = pygame.mixer.Sound(p)
+                    # pygame copia el buffer, el mmap se puede cerrar enseguida
+                    snd = pygame.mixer.Sound(buffer=mm)
                 except Exception:
-                    # ignore bad files
-                    pass
+                    meta = {}
+                finally:
+                    mm.close()
+        fresh = snd is None
+        if fresh:
+            try:
+                snd = pygame.mixer.Sound(path)
+            except Exception:
+                # ignore bad files
+                return None
+        analysis = self._analysis(snd, meta.get('loudness'))
+        if disk and fmt:
+            # En disco queda el PCM original; el análisis va en los metadatos
+            extra = {'loudness': analysis} if analysis else None
+            try:
+                if fresh:
+                    disk.store(path, fmt, snd.get_raw(), extra)
+                elif extra and analysis is not meta.get('loudness'):
+                    disk.update_meta(path, fmt, extra)
+            except Exception:
+                pass
+        return self._condition(snd, analysis)
+
+    def _analysis(self, snd: pygame.mixer.Sound, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if self.normalize_dbfs is None and not self.trim_silence:
+            return None
+        if not loudness.available():
+            if not self._warned_no_numpy:
+                self._warned_no_numpy = True
+                if _central_logger:
+                    _central_logger.log("[audio] normalización/recorte desactivados: falta numpy",
+                                        level=_central_logger.WARNING, source='audio')
+            return None
+        if cached and cached.get('version') == loudness.ANALYSIS_VERSION and cached.get('silence_db') == self.silence_db:
+            return cached
+        return loudness.analyze(snd, self.silence_db)
+
+    def _condition(self, snd: pygame.mixer.Sound, analysis: Optional[Dict[str, Any]]) -> pygame.mixer.Sound:
+        if not analysis:
+            return snd
+        fmt = self._format or (MIXER_FREQ, MIXER_SIZE, MIXER_CHANNELS)
+        # 2 ms de margen para no cortar el ataque
+        return loudness.apply(snd, analysis, target_dbfs=self.normalize_dbfs, trim=self.trim_silence,
+                              pad_frames=int(fmt[0] * 0.002))
+
+    def _load(self, path: str):
+        fmt = self._format
+        mode = self._load_modes.get(path, 'auto')
+        snd: Optional[pygame.mixer.Sound] = None
+        derived: Dict[Tuple[str, int, int], pygame.mixer.Sound] = {}
+        on_channel: Optional[bool] = None  # None = decodificado; si no, streaming
+        if should_stream(path, mode, self.stream_threshold_bytes, self.stream_threshold_s):
+            on_channel = can_stream_on_channel(path, fmt)
+        else:
+            snd = self._decode(path)
+            derived = self._build_variants(path, snd) if snd is not None else {}
+        play_now = False
+        opts: Optional[Dict[str, Any]] = None
+        with self._lock:
+            self._futures.pop(path, None)
+            on_demand = path in self._on_demand
+            self._on_demand.discard(path)
+            if fmt != self._format:
+                # El mixer cambió de formato durante la decodificación: repetir
+                if path in self._wanted or path in self._waiters or on_demand:
+                    if on_demand:
+                        self._on_demand.add(path)
+                    self._submit_locked(path)
+                else:
+                    self._state.pop(path, None)
+                return
+            keep = path in self._wanted or path in self._waiters or on_demand
+            if on_channel is not None and keep:
+                self._state[path] = 'ready'
+                self._streamed[path] = on_channel
+                self._decided[path] = mode
+                opts = self._waiters.pop(path, None)
+                play_now = opts is not None
+            elif on_channel is None and snd is None:
+                self._state[path] = 'failed'
+                self._waiters.pop(path, None)
+            elif keep:
+                self._state[path] = 'ready'
+                self.cache.put(path, snd)
+                self._derived.update(derived)
+                self._decided[path] = mode
+                opts = self._waiters.pop(path, None)
+                play_now = opts is not None
+            else:
+                self._state.pop(path, None)
+            if path in self._wanted:
+                self._done += 1
+        if play_now:
+            if on_channel is not None:
+                self._play_stream(path, opts)
+            else:
+                self._play_sound(snd, path, **opts)
+        if path in self._wanted:
+            self._notify_progress()
+            if self._done >= self._total and self.disk_cache:
+                # Preload terminado: limpiar entradas obsoletas fuera del camino crítico
+                self._pool.submit(self.disk_cache.gc)
+
+    def _on_evict(self, path: str):
+        # Invocado dentro de cache.put (ya con self._lock tomado)
+        self._state.pop(path, None)
+        self._drop_derived_locked(lambda k: k[0] == path)
+
+    def _drop_derived_locked(self, pred: Callable[[Tuple[str, int, int]], bool]):
+        for k in [k for k in self._derived if pred(k)]:
+            del self._derived[k]
+
+    def _build_variants(self, path: str, snd: pygame.mixer.Sound) -> Dict[Tuple[str, int, int], pygame.mixer.Sound]:
+        fmt = self._format
+        out = {}
+        for start_ms, fade_out_ms in self._variants.get(path, ()):
+            try:
+                d = derive(snd, fmt, start_ms, fade_out_ms) if fmt else None
+            except Exception:
+                d = None
+            if d is not None:
+                out[(path, start_ms, fade_out_ms)] = d
+        return out
+
+    def _variant(self, path: str, snd: pygame.mixer.Sound, start_ms: int, fade_out_ms: int,
+                 loops: int) -> Optional[pygame.mixer.Sound]:
+        key = (path,) + variant_key(start_ms, fade_out_ms, loops)
+        d = self._derived.get(key)
+        if d is None and self._format:
+            # Parámetros no registrados (p. ej. preview recién editado): derivar ahora
+            try:
+                d = derive(snd, self._format, key[1], key[2])
+            except Exception:
+                d = None
+            if d is not None:
+                with self._lock:
+                    self._derived[key] = d
+        return d
 
-    def play(self, path: str):
+    def pin(self, path: str):
+        self.cache.pin(path)
+
+    def unpin(self, path: str):
+        self.cache.unpin(path)
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def _notify_progress(self):
+        cb = self.on_progress
+        if cb:
+            try:
+                cb(self._done, self._total)
+            except Exception:
+                pass
+
+    def play(self, path: str, mode: str = 'overlap', max_voices: int = 0, group: str = '',
+             volume: float = 1.0, pan: float = 0.0, fade_in_ms: int = 0, fade_out_ms: int = 0,
+             start_ms: int = 0, loops: int = 0):
+        """Trigger `path`; `mode` is one of RETRIGGER_MODES, `max_voices` 0 = unlimited.
+
+        volume 0..1 y pan -1..1 van al canal; start_ms y fade_out_ms usan un
+        buffer derivado del mismo Sound; loops -1 = infinito.
+        """
         if not path:
             return
+        opts = {
+            'mode': mode, 'max_voices': max_voices, 'group': group, 'volume': volume, 'pan': pan,
+            'fade_in_ms': fade_in_ms, 'fade_out_ms': fade_out_ms, 'start_ms': start_ms, 'loops': loops,
+        }
+        if path in self._streamed:
+            self._play_stream(path, opts)
+            return
         snd = self.cache.get(path)
         if not snd:
+            # Nunca decodificar en el hilo que dispara: aplicar la política
+            with self._lock:
+                snd = self.cache.peek(path)
+                if not snd:
+                    state = self._state.get(path)
+                    if state == 'failed':
+                        return
+                    if self.not_ready_policy == 'play_when_ready':
+                        self._waiters[path] = opts
+                    if state != 'pending':
+                        self._on_demand.add(path)
+                        self._submit_locked(path)
+                    return
+        self._play_sound(snd, path, **opts)
+
+    def _play_sound(self, snd: pygame.mixer.Sound, key: str, mode: str = 'overlap',
+                    max_voices: int = 0, group: str = '', volume: float = 1.0, pan: float = 0.0,
+                    fade_in_ms: int = 0, fade_out_ms: int = 0, start_ms: int = 0, loops: int = 0):
+        if needs_variant(start_ms, fade_out_ms, loops):
+            snd = self._variant(key, snd, start_ms, fade_out_ms, loops)
+            if snd is None:
+                return  # offset más allá del final
+        levels = pan_volumes(volume, pan)
+        voices = self.voices
+        if voices is None:
             try:
-                snd = pygame.mixer.Sound(path)
-                self.cache[path] = snd
+                ch = snd.play(loops=loops, fade_ms=fade_in_ms)
+                if ch is not None:
+                    ch.set_volume(*levels)
             except Exception:
+                pass
+            return
+        voices.play(snd, key, mode=mode, max_voices=max_voices, group=group, loops=loops,
+                    fade_ms=fade_in_ms, volume=levels, fade_out_ms=fade_out_ms)
+
+    def _play_stream(self, path: str, opts: Dict[str, Any]):
+        fmt = self._format
+        levels = pan_volumes(opts['volume'], opts['pan'])
+        if self._streamed.get(path) and fmt and self.voices is not None:
+            self.voices.play(
+                WavChannelStream(path, fmt, start_ms=opts['start_ms']), path, mode=opts['mode'],
+                max_voices=opts['max_voices'], group=opts['group'], loops=opts['loops'],
+                fade_ms=opts['fade_in_ms'], volume=levels, fade_out_ms=opts['fade_out_ms'],
+            )
+            return
+        # mixer.music: una sola pista; 'overlap' y 'restart' la reinician
+        music = self.music
+        if music.path == path and music.busy():
+            if opts.get('mode') == 'toggle':
+                music.stop(opts['fade_out_ms'])
                 return
-        # Reproducimos sin cortar otros (canales elevados arriba)
-        try:
-            snd.play()
-        except Exception:
-            pass
+            if opts.get('mode') == 'ignore':
+                return
+        if not music.play(path, loops=opts['loops'], fade_ms=opts['fade_in_ms'], start_ms=opts['start_ms'],
+                          volume=opts['volume']) and _central_logger and _central_logger.enabled():
+            _central_logger.log(f"[audio] no se pudo reproducir en streaming: {path}")
+
+    def is_streamed(self, path: str) -> bool:
+        return path in self._streamed
+
+    def stop_sound(self, path: str):
+        if self.voices is not None:
+            self.voices.stop_key(path)
+        if self.music.path == path:
+            self.music.stop()
+
+    def voice_stats(self) -> Dict[str, int]:
+        return self.voices.stats() if self.voices is not None else {}
+
+    def set_channel_groups(self, groups: Dict[str, int]):
+        self._channel_groups = dict(groups)
+        if self.voices is not None:
+            self.voices.set_groups(self._channel_groups)
 
     def set_max_channels(self, n: int):
         """Permite ajustar dinámicamente el máximo de canales."""
@@ -53,10 +510,27 @@ class AudioPlayer:
             pygame.mixer.set_num_channels(n)
             self.max_channels = n
         except Exception:
-            pass
+            return
+        if self.voices is not None:
+            self.voices.resize(n)
 
     def stop_all(self):
+        with self._lock:
+            self._waiters.clear()
         try:
             pygame.mixer.stop()
         except Exception:
             pass
+        self.music.stop()
+        if self.voices is not None:
+            self.voices.clear()
+
+    def shutdown(self):
+        """Cancela cargas pendientes y libera el pool de decodificación."""
+        with self._lock:
+            self._wanted = set()
+            self._waiters.clear()
+            for fut in self._futures.values():
+                fut.cancel()
+            self._futures.clear()
+        self._pool.shutdown(wait=False)
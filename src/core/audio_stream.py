@@ -0,0 +1,338 @@
+"""Streaming playback for long files: constant memory instead of a full decode.
+
+`pygame.mixer.Sound(path)` decodifica el archivo entero en RAM; para una pista
+de fondo de 40 minutos son cientos de MB.  En modo "stream":
+
+* WAV PCM en el formato del mixer (o mono, que se duplica a estéreo) se lee
+  por bloques desde un hilo y se encola en el canal asignado por el
+  VoiceManager con `Channel.queue()`; solo viven unos pocos bloques a la vez.
+* Cualquier otro formato cae a `pygame.mixer.music`, que SDL_mixer ya
+  decodifica de forma incremental, pero solo admite una pista simultánea.
+"""
+
+from __future__ import annotations
+
+import os, threading, wave
+from array import array
+from collections import deque
+from typing import Any, Deque, Optional, Tuple
+
+import pygame
+
+# Modo de carga por mapeo
+LOAD_MODES = ('auto', 'preload', 'stream')
+
+MixerFormat = Tuple[int, int, int]  # (freq, size, channels) de pygame.mixer.get_init()
+
+
+def probe_wav(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """(framerate, sampwidth, channels, nframes) from the header, or None if not a PCM WAV."""
+    try:
+        with wave.open(path, 'rb') as w:
+            return w.getframerate(), w.getsampwidth(), w.getnchannels(), w.getnframes()
+    except Exception:
+        return None
+
+
+# Bytes/s típicos para estimar la duración cuando la cabecera no alcanza
+# (~128 kbps con pérdida, ~700 kbps FLAC): mejor sobreestimar que decodificar entero
+_TYPICAL_BPS = {'.mp3': 16000, '.ogg': 16000, '.oga': 16000, '.opus': 12000, '.m4a': 16000,
+                '.aac': 16000, '.wma': 16000, '.flac': 88000}
+_MP3_BITRATES = {  # kbps por índice, MPEG-1 layer III / MPEG-2/2.5 layer III
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(path: str, size: int) -> Optional[float]:
+    with open(path, 'rb') as f:
+        head = f.read(64 * 1024)
+    base = start = 0
+    if head[:3] == b'ID3' and len(head) >= 10:
+        start = 10 + ((head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F))
+        if start + 4 > len(head):
+            # Tag enorme (carátula): leer desde el final del tag
+            with open(path, 'rb') as f:
+                f.seek(start)
+                head = f.read(64 * 1024)
+            base, start = start, 0
+    i = head.find(b'\xff', start)
+    while 0 <= i < len(head) - 4:
+        b1, b2 = head[i + 1], head[i + 2]
+        if b1 & 0xE0 == 0xE0 and (b1 >> 1) & 3 == 1:  # sync + layer III
+            version = (b1 >> 3) & 3  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+            br_idx, sr_idx = b2 >> 4, (b2 >> 2) & 3
+            if version != 1 and 0 < br_idx < 15 and sr_idx < 3:
+                rate = _MP3_RATES[version][sr_idx]
+                spf = 1152 if version == 3 else 576
+                # VBR: cabecera Xing/Info/VBRI con el número de frames
+                for tag in (b'Xing', b'Info'):
+                    j = head.find(tag, i, i + 64)
+                    if j >= 0 and head[j + 7] & 1:
+                        frames = int.from_bytes(head[j + 8:j + 12], 'big')
+                        return frames * spf / float(rate)
+                j = head.find(b'VBRI', i, i + 64)
+                if j >= 0:
+                    frames = int.from_bytes(head[j + 14:j + 18], 'big')
+                    return frames * spf / float(rate)
+                kbps = _MP3_BITRATES[1 if version == 3 else 2][br_idx]
+                return (size - base - i) * 8.0 / (kbps * 1000)
+        i = head.find(b'\xff', i + 1)
+    return None
+
+
+def _ogg_duration(path: str, size: int) -> Optional[float]:
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+    if head[:4] != b'OggS':
+        return None
+    if b'OpusHead' in head:
+        rate = 48000
+    else:
+        j = head.find(b'\x01vorbis')
+        if j < 0:
+            return None
+        rate = int.from_bytes(head[j + 12:j + 16], 'little')
+    k = tail.rfind(b'OggS')
+    if k < 0 or k + 14 > len(tail) or not rate:
+        return None
+    granule = int.from_bytes(tail[k + 6:k + 14], 'little')
+    return granule / float(rate)
+
+
+def _flac_duration(path: str) -> Optional[float]:
+    with open(path, 'rb') as f:
+        head = f.read(42)
+    if head[:4] != b'fLaC' or len(head) < 26:
+        return None
+    info = int.from_bytes(head[18:26], 'big')  # STREAMINFO: rate(20) canales(3) bits(5) muestras(36)
+    rate = info >> 44
+    total = info & ((1 << 36) - 1)
+    if not rate or not total:
+        return None
+    return total / float(rate)
+
+
+def duration_hint(path: str) -> Optional[float]:
+    """Duración en segundos sin decodificar: cabecera WAV/MP3/OGG/FLAC o, si no, estimada por bytes/s."""
+    info = probe_wav(path)
+    if info and info[0]:
+        return info[3] / float(info[0])
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        size = os.path.getsize(path)
+        if ext == '.mp3':
+            dur = _mp3_duration(path, size)
+        elif ext in ('.ogg', '.oga', '.opus'):
+            dur = _ogg_duration(path, size)
+        elif ext == '.flac':
+            dur = _flac_duration(path)
+        else:
+            dur = None
+    except Exception:
+        return None
+    if dur is None and ext in _TYPICAL_BPS:
+        dur = size / float(_TYPICAL_BPS[ext])
+    return dur
+
+
+def should_stream(path: str, mode: str, threshold_bytes: int, threshold_s: float) -> bool:
+    """Resolve a mapping's load mode; 'auto' streams files over either threshold.
+
+    La duración sale de la cabecera (también MP3/OGG/FLAC): un MP3 de 10 min
+    pesa ~9 MB, por debajo del umbral de tamaño, y decodificado son ~100 MB.
+    """
+    if mode == 'stream':
+        return True
+    if mode == 'preload':
+        return False
+    try:
+        if threshold_bytes and os.path.getsize(path) >= threshold_bytes:
+            return True
+    except OSError:
+        return False
+    dur = duration_hint(path)
+    return bool(threshold_s and dur is not None and dur >= threshold_s)
+
+
+def can_stream_on_channel(path: str, fmt: Optional[MixerFormat]) -> bool:
+    """True if `path` can be fed raw into a Channel for the current mixer format."""
+    if not fmt:
+        return False
+    info = probe_wav(path)
+    if not info:
+        return False
+    rate, width, channels, _ = info
+    freq, size, mix_channels = fmt
+    # Solo PCM 16 bits con signo a la misma frecuencia (WAV de 8 bits es unsigned)
+    if rate != freq or width != 2 or size != -16:
+        return False
+    return channels == mix_channels or (channels == 1 and mix_channels == 2)
+
+
+class WavChannelStream:
+    """Feeds a WAV file into one Channel chunk by chunk from a background thread.
+
+    VoiceManager lo trata como un Sound: llama a `start_on(channel)` en lugar
+    de `channel.play()` y a `is_playing_on(channel)` para saber si la voz sigue
+    viva, de modo que polifonía, redisparo y robo funcionan igual.
+    """
+
+    def __init__(self, path: str, fmt: MixerFormat, chunk_ms: int = 250, start_ms: int = 0):
+        self.path = path
+        self._start_ms = start_ms
+        self._fmt = fmt
+        self._chunk_frames = max(256, int(fmt[0] * chunk_ms / 1000))
+        self._poll = chunk_ms / 4000.0
+        self._stop = threading.Event()
+        self._channel: Any = None
+        self._wav: Optional[wave.Wave_read] = None
+        # Bloques vivos: el que suena, el encolado y uno de margen
+        self._ring: Deque[Any] = deque(maxlen=3)
+        self._loops = 0
+        self._thread: Optional[threading.Thread] = None
+        self._volume = 1.0
+
+    # ---- interfaz tipo Sound ----
+    def get_volume(self) -> float:
+        return self._volume
+
+    def set_volume(self, v: float):
+        self._volume = v
+
+    def start_on(self, channel: Any, loops: int = 0, maxtime: int = 0, fade_ms: int = 0):
+        self._wav = wave.open(self.path, 'rb')
+        if self._start_ms > 0:
+            pos = int(self._wav.getframerate() * self._start_ms / 1000)
+            try:
+                self._wav.setpos(min(pos, self._wav.getnframes()))
+            except Exception:
+                pass
+        self._channel = channel
+        self._loops = loops
+        first = self._next_sound()
+        if first is None:
+            self._close()
+            raise ValueError(f"stream vacío: {self.path}")
+        channel.play(first, fade_ms=fade_ms)
+        second = self._next_sound()
+        if second is not None:
+            channel.queue(second)
+        self._thread = threading.Thread(target=self._run, name='audio-stream', daemon=True)
+        self._thread.start()
+
+    def is_playing_on(self, channel: Any) -> bool:
+        if self._stop.is_set() or channel is not self._channel:
+            return False
+        try:
+            return bool(channel.get_busy()) and channel.get_sound() in self._ring
+        except Exception:
+            return False
+
+    def stop(self):
+        self._stop.set()
+        ch = self._channel
+        if ch is not None:
+            try:
+                ch.stop()
+            except Exception:
+                pass
+
+    # ---- internos ----
+    def _next_sound(self) -> Optional[Any]:
+        w = self._wav
+        if w is None:
+            return None
+        data = w.readframes(self._chunk_frames)
+        if not data:
+            if self._loops == 0:
+                return None
+            if self._loops > 0:
+                self._loops -= 1
+            w.rewind()
+            data = w.readframes(self._chunk_frames)
+            if not data:
+                return None
+        if w.getnchannels() == 1 and self._fmt[2] == 2:
+            data = _mono_to_stereo16(data)
+        snd = pygame.mixer.Sound(buffer=data)
+        snd.set_volume(self._volume)
+        self._ring.append(snd)
+        return snd
+
+    def _run(self):
+        ch = self._channel
+        try:
+            while not self._stop.is_set():
+                cur = ch.get_sound()
+                if cur is None or cur not in self._ring:
+                    break  # detenido o robado por otra voz
+                if ch.get_queue() is None:
+                    snd = self._next_sound()
+                    if snd is None:
+                        break
+                    ch.queue(snd)
+                self._stop.wait(self._poll)
+        except Exception:
+            pass
+        finally:
+            self._close()
+
+    def _close(self):
+        w, self._wav = self._wav, None
+        if w is not None:
+            try:
+                w.close()
+            except Exception:
+                pass
+
+
+def _mono_to_stereo16(data: bytes) -> bytes:
+    mono = array('h')
+    mono.frombytes(data[: len(data) - len(data) % 2])
+    stereo = array('h', bytes(len(mono) * 4))
+    stereo[0::2] = mono
+    stereo[1::2] = mono
+    return stereo.tobytes()
+
+
+class MusicStream:
+    """Single-track fallback on pygame.mixer.music for non-WAV long files."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+
+    def busy(self) -> bool:
+        try:
+            return bool(pygame.mixer.music.get_busy())
+        except Exception:
+            return False
+
+    def play(self, path: str, loops: int = 0, fade_ms: int = 0, start_ms: int = 0, volume: float = 1.0) -> bool:
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(loops=loops, start=start_ms / 1000.0, fade_ms=fade_ms)
+        except Exception:
+            return False
+        self.path = path
+        return True
+
+    def stop(self, fade_ms: int = 0):
+        try:
+            if fade_ms > 0:
+                pygame.mixer.music.fadeout(fade_ms)
+            else:
+                pygame.mixer.music.stop()
+        except Exception:
+            pass
+        self.path = None
+
+
+__all__ = [
+    'LOAD_MODES', 'WavChannelStream', 'MusicStream', 'probe_wav', 'duration_hint',
+    'should_stream', 'can_stream_on_channel',
+]
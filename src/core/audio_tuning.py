@@ -0,0 +1,143 @@
+"""Mixer latency profiles and buffer-size auto-tuning.
+
+El tamaño de buffer del mixer (frames) define la latencia base: 512 frames a
+44.1 kHz son ~11.6 ms más el buffering de SDL.  Los perfiles nombrados fijan
+el buffer; el modo "auto" mide el callback del dispositivo de salida por
+defecto (el del mixer, que debe estar cerrado mientras) con cada candidato
+(de menor a mayor) y se queda con el menor que es estable.
+
+La métrica es jitter del callback, no underruns: SDL no informa de cuándo el
+buffer del dispositivo se vacía.  Un callback que llega >1.5x más tarde de lo
+esperado ("tardío") es el síntoma medible más cercano: con buffers pequeños
+es lo que precede a los cortes, pero no los cuenta.
+"""
+
+from __future__ import annotations
+
+import threading, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+MIXER_FREQ = 44100
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+
+LATENCY_PROFILES: Dict[str, int] = {
+    'ultra-low': 128,
+    'low': 256,
+    'balanced': 512,
+    'safe': 1024,
+}
+DEFAULT_PROFILE = 'balanced'
+
+
+def profile_buffer(profile: str) -> int:
+    return LATENCY_PROFILES.get(profile, LATENCY_PROFILES[DEFAULT_PROFILE])
+
+
+def _release_audio():
+    # Devolver la referencia al subsistema de audio: mixer.init() no abre el
+    # dispositivo si SDL ya tiene el audio inicializado.  Con el mixer cerrado,
+    # mixer.quit() solo hace SDL_QuitSubSystem(AUDIO)
+    try:
+        import pygame
+        pygame.mixer.quit()
+    except Exception:
+        pass
+
+
+def _measure(chunk: int, freq: int, channels: int, seconds: float) -> Optional[Dict[str, float]]:
+    """Open the default SDL output device with `chunk` frames and time its callbacks.
+
+    El mixer de pygame tiene que estar cerrado: se mide el mismo dispositivo.
+    """
+    try:
+        from pygame._sdl2 import audio as sdl2_audio, sdl2  # type: ignore
+        # Con el mixer cerrado el subsistema de audio de SDL también lo está
+        sdl2.init_subsystem(sdl2.INIT_AUDIO)
+    except Exception:
+        return None
+    stamps: List[float] = []
+    busy: List[float] = []
+    lock = threading.Lock()
+
+    def callback(_device, stream):
+        t0 = time.perf_counter()
+        # Silencio: solo interesa el ritmo del callback
+        stream[:] = bytes(len(stream))
+        with lock:
+            stamps.append(t0)
+            busy.append(time.perf_counter() - t0)
+
+    try:
+        # pygame no deja pasar NULL (el "por defecto" de SDL); el primero de la lista lo es
+        names = sdl2_audio.get_audio_device_names(False)
+        device = sdl2_audio.AudioDevice(
+            devicename=names[0] if names else '',
+            iscapture=False,
+            frequency=freq,
+            audioformat=sdl2_audio.AUDIO_S16,
+            numchannels=channels,
+            chunksize=chunk,
+            allowed_changes=0,
+            callback=callback,
+        )
+    except Exception:
+        _release_audio()
+        return None
+    try:
+        device.pause(0)
+        time.sleep(seconds)
+        device.pause(1)
+    finally:
+        try:
+            device.close()
+        except Exception:
+            pass
+        _release_audio()
+    with lock:
+        stamps = list(stamps)
+        busy = list(busy)
+    if len(stamps) < 4:
+        return None
+    expected = chunk / float(freq)
+    intervals = sorted(b - a for a, b in zip(stamps, stamps[1:]))
+    # Jitter: callbacks que llegan 1.5x tarde (riesgo de vaciado, no un underrun contado)
+    late = sum(1 for dt in intervals if dt > expected * 1.5)
+    p99 = intervals[min(len(intervals) - 1, int(len(intervals) * 0.99))]
+    return {
+        'buffer': chunk,
+        'callbacks': len(stamps),
+        'expected_ms': expected * 1000.0,
+        'p99_interval_ms': p99 * 1000.0,
+        'max_busy_ms': max(busy) * 1000.0 if busy else 0.0,
+        'late_callbacks': late,
+        'late_ratio': late / float(len(intervals)),
+    }
+
+
+def autotune_buffer(candidates: Sequence[int] = (128, 256, 512, 1024), freq: int = MIXER_FREQ,
+                    channels: int = MIXER_CHANNELS, seconds: float = 0.3,
+                    max_late_ratio: float = 0.01) -> Tuple[Optional[int], List[Dict[str, float]]]:
+    """Return (smallest stable buffer or None if unmeasurable, per-candidate report)."""
+    report: List[Dict[str, float]] = []
+    for chunk in sorted(candidates):
+        m = _measure(chunk, freq, channels, seconds)
+        if m is None:
+            break
+        stable = m['late_ratio'] <= max_late_ratio and m['p99_interval_ms'] <= m['expected_ms'] * 2.0
+        m['stable'] = 1.0 if stable else 0.0
+        report.append(m)
+        if stable:
+            if _central_logger and _central_logger.enabled():
+                _central_logger.log(f"[audio] auto-tune: buffer {chunk} estable ({m['p99_interval_ms']:.1f} ms p99)")
+            return chunk, report
+    return None, report
+
+
+__all__ = ['LATENCY_PROFILES', 'DEFAULT_PROFILE', 'profile_buffer', 'autotune_buffer',
+           'MIXER_FREQ', 'MIXER_SIZE', 'MIXER_CHANNELS']
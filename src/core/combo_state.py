@@ -0,0 +1,180 @@
+"""Incremental combo-state engine shared by keyboard, mouse and HID listeners.
+
+Cada entrada que forma parte de algún combo registrado recibe un bit; lo
+pulsado es un entero con esos bits.  Solo los combos registrados (los que
+tienen mapeo o interesan al agregador multi) se indexan por máscara, así que
+una pulsación es un par de operaciones de bits y un lookup en dict, y soltar
+es O(1).  Las entradas sin bit (no aparecen en ningún combo) se cuentan aparte
+porque bloquean la coincidencia exacta del combo completo.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+_NONE: Tuple[str, ...] = ()
+
+
+def split_combo(code: str) -> List[str]:
+    """'ctrl+a' -> ['ctrl', 'a']; respeta la tecla '+' ('ctrl++' -> ['ctrl', '+'])."""
+    parts = code.split('+')
+    out: List[str] = []
+    i = 0
+    while i < len(parts):
+        if parts[i] == '' and i + 1 < len(parts) and parts[i + 1] == '':
+            out.append('+')
+            i += 2
+            continue
+        if parts[i]:
+            out.append(parts[i])
+        i += 1
+    return out
+
+
+class ComboState:
+    """Tracks pressed inputs and reports registered combos as they complete.
+
+    Semántica (la misma que tenían los listeners): al pulsar se dispara el
+    combo formado por *todas* las entradas pulsadas y, si hay más de una, la
+    entrada recién pulsada por sí sola (salvo las de `solo_excluded`, p. ej.
+    modificadores).  Un combo no se repite hasta que alguna de sus entradas
+    se suelta y se vuelve a pulsar.
+    """
+
+    def __init__(self, solo_excluded: Iterable[str] = ()):
+        self._solo_excluded = frozenset(solo_excluded)
+        self._ids: Dict[str, int] = {}
+        self._combos: Dict[int, str] = {}
+        self._bits: Dict[int, Tuple[int, ...]] = {}
+        self._pressed_at: List[int] = []
+        self._fired: Dict[int, int] = {}
+        self._other: Set[str] = set()
+        self._epoch = 0
+        self.pressed = 0
+
+    # ---- compilación ----
+    def add(self, code: str):
+        names = split_combo(code)
+        if not names:
+            return
+        mask = 0
+        bits = []
+        for n in names:
+            bit = self._ids.get(n)
+            if bit is None:
+                bit = len(self._pressed_at)
+                self._ids[sys.intern(n)] = bit
+                self._pressed_at.append(0)
+            if not mask & (1 << bit):
+                bits.append(bit)
+            mask |= 1 << bit
+        self._combos[mask] = sys.intern(code)
+        self._bits[mask] = tuple(bits)
+
+    def clear_combos(self):
+        self._combos.clear()
+        self._bits.clear()
+        self._fired.clear()
+
+    def has_combos(self) -> bool:
+        return bool(self._combos)
+
+    def is_known(self, name: str) -> bool:
+        return name in self._ids
+
+    # ---- estado en caliente ----
+    def press(self, name: str) -> Sequence[str]:
+        """Register a press and return the registered combos that fire now."""
+        bit = self._ids.get(name)
+        if bit is None:
+            self._other.add(name)
+            return _NONE
+        m = 1 << bit
+        if not self.pressed & m:
+            self._epoch += 1
+            self._pressed_at[bit] = self._epoch
+            self.pressed |= m
+        out = _NONE
+        if not self._other:
+            code = self._combos.get(self.pressed)
+            if code is not None and self._arm(self.pressed):
+                out = (code,)
+        if (self.pressed != m or self._other) and name not in self._solo_excluded:
+            code = self._combos.get(m)
+            if code is not None and self._arm(m):
+                out = out + (code,)
+        return out
+
+    def press_many(self, names: Sequence[str]) -> Sequence[str]:
+        """Inputs that went down together (one HID report): one check for the whole batch.
+
+        Igual que `press()` pero el "recién pulsado" es el lote: se dispara el
+        combo de todo lo pulsado y, si hay más, el combo formado por el lote.
+        Así dos bits que cambian en el mismo report no disparan cada uno por
+        separado.  Si el lote trae alguna entrada sin combo, el lote no es
+        ningún combo registrado: no se dispara el subconjunto conocido.
+        """
+        if len(names) == 1:
+            return self.press(names[0])
+        batch = 0
+        unknown = False
+        for name in names:
+            bit = self._ids.get(name)
+            if bit is None:
+                self._other.add(name)
+                unknown = True
+            else:
+                batch |= 1 << bit
+        if not batch:
+            return _NONE
+        new = batch & ~self.pressed
+        if new:
+            self._epoch += 1
+            pa = self._pressed_at
+            while new:
+                low = new & -new
+                pa[low.bit_length() - 1] = self._epoch
+                new ^= low
+            self.pressed |= batch
+        out = _NONE
+        if not self._other:
+            code = self._combos.get(self.pressed)
+            if code is not None and self._arm(self.pressed):
+                out = (code,)
+        if not unknown and (self.pressed != batch or self._other):
+            code = self._combos.get(batch)
+            if code is not None and self._arm(batch):
+                out = out + (code,)
+        return out
+
+    def release(self, name: str):
+        bit = self._ids.get(name)
+        if bit is None:
+            self._other.discard(name)
+            return
+        # O(1): los combos disparados se invalidan por época al volver a pulsar
+        self.pressed &= ~(1 << bit)
+
+    def reset(self):
+        self.pressed = 0
+        self._other.clear()
+        self._fired.clear()
+
+    def pressed_count(self) -> int:
+        return bin(self.pressed).count('1') + len(self._other)
+
+    def _arm(self, mask: int) -> bool:
+        e = self._fired.get(mask)
+        if e is not None:
+            pa = self._pressed_at
+            for b in self._bits[mask]:
+                if pa[b] > e:
+                    break
+            else:
+                return False
+        self._fired[mask] = self._epoch
+        return True
+
+
+__all__ = ['ComboState', 'split_combo']
@@ -1,31 +1,222 @@
 import json
 import os
-from typing import Any, Dict
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+
+def _default_data() -> Dict[str, Any]:
+    return {
+        'selected_device': {'type': 'keyboard'},
+        'mappings': [],
+    }
+
+
+def validate(data: Any) -> bool:
+    """Shape check del config: un archivo truncado o editado a mano no debe cargarse."""
+    if not isinstance(data, dict):
+        return False
+    if not isinstance(data.get('mappings', []), list):
+        return False
+    if not all(isinstance(m, dict) for m in data.get('mappings', [])):
+        return False
+    sel = data.get('selected_device', {'type': 'keyboard'})
+    if not isinstance(sel, dict) or not isinstance(sel.get('type', 'keyboard'), str):
+        return False
+    for section in ('audio', 'dispatch', 'hid'):
+        if not isinstance(data.get(section, {}), dict):
+            return False
+    return True
 
 
 class ConfigStore:
-    def __init__(self):
+    """config.json con escritura atómica, guardado diferido en segundo plano y backups rotativos.
+
+    `save()` solo sube la versión y despierta al escritor, que espera
+    `debounce_s` sin nuevos cambios y serializa entonces (fuera del hilo de la
+    GUI; sin copia por llamada).  Cada escritura lleva la versión que
+    serializó y una versión ya superada no llega al disco.  Cada escritura va a un
+    temporal (fsync) que reemplaza al archivo con un solo `os.replace`; antes,
+    como mucho una vez por sesión y cada `rotate_every_s`, el principal se
+    enlaza (o copia) como `config.json.bak1` (y los previos pasan a .bak2...):
+    config.json no desaparece nunca y una ráfaga de guardados no se come los
+    backups buenos.  `load()` valida y, si el
+    principal está corrupto, usa el backup válido más reciente.
+    """
+
+    def __init__(self, debounce_s: float = 0.5, backups: int = 3, directory: Optional[str] = None,
+                 rotate_every_s: float = 600.0):
         appdata = os.getenv('APPDATA') or os.path.expanduser('~')
-        self.dir = os.path.join(appdata, 'USB-Sound-Mapper')
+        self.dir = directory or os.path.join(appdata, 'USB-Sound-Mapper')
         self.path = os.path.join(self.dir, 'config.json')
-        self.data: Dict[str, Any] = {
-            'selected_device': {'type': 'keyboard'},
-            'mappings': [],
-        }
+        self.data: Dict[str, Any] = _default_data()
+        self.debounce_s = max(0.0, debounce_s)
+        self.backups = max(0, backups)
+        self.rotate_every_s = max(0.0, rotate_every_s)
+        self._rotated_at: Optional[float] = None  # monotonic de la última rotación de esta sesión
+        self.loaded_from: Optional[str] = None
+        self._main_valid = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._version = 0  # sube en cada save()
+        self._written = 0  # versión que hay en disco
+        self._last_change = 0.0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
         self.load()
 
-    def load(self):
+    def _backup_path(self, n: int) -> str:
+        return f"{self.path}.bak{n}"
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
         try:
-            if os.path.exists(self.path):
-                with open(self.path, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         except Exception:
-            pass
+            return None
+        return data if validate(data) else None
+
+    def load(self):
+        if not os.path.exists(self.path) and not os.path.exists(self._backup_path(1)):
+            return
+        data = self._read(self.path)
+        self._main_valid = data is not None
+        source = self.path if data is not None else None
+        if data is None:
+            for n in range(1, self.backups + 1):
+                data = self._read(self._backup_path(n))
+                if data is not None:
+                    source = self._backup_path(n)
+                    break
+        if data is None:
+            self._log(f"[config] {self.path} inválido y sin backup válido; usando valores por defecto", force=True)
+            return
+        if source != self.path:
+            self._log(f"[config] {self.path} inválido; recuperado desde {os.path.basename(source)}", force=True)
+        self.data = data
+        self.loaded_from = source
 
     def save(self):
+        """Programa un guardado en segundo plano (agrupa cambios seguidos)."""
+        with self._lock:
+            self._version += 1
+            self._last_change = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='config-writer', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self) -> bool:
+        """Escribe ya cualquier guardado pendiente (al salir)."""
+        with self._lock:
+            version = self._version
+        if version <= self._written:
+            return True
+        return self._write(version)
+
+    def close(self):
+        # Parar el escritor antes de la escritura final: nada suyo puede caer después
+        self._closed = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            while not self._closed:
+                with self._lock:
+                    version = self._version
+                    if version <= self._written:
+                        break
+                    left = self._last_change + self.debounce_s - time.monotonic()
+                if left > 0:
+                    self._wake.wait(left)
+                    self._wake.clear()
+                    continue
+                if not self._write(version):
+                    break  # sin reintento en bucle: el próximo save() vuelve a intentarlo
+
+    def _dump(self) -> str:
+        # Desde el escritor self.data puede cambiar a mitad; ese cambio trae su
+        # propio save() (versión nueva), así que basta con reintentar el volcado
+        for _ in range(2):
+            try:
+                return json.dumps(self.data, indent=2, ensure_ascii=False)
+            except RuntimeError:  # "changed size during iteration"
+                time.sleep(0.01)
+        return json.dumps(self.data, indent=2, ensure_ascii=False)
+
+    def _write(self, version: int) -> bool:
+        t0 = time.perf_counter()
+        tmp = None
         try:
-            os.makedirs(self.dir, exist_ok=True)
-            with open(self.path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-        except Exception:
+            text = self._dump()
+        except Exception as e:
+            self._log(f"[config] error al serializar: {e}", force=True)
+            return False
+        with self._write_lock:
+            if version <= self._written:
+                return True  # ya hay en disco algo igual o más nuevo
+            try:
+                raw = text.encode('utf-8')
+                os.makedirs(self.dir, exist_ok=True)
+                tmp = f"{self.path}.{threading.get_ident()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._rotate()
+                os.replace(tmp, self.path)
+                self._main_valid = True
+                self._written = version
+            except Exception as e:
+                self._log(f"[config] error al guardar {self.path}: {e}", force=True)
+                if tmp:
+                    try:
+                        os.remove(tmp)
+                    except Exception:
+                        pass
+                return False
+        self._log(f"[config] guardado {len(raw)} bytes en {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return True
+
+    def _rotate(self):
+        # Solo un principal válido pasa a ser el último backup bueno
+        if not self.backups or not self._main_valid or not os.path.exists(self.path):
+            return
+        now = time.monotonic()
+        if self._rotated_at is not None and now - self._rotated_at < self.rotate_every_s:
+            return
+        for n in range(self.backups - 1, 0, -1):
+            src = self._backup_path(n)
+            if os.path.exists(src):
+                os.replace(src, self._backup_path(n + 1))
+        # Enlace (o copia) a un temporal y rename: el principal sigue en su sitio
+        tmp = f"{self._backup_path(1)}.tmp"
+        try:
+            os.remove(tmp)
+        except OSError:
             pass
+        try:
+            os.link(self.path, tmp)
+        except OSError:
+            shutil.copy2(self.path, tmp)
+        os.replace(tmp, self._backup_path(1))
+        self._rotated_at = now
+
+    @staticmethod
+    def _log(msg: str, force: bool = False):
+        if _central_logger and (force or _central_logger.enabled()):
+            _central_logger.log(msg)
@@ -2,42 +2,58 @@
 
 from __future__ import annotations
 
-import os, time, threading
-from typing import Callable, Dict, Optional
+import os, sys, time, threading
+from collections import deque
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
 from .types import EventSignature
+from .trigger_dispatcher import TriggerDispatcher
+from .combo_state import ComboState
+from .hid_decoder import HidReportDecoder, decoder_options, is_keyboard_collection, is_legacy_code
+from .hid_enum import shared_enumerator
+from .hid_hub import HidHub, pick_hid_device
+from .input_backends import InputBackend, default_backend
 
 try:
     from . import logger as _central_logger  # type: ignore
 except Exception:  # pragma: no cover
     _central_logger = None
 
-
-try:
-    from pynput import keyboard, mouse  # type: ignore
-except Exception:  # pragma: no cover
-    keyboard = None  # type: ignore
-    mouse = None  # type: ignore
-
 # MIDI support
 try:
     import mido
 except Exception:
     mido = None
 
-try:
-    import pywinusb.hid as hid  # type: ignore
-except Exception:  # pragma: no cover
-    hid = None  # type: ignore
-
 Callback = Callable[[], None]
+# Entrada del índice compilado: (firma internada, que es la clave de dispatch, callback)
+Binding = Tuple[EventSignature, Callback]
+
+_MODIFIERS = ('shift', 'ctrl', 'alt', 'meta')
+# Prefijos de token en los códigos 'multi'
+_TOKEN_PREFIXES = ('kb:', 'ms:', 'hid:')
 
 
 class DeviceListener:
-    def __init__(self, dtype: str, dinfo: Dict):
+    def __init__(self, dtype: str, dinfo: Dict, dispatcher: Optional[TriggerDispatcher] = None,
+                 hid_hub: Optional[HidHub] = None, backend: Optional[InputBackend] = None):
         self.dtype = dtype
         self.dinfo = dinfo
+        # Origen de eventos (pynput/pywinusb o sintético)
+        self._backend = backend or default_backend()
+        # Lector HID compartido (MultiDeviceListener); None = hilo y dispositivo propios
+        self._hid_hub = hid_hub
+        # Cola de disparo compartida; si es None los callbacks se ejecutan en el hilo del hook
+        self._dispatcher = dispatcher
         self.is_running = False
-        self._bindings = {}
+        # Índice compilado en bind(): tipo -> code -> (firma, callback)
+        self._index: Dict[str, Dict[str, Binding]] = {'keyboard': {}, 'mouse': {}, 'hid': {}, 'midi': {}}
+        self._exact_codes = set()
+        # Combos registrados para el tipo propio (mapeos + tokens multi vigilados)
+        self._combo = ComboState(solo_excluded=_MODIFIERS if dtype == 'keyboard' else ())
+        # HID: códigos legacy de report entero ('01-00FF') en su propio estado, aparte de los botones
+        self._hid_legacy = ComboState()
+        # code vigilado -> token multi precalculado ('kb:ctrl+a', 'hid:vid:pid:code'...)
+        self._watch: Dict[str, str] = {}
         self._capture_callback = None
         self._capture_keep_open = False
         self._thread = None
@@ -46,9 +62,6 @@ class DeviceListener:
         self._hid_device = None
         self._kb_listener = None
         self._mouse_listener = None
-        # Keyboard state
-        self._pressed_keys = set()
-        self._fired_combos = set()
         # Capture state
         self._capture_keys = set()
         self._capture_timer = None
@@ -59,18 +72,56 @@ class DeviceListener:
         self._parent_multidevice = None  # type: ignore
 
     def bind(self, sig: EventSignature, cb: Callback):
-        self._bindings[self._sig_key(sig)] = cb
+        index = self._index.get(sig.type)
+        if index is None:
+            return
+        if sig.type == 'hid' and self.dtype == 'hid' and (
+            sig.vendor_id != self.dinfo.get('vendor_id') or sig.product_id != self.dinfo.get('product_id')
+        ):
+            # Mapeo de otro dispositivo HID: nunca puede coincidir aquí
+            return
+        key = sig  # firma internada: hash/igualdad baratos para coalescing y stats
+        code = sig.code
+        index[code] = (key, cb)
+        self._exact_codes.add((sig.type, code))
+        if sig.type == self.dtype:
+            self._state_for(code).add(code)
+        # Alias legacy 'Key.x' resuelto ahora, no en cada pulsación
+        if sig.type == 'keyboard' and code.startswith('Key.') and '+' not in code:
+            alias = sys.intern(code[4:])
+            if ('keyboard', alias) not in self._exact_codes:
+                index[alias] = (key, cb)
+                if self.dtype == 'keyboard':
+                    self._combo.add(alias)
+
+    def watch(self, code: str, token: str):
+        """Report `token` to the parent aggregator whenever `code` fires (multi combos)."""
+        code = sys.intern(code)
+        self._watch[code] = sys.intern(token)
+        self._state_for(code).add(code)
+
+    def _state_for(self, code: str) -> ComboState:
+        if self.dtype == 'hid' and is_legacy_code(code):
+            return self._hid_legacy
+        return self._combo
 
     def start(self):
         if self.is_running:
             return
         self._stop_event.clear()
+        if self._hid_hub is not None and self.dtype == 'hid':
+            # Modo hub: sin hilo propio, los reports llegan por el lector compartido
+            self._hid_hub.subscribe(self.dinfo.get('vendor_id'), self.dinfo.get('product_id'), self._make_hid_handler())
+            self.is_running = True
+            return
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
         self.is_running = True
 
     def stop(self):
         self._stop_event.set()
+        if self._hid_hub is not None and self.dtype == 'hid':
+            self._hid_hub.unsubscribe(self.dinfo.get('vendor_id'), self.dinfo.get('product_id'))
         for attr in ['_kb_listener', '_mouse_listener']:
             lst = getattr(self, attr, None)
             if lst:
@@ -110,8 +161,23 @@ class DeviceListener:
         if cb:
             cb(sig)
 
-    def _sig_key(self, sig: EventSignature) -> str:
-        return f"{sig.type}:{sig.vendor_id}:{sig.product_id}:{sig.code}"
+    def _notify_parent(self, code: str):
+        token = self._watch.get(code)
+        parent = self._parent_multidevice
+        if token is None or parent is None:
+            return
+        try:
+            parent._on_token(token)  # type: ignore
+        except Exception:
+            pass
+
+    def _trigger(self, key, cb: Callback):
+        # Nunca reproducir dentro del callback del hook: encolar y volver
+        d = self._dispatcher
+        if d is not None:
+            d.submit(key, cb)
+        else:
+            cb()
 
     def _run(self):
         try:
@@ -124,8 +190,8 @@ class DeviceListener:
             elif self.dtype == 'midi':
                 self._run_midi()
         except Exception as e:  # pragma: no cover
-            if _central_logger and _central_logger.has_listeners():
-                _central_logger.log(f"[listener] error {self.dtype}: {e}")
+            if _central_logger and _central_logger.enabled(_central_logger.ERROR):
+                _central_logger.log("[listener] error %s: %s", self.dtype, e, level=_central_logger.ERROR, source='listener')
 
     # ---- midi ----
     def _run_midi(self):
@@ -140,22 +206,16 @@ class DeviceListener:
             for msg in self._midi_inport.iter_pending():
                 if msg.type in ('note_on', 'note_off', 'control_change'):
                     code = f"{msg.type}:{msg.channel}:{getattr(msg, 'note', getattr(msg, 'control', ''))}"
-                    human = self._midi_human(msg)
-                    sig = EventSignature(type='midi', code=code, human=human)
                     self._midi_last_msg = msg
                     if self._capture_callback:
-                        self._emit_capture(sig)
+                        self._emit_capture(EventSignature(type='midi', code=code, human=self._midi_human(msg)))
                         if not self._capture_keep_open:
                             return
-                    cb = self._bindings.get(self._sig_key(sig))
-                    if cb:
-                        cb()
-                    parent = getattr(self, '_parent_multidevice', None)
-                    if parent:
-                        try:
-                            parent._on_raw_event(sig)  # type: ignore
-                        except Exception:
-                            pass
+                    hit = self._index['midi'].get(code)
+                    if hit:
+                        self._trigger(*hit)
+                    if code in self._watch:
+                        self._notify_parent(code)
             self._stop_event.wait(0.05)
 
     def _midi_human(self, msg):
@@ -172,10 +232,11 @@ class DeviceListener:
 
     # ---- keyboard ----
     def _run_keyboard(self):  # noqa: C901
-        if not keyboard:
-            return
 
-        def norm(k):
+        repl = {'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl', 'alt_l': 'alt', 'alt_r': 'alt', 'shift_l': 'shift', 'shift_r': 'shift', 'cmd': 'meta', 'cmd_l': 'meta', 'cmd_r': 'meta', 'windows': 'meta', 'esc': 'escape'}
+        names: Dict[object, str] = {}
+
+        def norm_slow(k):
             try:
                 if getattr(k, 'char', None):
                     return k.char.lower()
@@ -184,34 +245,33 @@ class DeviceListener:
             s = str(k)
             if s.startswith('Key.'):
                 s = s[4:]
-            repl = {'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl', 'alt_l': 'alt', 'alt_r': 'alt', 'shift_l': 'shift', 'shift_r': 'shift', 'cmd': 'meta', 'cmd_l': 'meta', 'cmd_r': 'meta', 'windows': 'meta', 'esc': 'escape'}
-            return repl.get(s, s).lower()
+            return sys.intern(repl.get(s, s).lower())
 
-        def human(keys):
-            pretty = {'ctrl': 'Ctrl', 'alt': 'Alt', 'shift': 'Shift', 'meta': 'Win'}
-            parts = [pretty.get(k, k.upper() if len(k) == 1 else k.capitalize()) for k in keys]
-            return ("Tecla " if len(keys) == 1 else "Combo ") + '+'.join(parts)
+        def norm(k):
+            # Las teclas son finitas: normalizar una sola vez por objeto tecla
+            try:
+                name = names.get(k)
+                if name is None:
+                    name = names[k] = norm_slow(k)
+                return name
+            except TypeError:
+                return norm_slow(k)
 
         def code(keys):
             return '+'.join(keys)
 
+        index = self._index['keyboard']
+        state = self._combo
+
         def fire(combo):
-            sig = EventSignature(type='keyboard', code=combo, human=human(combo.split('+')))
-            cb = self._bindings.get(self._sig_key(sig))
-            if not cb and '+' not in combo:
-                legacy = EventSignature(type='keyboard', code=f"Key.{combo}", human=sig.human)
-                cb = self._bindings.get(self._sig_key(legacy))
-            if cb:
-                cb()
-                if _central_logger and _central_logger.has_listeners():
-                    _central_logger.log(f"[keyboard] trigger {combo}")
-            # Always notify parent for multi aggregation
-            parent = getattr(self, '_parent_multidevice', None)
-            if parent:
-                try:
-                    parent._on_raw_event(sig)  # type: ignore
-                except Exception:
-                    pass
+            hit = index.get(combo)
+            if hit:
+                self._trigger(*hit)
+                if _central_logger and _central_logger.enabled(_central_logger.DEBUG):
+                    _central_logger.log("[keyboard] trigger %s", combo, level=_central_logger.DEBUG, source='keyboard')
+            # Notify parent only for tokens used by multi bindings
+            if combo in self._watch:
+                self._notify_parent(combo)
 
         def finalize():
             self._capture_timer = None
@@ -220,12 +280,9 @@ class DeviceListener:
             keys = sorted(self._capture_keys)
             if not keys:
                 return
-            sig = EventSignature(type='keyboard', code=code(keys), human=human(keys))
-            try:
-                if _central_logger:
-                    print(f"[capture] keyboard: {sig.code}")
-            except Exception:
-                pass
+            sig = EventSignature(type='keyboard', code=code(keys))
+            if _central_logger and _central_logger.enabled():
+                _central_logger.log("[capture] keyboard: %s", sig.code, source='capture')
             self._capture_keys.clear()
             self._emit_capture(sig)
             if not self._capture_keep_open and self._kb_listener:
@@ -250,60 +307,39 @@ class DeviceListener:
                 self._capture_keys.add(name)
                 schedule()
                 return
-            self._pressed_keys.add(name)
-            keys_sorted = sorted(self._pressed_keys)
-            combo = code(keys_sorted)
-            if combo not in self._fired_combos:
+            for combo in state.press(name):
                 fire(combo)
-                self._fired_combos.add(combo)
-            if len(keys_sorted) > 1 and name not in ['shift', 'ctrl', 'alt', 'meta']:
-                if name not in self._fired_combos:
-                    fire(name)
-                    self._fired_combos.add(name)
 
         def on_release(k):
             name = norm(k)
-            if name in self._pressed_keys:
-                self._pressed_keys.remove(name)
-            for c in [c for c in self._fired_combos if name in c.split('+')]:
-                self._fired_combos.remove(c)
+            state.release(name)
             if self._capture_callback and not self._capture_keys:
                 finalize()
 
-        self._kb_listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        self._kb_listener.start()
-        self._kb_listener.join()
+        self._kb_listener = self._backend.keyboard(on_press, on_release)
+        if self._kb_listener:
+            self._kb_listener.join()
 
     # ---- mouse ----
     def _run_mouse(self):  # noqa: C901
-        if not mouse:
-            return
-        pressed, fired = set(), set()
         cap, cap_timer = set(), {'t': None}
+        state = self._combo
 
         def norm(btn):
             s = str(btn)
             return s[7:] if s.startswith('Button.') else s
 
-        def human(btns):
-            pretty = {'left': 'Izq', 'right': 'Der', 'middle': 'Centro'}
-            parts = [pretty.get(b, b.capitalize()) for b in btns]
-            return ("Mouse " if len(btns) == 1 else "Combo Mouse ") + '+'.join(parts)
-
         def code(btns):
             return '+'.join(btns)
 
+        index = self._index['mouse']
+
         def fire(combo):
-            sig = EventSignature(type='mouse', code=combo, human=human(combo.split('+')))
-            cb = self._bindings.get(self._sig_key(sig))
-            if cb:
-                cb()
-            parent = getattr(self, '_parent_multidevice', None)
-            if parent:
-                try:
-                    parent._on_raw_event(sig)  # type: ignore
-                except Exception:
-                    pass
+            hit = index.get(combo)
+            if hit:
+                self._trigger(*hit)
+            if combo in self._watch:
+                self._notify_parent(combo)
 
         def finalize():
             cap_timer['t'] = None
@@ -312,7 +348,7 @@ class DeviceListener:
             btns = sorted(cap)
             if not btns:
                 return
-            sig = EventSignature(type='mouse', code=code(btns), human=human(btns))
+            sig = EventSignature(type='mouse', code=code(btns))
             cap.clear()
             self._emit_capture(sig)
             if not self._capture_keep_open and self._mouse_listener:
@@ -343,140 +379,194 @@ class DeviceListener:
                         finalize()
                 return
             if pressed_flag:
-                pressed.add(name)
-                btns_sorted = sorted(pressed)
-                combo = code(btns_sorted)
-                if combo not in fired:
+                for combo in state.press(name):
                     fire(combo)
-                    fired.add(combo)
-                if len(btns_sorted) > 1 and name not in fired:
-                    fire(name)
-                    fired.add(name)
             else:
-                if name in pressed:
-                    pressed.remove(name)
-                for c in [c for c in fired if name in c.split('+')]:
-                    fired.remove(c)
+                state.release(name)
 
-        self._mouse_listener = mouse.Listener(on_click=on_click)
-        self._mouse_listener.start()
-        self._mouse_listener.join()
+        self._mouse_listener = self._backend.mouse(on_click)
+        if self._mouse_listener:
+            self._mouse_listener.join()
 
     # ---- hid ----
-    def _run_hid(self):  # noqa: C901
-        if not hid:
-            return
+    def _run_hid(self):
         vid = self.dinfo.get('vendor_id')
         pid = self.dinfo.get('product_id')
-        debug = os.getenv('SP_DEBUG_HID') == '1'
-        dev = None
-        candidates = list(hid.HidDeviceFilter(vendor_id=vid, product_id=pid).get_devices())
-        preferred = []
-        for d in candidates:
-            try:
-                for col in getattr(d, 'top_level_collections', []) or []:
-                    if getattr(col, 'usage_page', None) == 0x01 and getattr(col, 'usage', None) == 0x06:
-                        preferred.append(d)
-                        break
-            except Exception:
-                pass
-        for d in preferred + [c for c in candidates if c not in preferred]:
-            dev = d
-            break
+        # Candidatos de la enumeración compartida (cacheada), no una enumeración por listener
+        dev = pick_hid_device(shared_enumerator(self._backend).candidates(vid, pid))
         if not dev:
             return
         self._hid_device = dev
         self._hid_device.open()
-        pressed, fired = set(), set()
-        last = {'t': 0.0}
+        self._hid_device.set_raw_data_handler(self._make_hid_handler(dev))
+        # Nada que sondear: los reports llegan por el hilo lector de pywinusb
+        self._stop_event.wait()
+        try:
+            self._hid_device.set_raw_data_handler(None)
+        except Exception:
+            pass
 
-        def cleanup():
-            if time.time() - last['t'] > 0.6:
-                pressed.clear(); fired.clear()
+    def _make_hid_handler(self, dev=None) -> Callable[[List[int]], None]:
+        vid = self.dinfo.get('vendor_id')
+        pid = self.dinfo.get('product_id')
+        debug = os.getenv('SP_DEBUG_HID') == '1'
+        if dev is None:
+            # Modo hub: el hub abrirá el mismo candidato que elige pick_hid_device
+            # (sus candidatos: nada de enumerar en el hilo que arranca el listener)
+            dev = pick_hid_device(self._hid_hub.candidates(vid, pid))
+        # La colección de teclado manda un array de códigos, no un bitmap de botones
+        decoder = HidReportDecoder(keyboard=is_keyboard_collection(dev), **decoder_options(vid, pid))
+        captured, held = set(), set()
+        index = self._index['hid']
+        state = self._combo
+        legacy = self._hid_legacy
+        last = {'t': 0.0}
 
-        def human(codes):
-            if len(codes) == 1:
-                return f"HID {vid:04X}:{pid:04X} [{next(iter(codes))}]"
-            return f"HID Combo {vid:04X}:{pid:04X} [{'+'.join(sorted(codes))}]"
+        def fire(combo):
+            hit = index.get(combo)
+            if hit: self._trigger(*hit)
+            if combo in self._watch:
+                self._notify_parent(combo)
+
+        def raw_legacy(data):
+            # Camino legacy (mapeos '01-00FF'): el report entero es el código y el
+            # estado se limpia tras 0.6 s sin reports, como antes
+            report = data[0]; payload = bytes(data[1:])
+            code = f"{report:02X}-" + payload.hex().upper()
+            now = time.time()
+            if now - last['t'] > 0.6:
+                legacy.reset()
+            last['t'] = now
+            for combo in legacy.press(code):
+                fire(combo)
 
         def raw(data):
             if not data:
                 return
-            report = data[0]; payload = bytes(data[1:])
-            code = f"{report:02X}-" + payload.hex().upper()
-            last['t'] = time.time(); cleanup()
-            if debug:
-                try: print(f"[hid] {code}")
-                except Exception: pass
+            if legacy.has_combos():
+                raw_legacy(data)
+            pressed, released = decoder.feed(data)
+            if not pressed and not released:
+                return
+            if debug and _central_logger and _central_logger.enabled(_central_logger.DEBUG):
+                _central_logger.log("[hid] +%s -%s", pressed, released, level=_central_logger.DEBUG, source='hid')
+            for name in released:
+                state.release(name)
+                held.discard(name)
+            if not pressed:
+                return
+            if not held:
+                captured.clear()  # gesto nuevo: antes estaba todo suelto
+            held.update(pressed)
             if self._capture_callback:
-                pressed.add(code)
-                sig = EventSignature(type='hid', vendor_id=vid, product_id=pid, code='+'.join(sorted(pressed)), human=human(pressed))
+                captured.update(pressed)
+                sig = EventSignature(type='hid', vendor_id=vid, product_id=pid, code='+'.join(sorted(captured)))
                 self._emit_capture(sig)
                 if not self._capture_keep_open:
                     return
-            pressed.add(code)
-            combo = '+'.join(sorted(pressed)); h = human(pressed)
-            if combo not in fired:
-                sig = EventSignature(type='hid', vendor_id=vid, product_id=pid, code=combo, human=h)
-                cb = self._bindings.get(self._sig_key(sig))
-                if cb: cb()
-                fired.add(combo)
-                parent = getattr(self, '_parent_multidevice', None)
-                if parent:
-                    try:
-                        parent._on_raw_event(sig)  # type: ignore
-                    except Exception:
-                        pass
-            if code not in fired:
-                single = EventSignature(type='hid', vendor_id=vid, product_id=pid, code=code, human=human({code}))
-                cb = self._bindings.get(self._sig_key(single))
-                if cb: cb()
-                fired.add(code)
-                parent = getattr(self, '_parent_multidevice', None)
-                if parent:
-                    try:
-                        parent._on_raw_event(single)  # type: ignore
-                    except Exception:
-                        pass
-
-        self._hid_device.set_raw_data_handler(raw)
-        while not self._stop_event.is_set():
-            self._stop_event.wait(0.2)
-        try:
-            self._hid_device.set_raw_data_handler(None)
-        except Exception:
-            pass
+            for combo in state.press_many(pressed):
+                fire(combo)
+
+        return raw
+
+
+def split_multi_code(code: str) -> List[str]:
+    """'hid:1:2:01-00+kb:ctrl+a' -> ['hid:1:2:01-00', 'kb:ctrl+a']."""
+    tokens: List[str] = []
+    for piece in code.split('+'):
+        if piece.startswith(_TOKEN_PREFIXES) or not tokens:
+            tokens.append(piece)
+        else:
+            tokens[-1] += '+' + piece
+    return [t for t in tokens if t]
+
+
+def _token_code_for(listener: DeviceListener, token: str) -> Optional[str]:
+    if listener.dtype == 'keyboard' and token.startswith('kb:'):
+        return token[3:]
+    if listener.dtype == 'mouse' and token.startswith('ms:'):
+        return token[3:]
+    if listener.dtype == 'hid' and token.startswith('hid:'):
+        parts = token.split(':', 3)
+        if len(parts) == 4 and parts[1] == str(listener.dinfo.get('vendor_id')) and parts[2] == str(listener.dinfo.get('product_id')):
+            return parts[3]
+    return None
+
+
+def _token_type(token: str) -> str:
+    return token[:token.index(':')]
+
+
+class _MultiBinding:
+    __slots__ = ('key', 'cb', 'tokens', 'types', 'fired')
+
+    def __init__(self, key: EventSignature, cb: Callback, tokens: FrozenSet[str]):
+        self.key = key
+        self.cb = cb
+        self.tokens = tokens
+        self.types = frozenset(_token_type(t) for t in tokens if ':' in t)
+        self.fired = False
 
 
 class MultiDeviceListener:
     """Aggregates keyboard/mouse/HID for capture and runtime multi-combos."""
 
-    def __init__(self):
+    def __init__(self, dispatcher: Optional[TriggerDispatcher] = None, backend: Optional[InputBackend] = None):
         self.is_running = False
-        self._listeners = [DeviceListener('keyboard', {}), DeviceListener('mouse', {})]
-        try:
-            from .hid_devices import list_hid_devices  # type: ignore
-            for dev in list_hid_devices():
-                self._listeners.append(DeviceListener('hid', {'vendor_id': dev.vendor_id, 'product_id': dev.product_id}))
-        except Exception:
-            pass
+        self._dispatcher = dispatcher
+        self._backend = backend or default_backend()
+        self._listeners = [
+            DeviceListener('keyboard', {}, dispatcher, backend=self._backend),
+            DeviceListener('mouse', {}, dispatcher, backend=self._backend),
+        ]
+        # Un solo lector HID: una enumeración y un hilo de despacho para todos
+        self._hid_hub = HidHub(backend=self._backend)
+        self._hid_hub.on_added = self._add_hid_listener
+        self._hid_hub.on_removed = self._remove_hid_listener
+        # Solo la foto cacheada; lo que falte llega por on_added al refrescarse
+        for vid, pid in self._hid_hub.enumerate():
+            self._listeners.append(DeviceListener('hid', {'vendor_id': vid, 'product_id': pid}, dispatcher, self._hid_hub, self._backend))
+        # Para reaplicar a dispositivos conectados en caliente
+        self._bound: List[Tuple[EventSignature, Callback]] = []
+        self._watched: Dict[str, None] = {}
         self._capture_lock = threading.Lock()
         self._capture_done = False
-        self._multi_bindings: Dict[str, Callback] = {}
-        # runtime aggregation state
-        self._md_tokens = set()
-        self._md_last_time = 0.0
+        self._multi_bindings: Dict[EventSignature, Callback] = {}
+        # runtime aggregation state: token -> mapeos multi que lo contienen
+        self._md_index: Dict[str, List[_MultiBinding]] = {}
+        self._md_active: Dict[str, float] = {}  # token -> último instante visto
+        self._md_expiry: Deque[Tuple[float, str]] = deque()
+        self._md_type_count: Dict[str, int] = {'kb': 0, 'ms': 0, 'hid': 0}
         self._md_timeout = 0.6
-        self._md_fired = set()
         self._md_lock = threading.Lock()
 
     def bind(self, sig: EventSignature, cb: Callback):
         if sig.type == 'multi':
-            self._multi_bindings[f"multi::{sig.code}"] = cb
+            key = sig
+            tokens = frozenset(sys.intern(t) for t in split_multi_code(sig.code))
+            with self._md_lock:
+                if key in self._multi_bindings:
+                    for lst in self._md_index.values():
+                        lst[:] = [b for b in lst if b.key != key]
+                self._multi_bindings[key] = cb
+                mb = _MultiBinding(key, cb, tokens)
+                for t in tokens:
+                    self._md_index.setdefault(t, []).append(mb)
+            # Los sub-listeners solo reportan los tokens que forman combos multi
+            for token in tokens:
+                self._watched[token] = None
+                for l in self._listeners:
+                    self._watch_token(l, token)
             return
+        self._bound.append((sig, cb))
         for l in self._listeners:
             l.bind(sig, cb)
 
+    def _watch_token(self, l: DeviceListener, token: str):
+        code = _token_code_for(l, token)
+        if code is not None:
+            l.watch(code, token)
+
     def start(self):
         if self.is_running:
             return
@@ -485,16 +575,51 @@ class MultiDeviceListener:
                 l._parent_multidevice = self  # type: ignore
                 l.start()
             except Exception: pass
+        # Antes del hub: start() sincroniza con el enumerador y los HID que
+        # aparezcan ahí llegan por _add_hid_listener, que solo los arranca si ya corremos
         self.is_running = True
+        # Abre en paralelo todos los HID suscritos
+        self._hid_hub.start()
 
     def stop(self):
         for l in self._listeners:
             try: l.stop()
             except Exception: pass
+        self._hid_hub.stop()
         self.is_running = False
         with self._capture_lock:
             self._capture_done = True
 
+    def refresh_devices(self):
+        """Re-enumerate HID devices now and add/remove sub-listeners without restarting.
+
+        Arrancado no hace falta llamarlo: el hub sigue los refrescos del enumerador compartido.
+        """
+        return self._hid_hub.refresh()
+
+    def _add_hid_listener(self, vid: int, pid: int):
+        if any(l.dtype == 'hid' and l.dinfo.get('vendor_id') == vid and l.dinfo.get('product_id') == pid for l in self._listeners):
+            return
+        l = DeviceListener('hid', {'vendor_id': vid, 'product_id': pid}, self._dispatcher, self._hid_hub, self._backend)
+        for sig, cb in self._bound:
+            l.bind(sig, cb)
+        for token in self._watched:
+            self._watch_token(l, token)
+        l._parent_multidevice = self  # type: ignore
+        # Copia al escribir: otros hilos iteran la lista sin lock
+        self._listeners = self._listeners + [l]
+        if self.is_running:
+            l.start()
+
+    def _remove_hid_listener(self, vid: int, pid: int):
+        gone = [l for l in self._listeners if l.dtype == 'hid' and l.dinfo.get('vendor_id') == vid and l.dinfo.get('product_id') == pid]
+        if not gone:
+            return
+        self._listeners = [l for l in self._listeners if l not in gone]
+        for l in gone:
+            try: l.stop()
+            except Exception: pass
+
     def capture_next(self, callback: Callable[[EventSignature], None]):
         with self._capture_lock:
             self._capture_done = False
@@ -514,9 +639,9 @@ class MultiDeviceListener:
             try:
                 if len(agg['tokens']) >= 2 and len(agg['types']) >= 2:
                     code = '+'.join(sorted(agg['tokens']))
-                    sig = EventSignature(type='multi', code=code, human=f"Multi {code}")
+                    sig = EventSignature(type='multi', code=code)
                 else:
-                    sig = agg['first'] if agg['first'] else EventSignature(type='keyboard', code='', human='')
+                    sig = agg['first'] if agg['first'] else EventSignature(type='keyboard', code='')
                 callback(sig)
             finally:
                 self.stop()
@@ -537,27 +662,56 @@ class MultiDeviceListener:
 
     # runtime multi-trigger after individual mappings fire
     def _on_raw_event(self, sig: EventSignature):
-        now = time.time()
+        if sig.type == 'keyboard': token = f"kb:{sig.code}"
+        elif sig.type == 'mouse': token = f"ms:{sig.code}"
+        elif sig.type == 'hid': token = f"hid:{sig.vendor_id}:{sig.product_id}:{sig.code}"
+        else: return
+        self._on_token(token)
+
+    def _on_token(self, token: str, now: Optional[float] = None):
+        """Feed one token into the sliding window and fire completed multi bindings."""
+        candidates = self._md_index.get(token)
+        if not candidates:
+            return
+        if now is None:
+            now = time.monotonic()
+        to_fire = []
         with self._md_lock:
-            if now - self._md_last_time > self._md_timeout:
-                self._md_tokens.clear(); self._md_fired.clear()
-            self._md_last_time = now
-            if sig.type == 'keyboard': token = f"kb:{sig.code}"
-            elif sig.type == 'mouse': token = f"ms:{sig.code}"
-            elif sig.type == 'hid': token = f"hid:{sig.vendor_id}:{sig.product_id}:{sig.code}"
-            else: return
-            self._md_tokens.add(token)
-            # Need at least two device types
-            types = set()
-            for t in self._md_tokens:
-                if t.startswith('kb:'): types.add('kb')
-                elif t.startswith('ms:'): types.add('ms')
-                elif t.startswith('hid:'): types.add('hid')
-            if len(types) < 2:
+            self._expire_locked(now)
+            active = self._md_active
+            if token not in active:
+                self._md_type_count[_token_type(token)] += 1
+            active[token] = now
+            self._md_expiry.append((now, token))
+            # Rechazo rápido: un combo multi necesita al menos dos tipos activos
+            if sum(1 for c in self._md_type_count.values() if c) < 2:
                 return
-            code = '+'.join(sorted(self._md_tokens))
-            key = f"multi::{code}"
-            if key in self._multi_bindings and key not in self._md_fired:
-                try: self._multi_bindings[key]()
+            for mb in candidates:
+                if mb.fired or len(mb.types) < 2:
+                    continue
+                for t in mb.tokens:
+                    if t not in active:
+                        break
+                else:
+                    mb.fired = True
+                    to_fire.append(mb)
+        for mb in to_fire:
+            if self._dispatcher is not None:
+                self._dispatcher.submit(mb.key, mb.cb)
+            else:
+                try: mb.cb()
                 except Exception: pass
-                self._md_fired.add(key)
+
+    def _expire_locked(self, now: float):
+        # Expira tokens individuales (no todo el conjunto) fuera de la ventana
+        limit = now - self._md_timeout
+        exp = self._md_expiry
+        active = self._md_active
+        while exp and exp[0][0] < limit:
+            t, token = exp.popleft()
+            if active.get(token) != t:
+                continue  # visto de nuevo más tarde; hay otra entrada en la cola
+            del active[token]
+            self._md_type_count[_token_type(token)] -= 1
+            for mb in self._md_index.get(token, ()):
+                mb.fired = False
@@ -0,0 +1,268 @@
+"""Bit-level HID report decoding: button press/release edges instead of hex strings.
+
+Antes cada report crudo se convertía en `'RR-' + payload.hex()` y eso era el
+"botón": un byte analógico con jitter o un contador hacía que cada report
+fuese un código nuevo y el estado solo se limpiaba tras 0.6 s sin reports.
+El decodificador guarda el último payload de cada report ID, hace XOR con el
+nuevo y convierte cada bit que cambia en un flanco de pulsación o de
+liberación de un botón estable `'RR/byte.bit'` (p.ej. `'01/3.5'`).  La
+referencia inicial de cada ID es un report a cero (o el reposo configurado en
+`hid.rest`): muchas botoneras solo envían reports cuando algo cambia, así que
+el primer report ya puede ser una pulsación.  Los bytes de hat o ejes, que no
+reposan en cero, se declaran en `hid.baseline_bytes` (su primer valor es el
+reposo) o se enmascaran.
+
+Las colecciones de teclado (usage page 0x01, usage 0x06, la que prefiere
+`pick_hid_device`) no son un bitmap: el report boot trae un byte de
+modificadores y un array de códigos de tecla.  Con `keyboard=True` los
+modificadores se decodifican por bit y el array por código (`'RR/k04'` = A),
+así pulsar B (0x05) no se confunde con los bits de A (0x04).
+
+Los bytes ruidosos se ignoran con máscaras por report ID (config
+`hid.ignore_masks`) y, además, un byte que cambia demasiado a menudo
+(ejes analógicos, contadores) se enmascara solo (`hid.auto_noise`, por
+defecto activo; el umbral es por tiempo, pensado para el ritmo de reports de
+un dispositivo real).
+
+Los códigos legacy (`'01-00FF...'`, siempre con '-') siguen funcionando: el
+listener mantiene su camino hex solo si hay mapeos con ese formato.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+_NONE: Tuple[str, ...] = ()
+
+# Auto-máscara: un byte que cambia NOISE_CHANGES veces dentro de NOISE_WINDOW_S
+# no es un botón (un humano no llega a ~50 cambios/s en el mismo byte)
+NOISE_CHANGES = 12
+NOISE_WINDOW_S = 0.25
+
+Edges = Tuple[Sequence[str], Sequence[str]]  # (pulsados, soltados)
+
+
+def is_legacy_code(code: str) -> bool:
+    """True for whole-report hex codes ('01-00FF', also inside combos)."""
+    return '-' in code
+
+
+def button_code(report_id: int, byte: int, bit: int) -> str:
+    return f"{report_id:02X}/{byte}.{bit}"
+
+
+def key_code(report_id: int, usage: int) -> str:
+    """Tecla del array de un report de teclado ('00/k04' = usage 0x04, A)."""
+    return f"{report_id:02X}/k{usage:02X}"
+
+
+def is_keyboard_collection(dev: Any) -> bool:
+    """True si el dispositivo elegido es la colección de teclado (reports con array de teclas)."""
+    try:
+        for col in getattr(dev, 'top_level_collections', []) or []:
+            if getattr(col, 'usage_page', None) == 0x01 and getattr(col, 'usage', None) == 0x06:
+                return True
+    except Exception:
+        pass
+    return False
+
+
+def parse_mask(value: Any) -> int:
+    """Mask as int over the payload bytes (bit i of byte n = bit 8*n+i).
+
+    Acepta un hex de bytes ('00FF00' = ignorar el byte 1 entero), una lista de
+    índices de byte ([1, 2]) o un int ya armado.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return int.from_bytes(bytes.fromhex(value), 'little')
+    mask = 0
+    for byte in value or ():
+        mask |= 0xFF << (8 * int(byte))
+    return mask
+
+
+# ---- configurado por dispositivo (VID:PID -> report ID -> máscara o valor) ----
+PerDevice = Dict[Tuple[int, int], Dict[int, int]]
+_masks: PerDevice = {}
+_rest: PerDevice = {}
+_baseline: PerDevice = {}
+_masks_lock = threading.Lock()
+_auto_noise = True
+
+
+def _per_device(config: Optional[Mapping[str, Mapping[str, Any]]]) -> PerDevice:
+    parsed: PerDevice = {}
+    for dev, per_report in (config or {}).items():
+        try:
+            vid, pid = (int(x, 16) for x in dev.split(':'))
+            parsed[(vid, pid)] = {int(rid, 16): parse_mask(m) for rid, m in (per_report or {}).items()}
+        except Exception:
+            continue
+    return parsed
+
+
+def set_ignore_masks(config: Mapping[str, Mapping[str, Any]], auto_noise: bool = True,
+                     rest: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                     baseline: Optional[Mapping[str, Mapping[str, Any]]] = None):
+    """Load the `hid` config: {'VVVV:PPPP': {'RR': value}} (hex keys) per setting.
+
+    `config` = `ignore_masks`; `rest` = payload en reposo en hex (mismo orden
+    de bytes que el report); `baseline` = `baseline_bytes`, bytes cuyo primer
+    valor se toma como reposo (hat, ejes).
+    """
+    global _auto_noise
+    masks, rests, bases = _per_device(config), _per_device(rest), _per_device(baseline)
+    with _masks_lock:
+        _masks.clear()
+        _masks.update(masks)
+        _rest.clear()
+        _rest.update(rests)
+        _baseline.clear()
+        _baseline.update(bases)
+        _auto_noise = bool(auto_noise)
+
+
+def decoder_options(vendor_id: Optional[int], product_id: Optional[int]) -> Dict[str, Any]:
+    """kwargs de HidReportDecoder para un VID:PID según lo configurado."""
+    key = (vendor_id, product_id)
+    with _masks_lock:
+        return {'ignore': dict(_masks.get(key, {})), 'auto_noise': _auto_noise,
+                'rest': dict(_rest.get(key, {})), 'baseline': dict(_baseline.get(key, {}))}
+
+
+class HidReportDecoder:
+    """Diffs each report against the previous one with the same report ID.
+
+    `feed(data)` devuelve (pulsados, soltados) como códigos de botón
+    internados; si no cambió ningún bit relevante devuelve tuplas vacías sin
+    crear strings.  En modo bitmap la referencia de cada ID es `rest` (por
+    defecto cero) y los bytes de `baseline` toman su primer valor como reposo;
+    en modo `keyboard` el reposo es "ninguna tecla" (array vacío).
+    """
+
+    # Usages del array que no son teclas: nada, ErrorRollOver, POSTFail, ErrorUndefined
+    _NOT_KEYS = frozenset((0x00, 0x01, 0x02, 0x03))
+
+    def __init__(self, ignore: Optional[Mapping[int, Any]] = None, auto_noise: bool = True,
+                 keyboard: bool = False, rest: Optional[Mapping[int, Any]] = None,
+                 baseline: Optional[Mapping[int, Any]] = None):
+        self._prev: Dict[int, int] = {}
+        self._rest: Dict[int, int] = {rid: parse_mask(v) for rid, v in (rest or {}).items()}
+        self._baseline: Dict[int, int] = {rid: parse_mask(m) for rid, m in (baseline or {}).items()}
+        self._keyboard = keyboard
+        self._keys: Dict[int, frozenset] = {}  # modo keyboard: report -> teclas del array
+        self._ignore: Dict[int, int] = {rid: parse_mask(m) for rid, m in (ignore or {}).items()}
+        self._auto_noise = auto_noise
+        # (report, byte) -> [inicio de ventana, cambios en la ventana]
+        self._noise: Dict[Tuple[int, int], List[float]] = {}
+        self._names: Dict[Tuple[int, int], str] = {}
+
+    def ignored(self, report_id: int) -> int:
+        return self._ignore.get(report_id, 0)
+
+    def reset(self):
+        """Olvida los reports vistos: se vuelve a comparar contra el reposo."""
+        self._prev.clear()
+        self._keys.clear()
+        self._noise.clear()
+
+    def feed(self, data: Sequence[int]) -> Edges:
+        if not data:
+            return _NONE, _NONE
+        if self._keyboard:
+            return self._feed_keyboard(data)
+        rid = data[0]
+        cur = int.from_bytes(bytes(data[1:]), 'little')
+        prev = self._prev.get(rid)
+        self._prev[rid] = cur
+        if prev is None:
+            # Primer report: contra el reposo; los bytes de hat/ejes declarados lo fijan ahora
+            base = self._baseline.get(rid, 0)
+            prev = (self._rest.get(rid, 0) & ~base) | (cur & base)
+        diff = cur ^ prev
+        if not diff:
+            return _NONE, _NONE
+        ignore = self._ignore.get(rid, 0)
+        released: List[str] = []
+        if self._auto_noise:
+            noisy = self._track_noise(rid, diff & ~ignore)
+            if noisy:
+                ignore |= noisy
+                self._ignore[rid] = ignore
+                # Lo que estaba "pulsado" en esos bytes se suelta una vez
+                released.extend(self._names_of(rid, prev & noisy))
+        changed = diff & ~ignore
+        if not changed:
+            return _NONE, released
+        pressed = self._names_of(rid, changed & cur)
+        released.extend(self._names_of(rid, changed & prev))
+        return pressed, released
+
+    def _feed_keyboard(self, data: Sequence[int]) -> Edges:
+        # [report, modificadores, reservado, tecla1..tecla6]; el reservado es 0 y cae en _NOT_KEYS
+        rid = data[0]
+        mods = data[1] if len(data) > 1 else 0
+        prev_mods = self._prev.get(rid, 0)
+        self._prev[rid] = mods
+        keys = frozenset(k for k in data[2:] if k not in self._NOT_KEYS)
+        if 0x01 in data[2:]:
+            keys = self._keys.get(rid, keys)  # rollover: el array no es fiable, mantener el anterior
+        prev_keys = self._keys.get(rid, frozenset())
+        self._keys[rid] = keys
+        changed = mods ^ prev_mods
+        if not changed and keys == prev_keys:
+            return _NONE, _NONE
+        pressed = self._names_of(rid, changed & mods)
+        released = self._names_of(rid, changed & prev_mods)
+        for k in sorted(keys - prev_keys):
+            pressed.append(self._key_name(rid, k))
+        for k in sorted(prev_keys - keys):
+            released.append(self._key_name(rid, k))
+        return pressed, released
+
+    def _key_name(self, rid: int, usage: int) -> str:
+        slot = (rid, -1 - usage)  # negativo: no choca con las posiciones de bit
+        name = self._names.get(slot)
+        if name is None:
+            name = self._names[slot] = sys.intern(key_code(rid, usage))
+        return name
+
+    def _names_of(self, rid: int, bits: int) -> List[str]:
+        out: List[str] = []
+        names = self._names
+        while bits:
+            low = bits & -bits
+            pos = low.bit_length() - 1
+            name = names.get((rid, pos))
+            if name is None:
+                name = names[(rid, pos)] = sys.intern(button_code(rid, pos >> 3, pos & 7))
+            out.append(name)
+            bits ^= low
+        return out
+
+    def _track_noise(self, rid: int, changed: int) -> int:
+        """Máscara de bytes que acaban de pasar el umbral de cambios."""
+        noisy = 0
+        now = time.monotonic()
+        byte = 0
+        while changed:
+            if changed & 0xFF:
+                slot = self._noise.get((rid, byte))
+                if slot is None or now - slot[0] > NOISE_WINDOW_S:
+                    self._noise[(rid, byte)] = [now, 1]
+                else:
+                    slot[1] += 1
+                    if slot[1] >= NOISE_CHANGES:
+                        noisy |= 0xFF << (8 * byte)
+            changed >>= 8
+            byte += 1
+        return noisy
+
+
+__all__ = ['HidReportDecoder', 'is_legacy_code', 'button_code', 'key_code', 'is_keyboard_collection', 'parse_mask', 'set_ignore_masks',
+           'decoder_options', 'NOISE_CHANGES', 'NOISE_WINDOW_S']
@@ -16,22 +16,15 @@ class HidDeviceInfo:
 
 
 def list_hid_devices() -> List[HidDeviceInfo]:
-    devices: List[HidDeviceInfo] = []
+    """HID devices deduplicated by VID:PID, from the shared cached enumeration.
+
+    Solo enumera (de forma síncrona) si aún no hay foto; si está caducada
+    devuelve la última y refresca en segundo plano (ver hid_enum).
+    """
     if not hid:
-        return devices
-    seen = set()
-    for d in hid.HidDeviceFilter().get_devices():
-        try:
-            key = (d.vendor_id, d.product_id)
-            if key in seen:
-                continue
-            seen.add(key)
-            devices.append(HidDeviceInfo(
-                vendor_id=d.vendor_id,
-                product_id=d.product_id,
-                vendor_name=d.vendor_name,
-                product_name=d.product_name,
-            ))
-        except Exception:
-            continue
-    return devices
+        return []
+    from .hid_enum import shared_enumerator
+    try:
+        return shared_enumerator().devices()
+    except Exception:
+        return []
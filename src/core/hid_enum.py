@@ -0,0 +1,226 @@
+"""Cached HID enumeration: one snapshot per backend, refreshed off-thread.
+
+Enumerar con pywinusb (`HidDeviceFilter().get_devices()`) es lento y antes se
+hacía en cada "Refrescar dispositivos", en cada MultiDeviceListener y otra vez
+en cada `_run_hid`.  El enumerador guarda la última foto (VID:PID ->
+candidatos) con un TTL: leerla solo bloquea la primera vez; si está caducada
+se devuelve igual y se refresca en un hilo.  Cada refresco se compara con la
+foto anterior y los cambios (añadidos, quitados) se publican a los
+suscriptores (selector de la GUI, HidHub) para actualizar de forma incremental.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .hid_devices import HidDeviceInfo
+from .input_backends import InputBackend, default_backend
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+DeviceKey = Tuple[int, int]  # (vendor_id, product_id)
+ChangeCallback = Callable[[List[DeviceKey], List[DeviceKey]], None]  # (añadidos, quitados)
+DoneCallback = Callable[[str], None]  # error ('' si fue bien)
+
+DEFAULT_TTL = 5.0
+# Un VID:PID que no está en la foto fuerza un refresco síncrono, pero no más a menudo que esto
+_MISS_MIN_AGE = 0.5
+
+
+def _log(msg: str):
+    if _central_logger and _central_logger.enabled():
+        _central_logger.log(msg, source='hid')
+
+
+def group_by_key(devices: Iterable[Any]) -> Dict[DeviceKey, List[Any]]:
+    groups: Dict[DeviceKey, List[Any]] = {}
+    for d in devices:
+        try:
+            groups.setdefault((d.vendor_id, d.product_id), []).append(d)
+        except Exception:
+            continue
+    return groups
+
+
+def device_info(key: DeviceKey, candidates: List[Any]) -> HidDeviceInfo:
+    d = candidates[0] if candidates else None
+    return HidDeviceInfo(
+        vendor_id=key[0],
+        product_id=key[1],
+        vendor_name=getattr(d, 'vendor_name', None),
+        product_name=getattr(d, 'product_name', None),
+    )
+
+
+class HidEnumerator:
+    """TTL-cached VID:PID -> device candidates with async refresh and change events."""
+
+    def __init__(self, backend: Optional[InputBackend] = None, ttl: float = DEFAULT_TTL):
+        self._backend = backend or default_backend()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # una enumeración a la vez
+        # La foto se reemplaza entera en cada refresco, nunca se muta: se puede leer sin lock
+        self._groups: Dict[DeviceKey, List[Any]] = {}
+        self._stamp: Optional[float] = None  # monotonic de la última enumeración buena
+        self._worker: Optional[threading.Thread] = None
+        self._waiters: List[DoneCallback] = []
+        self._subscribers: List[ChangeCallback] = []
+        self.error = ''
+
+    # ---- lectura ----
+    def age(self) -> Optional[float]:
+        stamp = self._stamp
+        return None if stamp is None else time.monotonic() - stamp
+
+    def groups(self, max_age: Optional[float] = None) -> Dict[DeviceKey, List[Any]]:
+        """Current snapshot; enumerates synchronously only if there is none yet.
+
+        Si la foto es más vieja que `max_age` (por defecto el TTL) se devuelve
+        igualmente y se programa un refresco en segundo plano.
+        """
+        age = self.age()
+        if age is None:
+            self.refresh()
+        elif age > (self.ttl if max_age is None else max_age):
+            self.refresh_async()
+        return self._groups
+
+    def snapshot(self) -> Dict[DeviceKey, List[Any]]:
+        """Current snapshot, never enumerating in the caller's thread.
+
+        Sin foto (o caducada) se devuelve la que haya (quizá vacía) y se
+        programa un refresco; los dispositivos llegan a los suscriptores.
+        """
+        age = self.age()
+        if age is None or age > self.ttl:
+            self.refresh_async()
+        return self._groups
+
+    def keys(self) -> List[DeviceKey]:
+        return list(self.groups().keys())
+
+    def candidates(self, vid: int, pid: int) -> List[Any]:
+        """Device objects for one VID:PID (for pick_hid_device)."""
+        found = self.groups().get((vid, pid))
+        if found is None:
+            # Recién conectado y aún no en la foto: refrescar ya, sin esperar al TTL
+            age = self.age()
+            if age is None or age >= _MISS_MIN_AGE:
+                self.refresh()
+                found = self._groups.get((vid, pid))
+        return list(found or ())
+
+    def devices(self) -> List[HidDeviceInfo]:
+        """One HidDeviceInfo per VID:PID, in enumeration order."""
+        return [device_info(k, c) for k, c in self.groups().items()]
+
+    def info(self, key: DeviceKey) -> Optional[HidDeviceInfo]:
+        c = self._groups.get(key)
+        return device_info(key, c) if c is not None else None
+
+    # ---- refresco ----
+    def refresh(self) -> Tuple[List[DeviceKey], List[DeviceKey]]:
+        """Enumerate now (in the caller's thread) and publish the differences."""
+        with self._refresh_lock:
+            try:
+                groups = group_by_key(self._backend.hid_devices())
+            except Exception as e:
+                # Se conserva la foto anterior: un fallo puntual no "desconecta" nada
+                self.error = str(e)
+                _log(f"[hid-enum] enumeración falló: {e}")
+                return [], []
+            before = self._groups
+            self._groups = groups
+            self._stamp = time.monotonic()
+            self.error = ''
+            added = [k for k in groups if k not in before]
+            removed = [k for k in before if k not in groups]
+            if added or removed:
+                _log(f"[hid-enum] +{len(added)} -{len(removed)} dispositivos")
+                with self._lock:
+                    subs = list(self._subscribers)
+                for cb in subs:
+                    try:
+                        cb(added, removed)
+                    except Exception as e:
+                        _log(f"[hid-enum] suscriptor falló: {e}")
+            return added, removed
+
+    def refresh_async(self, force: bool = False, done: Optional[DoneCallback] = None) -> bool:
+        """Refresh in a worker thread if the snapshot is stale (or `force`).
+
+        `done(error)` se llama al terminar (desde el hilo del worker); si ya
+        había un refresco en curso se engancha a ese.  Devuelve False si la
+        foto seguía vigente y no se lanzó nada (entonces `done` se llama ya).
+        """
+        with self._lock:
+            if done is not None:
+                self._waiters.append(done)
+            if self._worker is not None:
+                return True
+            age = self.age()
+            if not force and age is not None and age <= self.ttl:
+                waiters, self._waiters = self._waiters, []
+                start = False
+            else:
+                self._worker = threading.Thread(target=self._run, name='hid-enumerate', daemon=True)
+                worker = self._worker
+                start = True
+        if not start:
+            for cb in waiters:
+                self._call_done(cb)
+            return False
+        worker.start()
+        return True
+
+    def _run(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._worker = None
+                waiters, self._waiters = self._waiters, []
+            for cb in waiters:
+                self._call_done(cb)
+
+    def _call_done(self, cb: DoneCallback):
+        try:
+            cb(self.error)
+        except Exception:
+            pass
+
+    # ---- suscripción ----
+    def subscribe(self, cb: ChangeCallback):
+        """`cb(added, removed)` on every refresh that changes the device set (any thread)."""
+        with self._lock:
+            if cb not in self._subscribers:
+                self._subscribers = self._subscribers + [cb]
+
+    def unsubscribe(self, cb: ChangeCallback):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s != cb]
+
+
+_shared: 'weakref.WeakKeyDictionary[InputBackend, HidEnumerator]' = weakref.WeakKeyDictionary()
+_shared_lock = threading.Lock()
+
+
+def shared_enumerator(backend: Optional[InputBackend] = None) -> HidEnumerator:
+    """The process-wide enumerator of `backend` (default backend if None)."""
+    backend = backend or default_backend()
+    with _shared_lock:
+        enum = _shared.get(backend)
+        if enum is None:
+            # Proxy: el enumerador compartido no mantiene vivo a su backend (clave débil)
+            enum = _shared[backend] = HidEnumerator(weakref.proxy(backend))
+        return enum
+
+
+__all__ = ['HidEnumerator', 'shared_enumerator', 'group_by_key', 'device_info', 'DEFAULT_TTL']
@@ -0,0 +1,254 @@
+"""Shared HID reader: one enumeration, concurrent opens, one dispatch thread.
+
+En "Todos los dispositivos" antes había un DeviceListener con su propio hilo
+(y su propia enumeración) por cada dispositivo HID.  El hub toma los
+candidatos de la foto compartida de `hid_enum`, abre los dispositivos en
+paralelo y encola los reports crudos de todos ellos en una sola cola que
+drena un único hilo hacia el handler suscrito.  Mientras está arrancado sigue
+los cambios que publica el enumerador (conexión/desconexión en caliente).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from .hid_decoder import is_keyboard_collection
+from .hid_enum import DeviceKey, HidEnumerator, group_by_key, shared_enumerator
+from .input_backends import InputBackend, default_backend
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+ReportHandler = Callable[[List[int]], None]
+DeviceCallback = Callable[[int, int], None]
+
+
+def _log(msg: str):
+    if _central_logger and _central_logger.enabled():
+        _central_logger.log(msg)
+
+
+def pick_hid_device(candidates: Iterable[Any]) -> Optional[Any]:
+    """Prefer the keyboard collection (usage page 0x01, usage 0x06) of a VID:PID."""
+    candidates = list(candidates)
+    for d in candidates:
+        if is_keyboard_collection(d):
+            return d
+    return candidates[0] if candidates else None
+
+
+class HidHub:
+    """Routes raw reports from many HID devices through one dispatcher thread."""
+
+    def __init__(self, backend: Optional[InputBackend] = None, open_workers: int = 8,
+                 enumerator: Optional[HidEnumerator] = None):
+        self._backend = backend or default_backend()
+        self._enum = enumerator or shared_enumerator(self._backend)
+        self._open_workers = max(1, open_workers)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._candidates: Dict[DeviceKey, List[Any]] = {}
+        self._open: Dict[DeviceKey, Any] = {}
+        self._handlers: Dict[DeviceKey, ReportHandler] = {}
+        self._queue: Deque[Tuple[DeviceKey, List[int]]] = deque()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.on_added: Optional[DeviceCallback] = None
+        self.on_removed: Optional[DeviceCallback] = None
+
+    # ---- enumeración ----
+    def enumerate(self) -> List[DeviceKey]:
+        """Take the candidates of every VID:PID from the shared enumeration's current snapshot.
+
+        No enumera nunca en el hilo que llama (el de la GUI al aplicar): lo que
+        aún no está en la foto llega después por la suscripción de `start()`.
+        """
+        groups = self._enum.snapshot()
+        with self._lock:
+            self._candidates = dict(groups)
+        return list(groups.keys())
+
+    def candidates(self, vid: int, pid: int) -> List[Any]:
+        """Device objects the hub knows for one VID:PID (the ones it will open)."""
+        with self._lock:
+            return list(self._candidates.get((vid, pid), ()))
+
+    def device_keys(self) -> List[DeviceKey]:
+        with self._lock:
+            return list(self._candidates.keys())
+
+    # ---- ciclo de vida ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='hid-hub', daemon=True)
+        self._thread.start()
+        # Cambios publicados entre enumerate() y start(), y los que vengan
+        self._enum.subscribe(self._on_enum_changed)
+        self._sync(self._enum.snapshot())
+        with self._lock:
+            keys = [k for k in self._handlers if k not in self._open]
+        self._open_many(keys)
+
+    def stop(self):
+        self._enum.unsubscribe(self._on_enum_changed)
+        self._stop_event.set()
+        self._wake.set()
+        with self._lock:
+            opened = list(self._open.items())
+            self._open.clear()
+        for _, dev in opened:
+            self._close(dev)
+        t = self._thread
+        if t and t is not threading.current_thread():
+            t.join(1.0)
+        self._thread = None
+        self._queue.clear()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- suscripción ----
+    def subscribe(self, vid: int, pid: int, handler: ReportHandler):
+        key = (vid, pid)
+        with self._lock:
+            self._handlers[key] = handler
+            need_open = self.is_running and key not in self._open
+        if need_open:
+            self._open_many([key])
+
+    def unsubscribe(self, vid: int, pid: int):
+        key = (vid, pid)
+        with self._lock:
+            self._handlers.pop(key, None)
+            dev = self._open.pop(key, None)
+        if dev is not None:
+            self._close(dev)
+
+    # ---- hot-plug ----
+    def refresh(self) -> Tuple[List[DeviceKey], List[DeviceKey]]:
+        """Re-enumerate now, open new devices and drop unplugged ones without a restart.
+
+        Devuelve lo que cambió en el sistema desde la última enumeración compartida.
+        """
+        added, removed = self._enum.refresh()
+        self._sync(self._enum.groups())
+        return sorted(added), sorted(removed)
+
+    def _on_enum_changed(self, added: List[DeviceKey], removed: List[DeviceKey]):
+        # Hilo del enumerador; el diff se recalcula contra lo que tiene el hub
+        self._sync(self._enum.snapshot())
+
+    def _sync(self, groups: Dict[DeviceKey, List[Any]]) -> Tuple[List[DeviceKey], List[DeviceKey]]:
+        """Adopt `groups` as candidates; close/emit for removed keys, emit for added ones."""
+        with self._sync_lock:
+            with self._lock:
+                before = self._candidates
+                added = sorted(k for k in groups if k not in before)
+                removed = sorted(k for k in before if k not in groups)
+                self._candidates = dict(groups)
+                closing = [self._open.pop(k) for k in removed if k in self._open]
+            for dev in closing:
+                self._close(dev)
+            for key in removed:
+                self._emit(self.on_removed, key)
+            for key in added:
+                self._emit(self.on_added, key)
+            if added or removed:
+                _log(f"[hid-hub] +{len(added)} -{len(removed)} dispositivos")
+            return added, removed
+
+    def add_device(self, vid: int, pid: int, candidates: List[Any]):
+        key = (vid, pid)
+        with self._lock:
+            self._candidates[key] = list(candidates)
+            need_open = self.is_running and key in self._handlers and key not in self._open
+        if need_open:
+            self._open_many([key])
+
+    def remove_device(self, vid: int, pid: int):
+        key = (vid, pid)
+        with self._lock:
+            self._candidates.pop(key, None)
+            dev = self._open.pop(key, None)
+        if dev is not None:
+            self._close(dev)
+
+    # ---- internos ----
+    def _emit(self, cb: Optional[DeviceCallback], key: DeviceKey):
+        if cb:
+            try:
+                cb(*key)
+            except Exception as e:
+                _log(f"[hid-hub] callback falló {key}: {e}")
+
+    def _open_many(self, keys: List[DeviceKey]):
+        if not keys:
+            return
+        if len(keys) == 1:
+            self._open_one(keys[0])
+            return
+        # Abrir en paralelo: cada open() de pywinusb puede tardar decenas de ms
+        with ThreadPoolExecutor(max_workers=min(self._open_workers, len(keys)), thread_name_prefix='hid-open') as ex:
+            list(ex.map(self._open_one, keys))
+
+    def _open_one(self, key: DeviceKey):
+        with self._lock:
+            dev = pick_hid_device(self._candidates.get(key, ()))
+        if dev is None:
+            return
+        try:
+            dev.open()
+            dev.set_raw_data_handler(lambda data, k=key: self._enqueue(k, data))
+        except Exception as e:
+            _log(f"[hid-hub] no se pudo abrir {key[0]:04X}:{key[1]:04X}: {e}")
+            self._close(dev)
+            return
+        with self._lock:
+            if key in self._handlers and not self._stop_event.is_set():
+                self._open[key] = dev
+                return
+        self._close(dev)
+
+    def _close(self, dev: Any):
+        try:
+            dev.set_raw_data_handler(None)
+        except Exception:
+            pass
+        try:
+            dev.close()
+        except Exception:
+            pass
+
+    def _enqueue(self, key: DeviceKey, data: List[int]):
+        # Llamado desde el hilo lector de pywinusb: solo encolar
+        self._queue.append((key, data))
+        self._wake.set()
+
+    def _run(self):
+        q = self._queue
+        while not self._stop_event.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while q and not self._stop_event.is_set():
+                try:
+                    key, data = q.popleft()
+                except IndexError:
+                    break
+                handler = self._handlers.get(key)
+                if handler is None:
+                    continue
+                try:
+                    handler(data)
+                except Exception as e:
+                    _log(f"[hid-hub] handler {key}: {e}")
+
+
+__all__ = ['HidHub', 'pick_hid_device', 'group_by_key']
@@ -0,0 +1,310 @@
+"""Input backends: where DeviceListener gets keyboard, mouse and HID events from.
+
+`SystemBackend` envuelve pynput (teclado/ratón globales) y pywinusb (HID),
+que es lo que la app usa en Windows.  `SyntheticBackend` inyecta eventos
+desde un script o una traza grabada, sin hooks del sistema, para medir
+latencia/throughput en Linux headless y como sustituto de dispositivos
+reales en pruebas.
+"""
+
+from __future__ import annotations
+
+import json, threading, time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    from pynput import keyboard, mouse  # type: ignore
+except Exception:  # pragma: no cover
+    keyboard = None  # type: ignore
+    mouse = None  # type: ignore
+
+try:
+    import pywinusb.hid as hid  # type: ignore
+except Exception:  # pragma: no cover
+    hid = None  # type: ignore
+
+KeyHandler = Callable[[Any], None]
+ClickHandler = Callable[[int, int, Any, bool], None]
+ReportHandler = Callable[[List[int]], None]
+
+
+class InputBackend:
+    """Interface used by DeviceListener/HidHub. Methods return None when unsupported."""
+
+    name = 'base'
+
+    def keyboard(self, on_press: KeyHandler, on_release: KeyHandler):
+        """Start a global keyboard listener; returns a handle with stop()/join()."""
+        return None
+
+    def mouse(self, on_click: ClickHandler):
+        """Start a global mouse listener; returns a handle with stop()/join()."""
+        return None
+
+    def hid_devices(self, vendor_id: Optional[int] = None, product_id: Optional[int] = None) -> List[Any]:
+        """Enumerate HID device objects (open/close/set_raw_data_handler)."""
+        return []
+
+
+class SystemBackend(InputBackend):
+    """pynput + pywinusb, the real Windows hooks."""
+
+    name = 'system'
+
+    def keyboard(self, on_press: KeyHandler, on_release: KeyHandler):
+        if not keyboard:
+            return None
+        lst = keyboard.Listener(on_press=on_press, on_release=on_release)
+        lst.start()
+        return lst
+
+    def mouse(self, on_click: ClickHandler):
+        if not mouse:
+            return None
+        lst = mouse.Listener(on_click=on_click)
+        lst.start()
+        return lst
+
+    def hid_devices(self, vendor_id: Optional[int] = None, product_id: Optional[int] = None) -> List[Any]:
+        if not hid:
+            return []
+        return list(hid.HidDeviceFilter(vendor_id=vendor_id, product_id=product_id).get_devices())
+
+
+_default_backend: InputBackend = SystemBackend()
+
+
+def default_backend() -> InputBackend:
+    return _default_backend
+
+
+def set_default_backend(backend: InputBackend):
+    """Reemplaza el backend usado por los listeners creados sin backend explícito."""
+    global _default_backend
+    _default_backend = backend
+
+
+# ---- synthetic ----
+class _SyntheticHandle:
+    def __init__(self, backend: 'SyntheticBackend', kind: str):
+        self._backend = backend
+        self._kind = kind
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._backend._detach(self._kind, self)
+        self._stopped.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._stopped.wait(timeout)
+
+
+class SyntheticHidDevice:
+    """Duck-typed stand-in for a pywinusb HidDevice."""
+
+    def __init__(self, vendor_id: int, product_id: int, vendor_name: str = 'Synthetic',
+                 product_name: str = 'HID', top_level_collections: Sequence[Any] = ()):
+        self.vendor_id = vendor_id
+        self.product_id = product_id
+        self.vendor_name = vendor_name
+        self.product_name = product_name
+        self.top_level_collections = list(top_level_collections)
+        self.device_path = f"synthetic#{vendor_id:04x}&{product_id:04x}"
+        self._handler: Optional[ReportHandler] = None
+        self.opened = False
+
+    def open(self):
+        self.opened = True
+
+    def close(self):
+        self.opened = False
+
+    def is_plugged(self) -> bool:
+        return True
+
+    def set_raw_data_handler(self, handler: Optional[ReportHandler]):
+        self._handler = handler
+
+    def send(self, data: List[int]):
+        h = self._handler
+        if h is not None and self.opened:
+            h(data)
+
+
+# Evento de traza: (t_relativo_seg | None, tipo, args...)
+TraceEvent = Tuple[Any, ...]
+
+
+class SyntheticBackend(InputBackend):
+    """Injects keyboard/mouse/HID events from a script or a recorded trace.
+
+    Los eventos se entregan de forma síncrona en el hilo que inyecta, así que
+    el código real de combos/bindings corre a la velocidad del bucle de
+    inyección (10k+ eventos/s).  Con `play(..., rate=N)` se espacian a N
+    eventos/s; con `rate=None` se respetan los tiempos de la traza.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, devices: Iterable[SyntheticHidDevice] = ()):
+        self._lock = threading.Lock()
+        self._attached = threading.Condition(self._lock)
+        self._kb: List[Tuple[_SyntheticHandle, KeyHandler, KeyHandler]] = []
+        self._ms: List[Tuple[_SyntheticHandle, ClickHandler]] = []
+        self.devices: List[SyntheticHidDevice] = list(devices)
+        self.injected = 0
+
+    # ---- InputBackend ----
+    def keyboard(self, on_press: KeyHandler, on_release: KeyHandler):
+        h = _SyntheticHandle(self, 'kb')
+        with self._attached:
+            self._kb = self._kb + [(h, on_press, on_release)]
+            self._attached.notify_all()
+        return h
+
+    def mouse(self, on_click: ClickHandler):
+        h = _SyntheticHandle(self, 'ms')
+        with self._attached:
+            self._ms = self._ms + [(h, on_click)]
+            self._attached.notify_all()
+        return h
+
+    def hid_devices(self, vendor_id: Optional[int] = None, product_id: Optional[int] = None) -> List[Any]:
+        return [d for d in self.devices
+                if (vendor_id is None or d.vendor_id == vendor_id) and (product_id is None or d.product_id == product_id)]
+
+    def _detach(self, kind: str, handle: _SyntheticHandle):
+        with self._lock:
+            if kind == 'kb':
+                self._kb = [e for e in self._kb if e[0] is not handle]
+            else:
+                self._ms = [e for e in self._ms if e[0] is not handle]
+
+    # ---- dispositivos ----
+    def add_device(self, vendor_id: int, product_id: int, **kw) -> SyntheticHidDevice:
+        dev = SyntheticHidDevice(vendor_id, product_id, **kw)
+        self.devices.append(dev)
+        return dev
+
+    def remove_device(self, vendor_id: int, product_id: int):
+        self.devices = [d for d in self.devices if (d.vendor_id, d.product_id) != (vendor_id, product_id)]
+
+    def wait_attached(self, keyboards: int = 0, mice: int = 0, timeout: float = 2.0) -> bool:
+        """Espera a que los listeners (que arrancan en su hilo) se registren."""
+        deadline = time.monotonic() + timeout
+        with self._attached:
+            while len(self._kb) < keyboards or len(self._ms) < mice:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._attached.wait(left)
+        return True
+
+    # ---- inyección ----
+    def key(self, name: str, down: bool = True):
+        self.injected += 1
+        for _, on_press, on_release in self._kb:
+            (on_press if down else on_release)(name)
+
+    def tap(self, *names: str):
+        """Pulsa las teclas en orden y las suelta en orden inverso."""
+        for n in names:
+            self.key(n, True)
+        for n in reversed(names):
+            self.key(n, False)
+
+    def click(self, button: str, down: bool = True, x: int = 0, y: int = 0):
+        self.injected += 1
+        for _, on_click in self._ms:
+            on_click(x, y, button, down)
+
+    def report(self, vendor_id: int, product_id: int, data: List[int]):
+        self.injected += 1
+        for d in self.devices:
+            if d.vendor_id == vendor_id and d.product_id == product_id:
+                d.send(data)
+
+    def inject(self, event: TraceEvent):
+        _, kind, *args = event
+        if kind == 'key':
+            self.key(args[0], bool(args[1]))
+        elif kind == 'click':
+            self.click(args[0], bool(args[1]))
+        elif kind == 'hid':
+            self.report(int(args[0]), int(args[1]), list(args[2]))
+        else:
+            raise ValueError(f"evento sintético desconocido: {kind}")
+
+    def play(self, events: Iterable[TraceEvent], rate: Optional[float] = None,
+             on_event: Optional[Callable[[TraceEvent], None]] = None) -> int:
+        """Inject `events`; `rate` events/s, or the trace timestamps when None.
+
+        `on_event` runs just before each injection (useful to timestamp).
+        Returns the number of events injected.
+        """
+        start = time.perf_counter()
+        n = 0
+        for ev in events:
+            if rate:
+                due = start + n / rate
+            elif ev[0] is not None:
+                due = start + float(ev[0])
+            else:
+                due = 0.0
+            delay = due - time.perf_counter()
+            if delay > 0.002:
+                time.sleep(delay - 0.001)
+            while due and time.perf_counter() < due:
+                pass
+            if on_event is not None:
+                on_event(ev)
+            self.inject(ev)
+            n += 1
+        return n
+
+    @staticmethod
+    def load_trace(path: str) -> List[TraceEvent]:
+        """Lee una traza JSON lines: {"t": 0.01, "kind": "key", "name": "a", "down": true}."""
+        events: List[TraceEvent] = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                events.append(_event_from_dict(json.loads(line)))
+        return events
+
+    @staticmethod
+    def save_trace(path: str, events: Iterable[TraceEvent]):
+        with open(path, 'w', encoding='utf-8') as f:
+            for ev in events:
+                f.write(json.dumps(_event_to_dict(ev)) + '\n')
+
+
+def _event_from_dict(d: Dict[str, Any]) -> TraceEvent:
+    kind = d['kind']
+    t = d.get('t')
+    if kind == 'key':
+        return (t, 'key', d['name'], bool(d.get('down', True)))
+    if kind == 'click':
+        return (t, 'click', d['button'], bool(d.get('down', True)))
+    if kind == 'hid':
+        return (t, 'hid', int(d['vid']), int(d['pid']), list(d['data']))
+    raise ValueError(f"evento sintético desconocido: {kind}")
+
+
+def _event_to_dict(ev: TraceEvent) -> Dict[str, Union[str, int, float, bool, list, None]]:
+    t, kind, *args = ev
+    if kind == 'key':
+        return {'t': t, 'kind': 'key', 'name': args[0], 'down': bool(args[1])}
+    if kind == 'click':
+        return {'t': t, 'kind': 'click', 'button': args[0], 'down': bool(args[1])}
+    if kind == 'hid':
+        return {'t': t, 'kind': 'hid', 'vid': args[0], 'pid': args[1], 'data': list(args[2])}
+    raise ValueError(f"evento sintético desconocido: {kind}")
+
+
+__all__ = [
+    'InputBackend', 'SystemBackend', 'SyntheticBackend', 'SyntheticHidDevice',
+    'default_backend', 'set_default_backend',
+]
@@ -1,46 +1,236 @@
+"""Central log: fixed ring of structured records, formatted only when consumed.
+
+`log()` no formatea: reserva un seq (el único lock, de dos instrucciones),
+guarda (ts, level, source, msg, args) en un anillo de capacidad fija (lo más
+viejo se sobrescribe) y vuelve.  Los sinks registrados reciben las líneas ya
+formateadas desde un hilo propio, nunca desde el hilo que loguea (que suele
+ser un hook de entrada).
+
+`enabled(level)` es la comprobación rápida para no construir mensajes que
+nadie va a leer: solo compara con un entero global, sin lock.
+"""
+
 from __future__ import annotations
+
 import threading, time
-from typing import Callable, List
+from typing import Any, Callable, List, Optional, Tuple
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+_OFF = 1 << 30
+
+_CAPACITY = 5000
+_POLL_S = 0.05
+
+
+class LogRecord:
+    __slots__ = ('seq', 'ts', 'level', 'source', 'msg', 'args')
+
+    def __init__(self, seq: int, ts: float, level: int, source: str, msg: str, args: Tuple[Any, ...]):
+        self.seq = seq
+        self.ts = ts
+        self.level = level
+        self.source = source
+        self.msg = msg
+        self.args = args
+
+    def message(self) -> str:
+        if not self.args:
+            return self.msg
+        try:
+            return self.msg % self.args
+        except Exception:
+            return f"{self.msg} {self.args!r}"
+
+    def format(self) -> str:
+        return f"[{_clock(self.ts)}] {self.message()}"
+
+
+_clock_cache = [-1, '']
+
+
+def _clock(ts: float) -> str:
+    sec = int(ts)
+    if sec != _clock_cache[0]:
+        _clock_cache[1] = time.strftime('%H:%M:%S', time.localtime(sec))
+        _clock_cache[0] = sec
+    return _clock_cache[1]
+
+
+# ---- anillo ----
+_ring: List[Optional[LogRecord]] = [None] * _CAPACITY
+_head = 0  # siguiente seq a reservar; nunca retrocede (el hueco aún sin escribir se valida por rec.seq)
+_head_lock = threading.Lock()
+
+# Umbral global leído sin lock por enabled(); _OFF mientras no haya consumidores
+_threshold = _OFF
+_level = DEBUG
+
+
+def enabled(level: int = INFO) -> bool:
+    return level >= _threshold
+
+
+def has_listeners() -> bool:
+    """Compat: equivale a `enabled()`."""
+    return INFO >= _threshold
+
+
+def log(msg: str, *args: Any, level: int = INFO, source: str = ''):
+    """Registra `msg` (con `args` estilo %, formateados al consumir)."""
+    global _head
+    with _head_lock:
+        i = _head
+        _head = i + 1
+    _ring[i % _CAPACITY] = LogRecord(i, time.time(), level, source, msg, args)
+
+
+def read(since: int, limit: int = _CAPACITY) -> Tuple[List[LogRecord], int, int]:
+    """Registros con seq >= `since`: (registros, siguiente seq, descartados por sobrescritura)."""
+    head = _head
+    dropped = 0
+    oldest = max(0, head - _CAPACITY)
+    if since < oldest:
+        dropped = oldest - since
+        since = oldest
+    out: List[LogRecord] = []
+    end = min(head, since + limit)
+    j = since
+    while j < end:
+        rec = _ring[j % _CAPACITY]
+        if rec is None or rec.seq < j:
+            break  # escritor concurrente aún no terminó este hueco
+        if rec.seq > j:
+            # Sobrescrito mientras leíamos: saltar lo perdido
+            dropped += rec.seq - j
+            j = rec.seq
+            end = min(_head, j + limit)
+            continue
+        out.append(rec)
+        j += 1
+    return out, j, dropped
+
 
-_lock = threading.Lock()
-_callbacks: List[Callable[[str], None]] = []
-_buffer: List[str] = []
-_max_lines = 5000  # simple cap
+def oldest_seq() -> int:
+    return max(0, _head - _CAPACITY)
 
-def register(cb: Callable[[str], None]):
+
+# ---- sinks asíncronos ----
+class _Sink:
+    __slots__ = ('cb', 'cursor')
+
+    def __init__(self, cb: Callable[[str], None], cursor: int):
+        self.cb = cb
+        self.cursor = cursor
+
+
+_lock = threading.Lock()  # solo registro de sinks y entrega, nunca en log()
+_sinks: List[_Sink] = []
+_deliver_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_wake = threading.Event()
+_cursors: List['LogCursor'] = []
+
+
+def _update_threshold():
+    global _threshold
+    _threshold = _level if (_sinks or _cursors) else _OFF
+
+
+def set_level(level: int):
+    """Nivel mínimo que se considera habilitado mientras haya consumidores."""
+    global _level
     with _lock:
-        _callbacks.append(cb)
-        # Flush existing buffer to new consumer
-        for line in _buffer:
-            try:
-                cb(line)
-            except Exception:
-                pass
+        _level = level
+        _update_threshold()
 
-def unregister(cb: Callable[[str], None]):
+
+def register(cb: Callable[[str], None], replay: bool = True):
+    """Añade un sink; recibe también lo que ya está en el anillo si `replay`."""
+    global _thread
     with _lock:
-        if cb in _callbacks:
-            _callbacks.remove(cb)
+        _sinks.append(_Sink(cb, oldest_seq() if replay else _head))
+        _update_threshold()
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='log-sinks', daemon=True)
+            _thread.start()
 
-def has_listeners() -> bool:
+
+def unregister(cb: Callable[[str], None]):
     with _lock:
-        return bool(_callbacks)
+        _sinks[:] = [s for s in _sinks if s.cb != cb]
+        _update_threshold()
+    _wake.set()
+
+
+class LogCursor:
+    """Consumidor por pull (p.ej. la pestaña Log con un timer): lee lotes a su ritmo."""
 
-def log(msg: str):
-    ts = time.strftime('%H:%M:%S')
-    line = f"[{ts}] {msg}"
+    def __init__(self, replay: bool = True):
+        self._next = oldest_seq() if replay else _head
+        self.closed = False
+
+    def pull(self, limit: int = 1000) -> Tuple[List[str], int]:
+        """(líneas formateadas, descartadas) desde el último pull.
+
+        Si hay más de `limit` pendientes se entregan solo las más recientes y
+        el resto cuenta como descartado: el consumidor nunca se atrasa más de un lote.
+        """
+        dropped = 0
+        backlog = _head - self._next
+        if backlog > limit:
+            dropped = backlog - limit
+            self._next += dropped
+        recs, self._next, lost = read(self._next, limit)
+        return [r.format() for r in recs], dropped + lost
+
+    def close(self):
+        with _lock:
+            if self in _cursors:
+                _cursors.remove(self)
+            self.closed = True
+            _update_threshold()
+
+
+def subscribe(replay: bool = True) -> LogCursor:
+    """Cursor de lectura por lotes; mientras esté abierto `enabled()` es True."""
     with _lock:
-        _buffer.append(line)
-        if len(_buffer) > _max_lines:
-            # Drop oldest lines
-            excess = len(_buffer) - _max_lines
-            if excess > 0:
-                del _buffer[:excess]
-        callbacks = list(_callbacks)
-    for cb in callbacks:
-        try:
-            cb(line)
-        except Exception:
-            pass
+        cur = LogCursor(replay)
+        _cursors.append(cur)
+        _update_threshold()
+    return cur
+
+
+def flush():
+    """Entrega ya lo pendiente a todos los sinks (en el hilo que llama)."""
+    with _deliver_lock:
+        with _lock:
+            sinks = list(_sinks)
+        for s in sinks:
+            recs, s.cursor, dropped = read(s.cursor)
+            if dropped:
+                _call(s.cb, f"[log] {dropped} líneas descartadas")
+            for rec in recs:
+                _call(s.cb, rec.format())
+
+
+def _call(cb: Callable[[str], None], line: str):
+    try:
+        cb(line)
+    except Exception:
+        pass
+
+
+def _run():
+    global _thread
+    while True:
+        _wake.wait(_POLL_S)
+        _wake.clear()
+        flush()
+        with _lock:
+            if not _sinks:
+                _thread = None
+                return
+
 
-__all__ = ['log','register','unregister','has_listeners']
+__all__ = ['log', 'register', 'unregister', 'has_listeners', 'enabled', 'set_level', 'flush', 'read',
+           'oldest_seq', 'subscribe', 'LogCursor', 'LogRecord', 'DEBUG', 'INFO', 'WARNING', 'ERROR']
@@ -0,0 +1,119 @@
+"""Loudness analysis, normalization and silence trim over decoded PCM.
+
+Se ejecuta en el pool de carga de AudioPlayer, nunca al disparar.  El
+análisis (RMS, pico y silencio inicial/final) es vectorizado con NumPy sobre
+`pygame.sndarray` y se guarda en los metadatos del caché PCM en disco, así
+que un archivo sin cambios no se vuelve a analizar; aplicar la ganancia y el
+recorte a partir de esos números es una sola pasada.
+
+NumPy es opcional: sin él `available()` es False y los sonidos se usan tal cual.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np  # type: ignore
+    import pygame.sndarray as sndarray  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+    sndarray = None  # type: ignore
+
+ANALYSIS_VERSION = 1
+_FLOOR_DB = -120.0
+
+
+def available() -> bool:
+    return np is not None and sndarray is not None
+
+
+def _db(v: float) -> float:
+    return 20.0 * math.log10(v) if v > 1e-6 else _FLOOR_DB
+
+
+def _full_scale(dtype: Any) -> float:
+    if np.issubdtype(dtype, np.integer):
+        return float(2 ** (np.dtype(dtype).itemsize * 8 - 1))
+    return 1.0
+
+
+def analyze(snd: Any, silence_db: float = -50.0) -> Optional[Dict[str, Any]]:
+    """RMS/peak (dBFS) of the audible part plus leading/trailing silence in frames."""
+    if not available():
+        return None
+    try:
+        arr = sndarray.samples(snd)
+    except Exception:
+        return None
+    frames = int(arr.shape[0])
+    if frames == 0:
+        return None
+    x = arr.reshape(frames, -1).astype(np.float32)
+    if np.issubdtype(arr.dtype, np.unsignedinteger):
+        x -= _full_scale(arr.dtype)
+    x /= _full_scale(arr.dtype)
+    env = np.abs(x).max(axis=1)
+    loud = np.flatnonzero(env > 10.0 ** (silence_db / 20.0))
+    if loud.size:
+        lead, trail = int(loud[0]), int(frames - 1 - loud[-1])
+    else:
+        lead = trail = 0  # todo silencio: no recortar a nada
+    body = x[lead:frames - trail]
+    rms = float(np.sqrt(np.mean(np.square(body, dtype=np.float64)))) if body.size else 0.0
+    return {
+        'version': ANALYSIS_VERSION,
+        'frames': frames,
+        'rms_db': _db(rms),
+        'peak_db': _db(float(env.max())),
+        'lead_frames': lead,
+        'trail_frames': trail,
+        'silence_db': silence_db,
+    }
+
+
+def gain_db(analysis: Dict[str, Any], target_dbfs: float, ceiling_db: float = -1.0,
+            max_gain_db: float = 12.0) -> float:
+    """Gain that brings RMS to `target_dbfs` without pushing the peak over `ceiling_db`."""
+    if analysis['rms_db'] <= _FLOOR_DB:
+        return 0.0
+    g = target_dbfs - analysis['rms_db']
+    return min(g, ceiling_db - analysis['peak_db'], max_gain_db)
+
+
+def apply(snd: Any, analysis: Dict[str, Any], target_dbfs: Optional[float] = None, trim: bool = True,
+          pad_frames: int = 0, max_gain_db: float = 12.0) -> Any:
+    """Return a new Sound trimmed and gain-adjusted per `analysis`; `snd` if nothing to do."""
+    if not available() or not analysis:
+        return snd
+    try:
+        arr = sndarray.samples(snd)
+    except Exception:
+        return snd
+    frames = int(arr.shape[0])
+    start, end = 0, frames
+    if trim and analysis.get('frames') == frames:
+        start = max(0, int(analysis['lead_frames']) - pad_frames)
+        end = min(frames, frames - int(analysis['trail_frames']) + pad_frames)
+    g = gain_db(analysis, target_dbfs, max_gain_db=max_gain_db) if target_dbfs is not None else 0.0
+    if np.issubdtype(arr.dtype, np.unsignedinteger):
+        g = 0.0  # PCM unsigned (AUDIO_U8): solo recorte
+    if abs(g) < 0.1:
+        if start == 0 and end == frames:
+            return snd
+        out = np.ascontiguousarray(arr[start:end])
+    else:
+        seg = arr[start:end].astype(np.float32)
+        seg *= 10.0 ** (g / 20.0)
+        if np.issubdtype(arr.dtype, np.integer):
+            info = np.iinfo(arr.dtype)
+            np.clip(seg, info.min, info.max, out=seg)
+        out = seg.astype(arr.dtype)
+    try:
+        return sndarray.make_sound(out)
+    except Exception:
+        return snd
+
+
+__all__ = ['available', 'analyze', 'apply', 'gain_db', 'ANALYSIS_VERSION']
@@ -1,67 +1,332 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Set
 from .types import EventSignature
+from .mapping_store import SqliteMappingStore, signature_key
 
 @dataclass
 class MappingItem:
     id: int
     signature: Optional[EventSignature] = None
     audio: str = ''
+    # Reproducción: modo de redisparo, polifonía máxima (0 = sin límite) y grupo de canales
+    retrigger: str = 'overlap'
+    max_voices: int = 0
+    group: str = ''
+    # Carga: 'auto' (según tamaño/duración), 'preload' o 'stream'
+    load_mode: str = 'auto'
+    # Parámetros de sonido: se aplican al reproducir, sin volver a decodificar
+    volume: float = 1.0
+    pan: float = 0.0
+    fade_in_ms: int = 0
+    fade_out_ms: int = 0
+    start_ms: int = 0
+    loops: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             'id': self.id,
             'signature': self.signature.to_dict() if self.signature else None,
             'audio': self.audio,
+            'retrigger': self.retrigger,
+            'max_voices': self.max_voices,
+            'group': self.group,
+            'load_mode': self.load_mode,
+            'volume': self.volume,
+            'pan': self.pan,
+            'fade_in_ms': self.fade_in_ms,
+            'fade_out_ms': self.fade_out_ms,
+            'start_ms': self.start_ms,
+            'loops': self.loops,
+        }
+
+    def play_options(self) -> Dict[str, Any]:
+        return {
+            'mode': self.retrigger, 'max_voices': self.max_voices, 'group': self.group,
+            'volume': self.volume, 'pan': self.pan, 'fade_in_ms': self.fade_in_ms,
+            'fade_out_ms': self.fade_out_ms, 'start_ms': self.start_ms, 'loops': self.loops,
+        }
+
+    @staticmethod
+    def play_options_of(d: Dict[str, Any]) -> Dict[str, Any]:
+        """`play_options()` directamente del dict de una fila, sin construir MappingItem ni firma."""
+        return {
+            'mode': d.get('retrigger', 'overlap'), 'max_voices': int(d.get('max_voices', 0) or 0),
+            'group': d.get('group', '') or '', 'volume': float(d.get('volume', 1.0)),
+            'pan': float(d.get('pan', 0.0)), 'fade_in_ms': int(d.get('fade_in_ms', 0) or 0),
+            'fade_out_ms': int(d.get('fade_out_ms', 0) or 0), 'start_ms': int(d.get('start_ms', 0) or 0),
+            'loops': int(d.get('loops', 0) or 0),
         }
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> 'MappingItem':
         sigdata = d.get('signature')
         sig = EventSignature.from_dict(sigdata) if sigdata else None
-        return MappingItem(id=d.get('id', 0), signature=sig, audio=d.get('audio',''))
+        return MappingItem(
+            id=d.get('id', 0), signature=sig, audio=d.get('audio',''),
+            retrigger=d.get('retrigger', 'overlap'), max_voices=int(d.get('max_voices', 0) or 0),
+            group=d.get('group', '') or '', load_mode=d.get('load_mode', 'auto') or 'auto',
+            volume=float(d.get('volume', 1.0)), pan=float(d.get('pan', 0.0)),
+            fade_in_ms=int(d.get('fade_in_ms', 0) or 0), fade_out_ms=int(d.get('fade_out_ms', 0) or 0),
+            start_ms=int(d.get('start_ms', 0) or 0), loops=int(d.get('loops', 0) or 0),
+        )
+
+DuplicateCallback = Callable[[Dict[int, bool]], None]
+
 
 class MappingManager:
+    """Filas de la tabla de mapeos con índices vivos.
+
+    * firma -> ids (`_by_key`) e id -> clave (`_key_of`): buscar por firma y
+      saber si una fila está duplicada es O(1).
+    * id -> fila (`_row_of`): se reconstruye solo tras un borrado.
+    * `on_duplicates_changed({fila: duplicada})` recibe únicamente las filas
+      cuyo estado de duplicado cambió con la última mutación.
+
+    Las firmas deben cambiarse con `set_signature`/`clear` para mantener el
+    índice.  Con un SqliteMappingStore adjunto solo se leen ids y claves de
+    firma al cargar; cada MappingItem se construye la primera vez que se pide
+    y `sync_to_store()` escribe únicamente las filas cambiadas o borradas.
+    """
+
     def __init__(self):
-        self._items: List[MappingItem] = []
+        self._ids: List[int] = []
+        self._items: Dict[int, MappingItem] = {}
         self._next_id = 1
+        self._store: Optional[SqliteMappingStore] = None
+        self._snap: Dict[int, Dict[str, Any]] = {}  # id -> fila tal como está en el store
+        self._removed: Set[int] = set()
+        self._key_of: Dict[int, str] = {}
+        self._by_key: Dict[str, List[int]] = {}
+        self._row_of: Optional[Dict[int, int]] = {}
+        self.on_duplicates_changed: Optional[DuplicateCallback] = None
 
-    def load(self, lst: List[Dict[str, Any]]):
-        self._items.clear()
+    # ---- carga ----
+    def _reset(self):
+        self._snap.clear()
+        self._removed.clear()
+        self._ids = []
+        self._items = {}
+        self._key_of = {}
+        self._by_key = {}
+        self._row_of = None
         self._next_id = 1
-        for raw in lst:
-            item = MappingItem.from_dict(raw)
-            self._items.append(item)
-            self._next_id = max(self._next_id, item.id + 1)
+
+    def load(self, lst: List[Dict[str, Any]]):
+        self._store = None
+        self._reset()
+        items = [MappingItem.from_dict(raw) for raw in lst]
+        self._next_id = max([0] + [it.id for it in items]) + 1
+        for item in items:
+            if item.id <= 0 or item.id in self._items:
+                # Configs antiguos guardaban las filas sin id (todas cargaban con id 0)
+                item.id = self._next_id
+                self._next_id += 1
+            self._ids.append(item.id)
+            self._items[item.id] = item
+            if item.signature:
+                self._index(item.id, signature_key(item.signature))
+
+    def attach_store(self, store: SqliteMappingStore):
+        """Usa `store` como fuente: solo lee ids y claves, las filas se materializan bajo demanda."""
+        self._store = store
+        self._reset()
+        self._ids = store.ids()
+        self._next_id = max(self._ids, default=0) + 1
+        for mid, key in store.sig_keys().items():
+            self._index(mid, key)
+
+    @property
+    def store(self) -> Optional[SqliteMappingStore]:
+        return self._store
+
+    def _materialize(self, mid: int) -> Optional[MappingItem]:
+        item = self._items.get(mid)
+        if item is None and self._store is not None:
+            raw = self._store.get(mid)
+            if raw is not None:
+                item = MappingItem.from_dict(raw)
+                item.id = mid
+                self._items[mid] = item
+                self._snap[mid] = item.to_dict()
+        return item
+
+    def _materialize_all(self):
+        missing = [i for i in self._ids if i not in self._items]
+        if missing and self._store is not None:
+            for mid, raw in self._store.get_many(missing).items():
+                item = MappingItem.from_dict(raw)
+                item.id = mid
+                self._items[mid] = item
+                self._snap[mid] = item.to_dict()
+
+    def sync_to_store(self) -> int:
+        """Escribe en el store las filas nuevas/modificadas y borra las eliminadas."""
+        store = self._store
+        if store is None:
+            return 0
+        dirty = []
+        for mid, item in self._items.items():
+            d = item.to_dict()
+            if self._snap.get(mid) != d:
+                dirty.append(d)
+        if dirty:
+            store.upsert_many(dirty)
+        if self._removed:
+            store.delete(self._removed)
+        for d in dirty:
+            self._snap[d['id']] = d
+        n = len(dirty) + len(self._removed)
+        self._removed.clear()
+        return n
+
+    # ---- índices ----
+    def _index(self, mid: int, key: Optional[str]):
+        old = self._key_of.pop(mid, None)
+        if old is not None:
+            bucket = self._by_key.get(old)
+            if bucket is not None:
+                try:
+                    bucket.remove(mid)
+                except ValueError:
+                    pass
+                if not bucket:
+                    del self._by_key[old]
+        if key is not None:
+            self._key_of[mid] = key
+            self._by_key.setdefault(key, []).append(mid)
+
+    def _dup_status(self, ids: Set[int]) -> Dict[int, bool]:
+        return {i: self.is_duplicate(i) for i in ids}
+
+    def _emit(self, before: Dict[int, bool]):
+        cb = self.on_duplicates_changed
+        if cb is None:
+            return
+        changed: Dict[int, bool] = {}
+        for mid, was in before.items():
+            row = self.row_of(mid)
+            if row is None:
+                continue
+            now = self.is_duplicate(mid)
+            if now != was:
+                changed[row] = now
+        if changed:
+            try:
+                cb(changed)
+            except Exception:
+                pass
+
+    def _affected(self, *keys: Optional[str]) -> Set[int]:
+        out: Set[int] = set()
+        for k in keys:
+            if k is not None:
+                out.update(self._by_key.get(k, ()))
+        return out
+
+    def row_of(self, mid: int) -> Optional[int]:
+        if self._row_of is None:
+            self._row_of = {m: r for r, m in enumerate(self._ids)}
+        return self._row_of.get(mid)
+
+    def is_duplicate(self, mid: int) -> bool:
+        key = self._key_of.get(mid)
+        return key is not None and len(self._by_key.get(key, ())) > 1
+
+    def duplicate_ids(self) -> Set[int]:
+        return {i for ids in self._by_key.values() if len(ids) > 1 for i in ids}
+
+    def find(self, sig: EventSignature) -> List[MappingItem]:
+        """Filas con exactamente esa firma."""
+        ids = self._by_key.get(signature_key(sig), ())
+        return [it for it in (self._materialize(i) for i in ids) if it is not None]
+
+    # ---- mutaciones ----
+    def set_signature(self, item: MappingItem, sig: Optional[EventSignature]):
+        old = self._key_of.get(item.id)
+        new = signature_key(sig) if sig else None
+        item.signature = sig
+        if old == new:
+            return
+        before = self._dup_status(self._affected(old, new) | {item.id})
+        self._index(item.id, new)
+        self._emit(before)
+
+    def clear(self, item: MappingItem):
+        item.audio = ''
+        self.set_signature(item, None)
+
+    def __len__(self) -> int:
+        return len(self._ids)
 
     def serialize(self) -> List[Dict[str, Any]]:
-        return [i.to_dict() for i in self._items]
+        return [i.to_dict() for i in self.items()]
 
     def add(self) -> MappingItem:
         item = MappingItem(id=self._next_id)
         self._next_id += 1
-        self._items.append(item)
+        if self._row_of is not None:
+            self._row_of[item.id] = len(self._ids)
+        self._ids.append(item.id)
+        self._items[item.id] = item
         return item
 
     def remove_ids(self, ids: List[int]):
         ids_set = set(ids)
-        self._items = [i for i in self._items if i.id not in ids_set]
+        keys = [self._key_of.get(i) for i in ids_set]
+        survivors = self._affected(*keys) - ids_set
+        before = self._dup_status(survivors)
+        self._ids = [i for i in self._ids if i not in ids_set]
+        self._row_of = None
+        for i in ids_set:
+            self._index(i, None)
+            self._items.pop(i, None)
+            if self._store is not None:
+                self._snap.pop(i, None)
+                self._removed.add(i)
+        self._emit(before)
 
+    # ---- consultas ----
     def items(self) -> List[MappingItem]:
-        return list(self._items)
+        self._materialize_all()
+        return [self._items[i] for i in self._ids if i in self._items]
+
+    def rows(self, signed_only: bool = False) -> List[Dict[str, Any]]:
+        """Filas como dict en orden de tabla, sin materializar nada.
+
+        Las filas ya construidas (visibles o editadas) salen de memoria; el
+        resto se lee del store en bloque y se devuelve tal cual, sin crear
+        MappingItem ni dejarlo cacheado.  `signed_only` omite las filas sin firma
+        sin llegar a leerlas.
+        """
+        missing = [i for i in self._ids if i not in self._items and (not signed_only or i in self._key_of)]
+        raw = self._store.get_many(missing) if missing and self._store is not None else {}
+        out: List[Dict[str, Any]] = []
+        for mid in self._ids:
+            item = self._items.get(mid)
+            if item is not None:
+                if not signed_only or item.signature:
+                    out.append(item.to_dict())
+                continue
+            d = raw.get(mid)
+            if d is not None:
+                d['id'] = mid
+                out.append(d)
+        return out
 
     def get_by_row(self, row: int) -> Optional[MappingItem]:
+        if row < 0:
+            return None
         try:
-            return self._items[row]
+            mid = self._ids[row]
         except IndexError:
             return None
+        return self._materialize(mid)
 
     def detect_duplicates(self) -> Dict[str, List[MappingItem]]:
         """Return mapping from signature code to items if more than one shares it."""
-        buckets: Dict[str,List[MappingItem]] = {}
-        for m in self._items:
-            if m.signature:
-                key = f"{m.signature.type}:{m.signature.vendor_id}:{m.signature.product_id}:{m.signature.code}"
-                buckets.setdefault(key, []).append(m)
-        return {k:v for k,v in buckets.items() if len(v) > 1}
+        out: Dict[str, List[MappingItem]] = {}
+        for k, ids in self._by_key.items():
+            if len(ids) > 1:
+                out[k] = [it for it in (self._materialize(i) for i in ids) if it is not None]
+        return out
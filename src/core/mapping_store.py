@@ -0,0 +1,192 @@
+"""SQLite backend for large mapping sets.
+
+Con miles de mapeos, parsear un JSON enorme y construir un MappingItem +
+EventSignature por fila antes de mostrar la ventana es lo que domina el
+arranque.  Aquí cada mapeo es una fila (id, posición, clave de firma, JSON
+de la fila), con índice por clave de firma: se puede contar, paginar y
+buscar sin materializar nada, y guardar un cambio es un UPSERT de esa fila.
+
+La fila se guarda tal cual venía en el JSON (claves desconocidas incluidas),
+así que importar y exportar el formato actual es sin pérdida.
+"""
+
+from __future__ import annotations
+
+import json, sqlite3, threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .types import EventSignature
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS mappings (
+    id INTEGER PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    sig_key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mappings_sig ON mappings(sig_key);
+CREATE INDEX IF NOT EXISTS mappings_pos ON mappings(pos);
+"""
+
+
+def sig_key_of(sig: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Clave de firma (la misma que usa MappingManager.detect_duplicates) desde su dict."""
+    if not sig:
+        return None
+    return f"{sig.get('type')}:{sig.get('vendor_id')}:{sig.get('product_id')}:{sig.get('code')}"
+
+
+def signature_key(sig: EventSignature) -> str:
+    return sig.key
+
+
+class SqliteMappingStore:
+    """Mapping rows in SQLite, indexed by signature key; rows are decoded on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._db.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---- lectura ----
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM mappings').fetchone()[0]
+
+    def ids(self) -> List[int]:
+        """Ids en orden de tabla, sin decodificar filas."""
+        with self._lock:
+            return [r[0] for r in self._db.execute('SELECT id FROM mappings ORDER BY pos, id')]
+
+    def get(self, mid: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute('SELECT data FROM mappings WHERE id = ?', (mid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        out: Dict[int, Dict[str, Any]] = {}
+        ids = list(ids)
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                q = f"SELECT id, data FROM mappings WHERE id IN ({','.join('?' * len(chunk))})"
+                for mid, data in self._db.execute(q, chunk):
+                    out[mid] = json.loads(data)
+        return out
+
+    def page(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute('SELECT data FROM mappings ORDER BY pos, id LIMIT ? OFFSET ?',
+                                    (limit, offset)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def find(self, key: str) -> List[int]:
+        """Ids de las filas con esa clave de firma (usa el índice)."""
+        with self._lock:
+            return [r[0] for r in self._db.execute('SELECT id FROM mappings WHERE sig_key = ? ORDER BY pos', (key,))]
+
+    def sig_keys(self) -> Dict[int, str]:
+        """id -> clave de firma de todas las filas con firma (sin decodificar JSON)."""
+        with self._lock:
+            return dict(self._db.execute('SELECT id, sig_key FROM mappings WHERE sig_key IS NOT NULL'))
+
+    def duplicate_keys(self) -> Dict[str, List[int]]:
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT sig_key, GROUP_CONCAT(id) FROM mappings WHERE sig_key IS NOT NULL '
+                'GROUP BY sig_key HAVING COUNT(*) > 1'
+            ).fetchall()
+        return {k: [int(x) for x in ids.split(',')] for k, ids in rows}
+
+    # ---- escritura incremental ----
+    def upsert(self, row: Dict[str, Any], pos: Optional[int] = None):
+        self.upsert_many([row], None if pos is None else [pos])
+
+    def upsert_many(self, rows: Iterable[Dict[str, Any]], positions: Optional[Sequence[int]] = None):
+        """Insert/update rows by id; fields not in `row` are kept from the stored row."""
+        rows = list(rows)
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute('BEGIN')
+            try:
+                next_pos = cur.execute('SELECT COALESCE(MAX(pos), -1) + 1 FROM mappings').fetchone()[0]
+                for i, row in enumerate(rows):
+                    mid = int(row['id'])
+                    old = cur.execute('SELECT pos, data FROM mappings WHERE id = ?', (mid,)).fetchone()
+                    data = dict(json.loads(old[1])) if old else {}
+                    data.update(row)
+                    if positions is not None:
+                        pos = positions[i]
+                    elif old:
+                        pos = old[0]
+                    else:
+                        pos, next_pos = next_pos, next_pos + 1
+                    cur.execute(
+                        'INSERT INTO mappings(id, pos, sig_key, data) VALUES (?, ?, ?, ?) '
+                        'ON CONFLICT(id) DO UPDATE SET pos = excluded.pos, sig_key = excluded.sig_key, data = excluded.data',
+                        (mid, pos, sig_key_of(data.get('signature')), json.dumps(data, ensure_ascii=False)),
+                    )
+                cur.execute('COMMIT')
+            except Exception:
+                cur.execute('ROLLBACK')
+                raise
+
+    def delete(self, ids: Iterable[int]):
+        ids = [(int(i),) for i in ids]
+        if not ids:
+            return
+        with self._lock:
+            self._db.executemany('DELETE FROM mappings WHERE id = ?', ids)
+
+    def reorder(self, ids: Sequence[int]):
+        with self._lock:
+            self._db.execute('BEGIN')
+            self._db.executemany('UPDATE mappings SET pos = ? WHERE id = ?', [(p, int(i)) for p, i in enumerate(ids)])
+            self._db.execute('COMMIT')
+
+    # ---- JSON ----
+    def import_json(self, rows: List[Dict[str, Any]]) -> int:
+        """Reemplaza el contenido por la lista `mappings` del config.json.
+
+        Filas sin id (o con id repetido) reciben uno nuevo; el resto se guarda tal cual.
+        """
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute('BEGIN')
+            try:
+                cur.execute('DELETE FROM mappings')
+                next_id = max([1] + [int(r.get('id') or 0) + 1 for r in rows])
+                used = set()
+                out = []
+                for pos, raw in enumerate(rows):
+                    row = dict(raw)
+                    mid = int(row.get('id') or 0)
+                    if mid <= 0 or mid in used:
+                        mid, next_id = next_id, next_id + 1
+                        row['id'] = mid
+                    used.add(mid)
+                    out.append((mid, pos, sig_key_of(row.get('signature')), json.dumps(row, ensure_ascii=False)))
+                cur.executemany('INSERT OR REPLACE INTO mappings(id, pos, sig_key, data) VALUES (?, ?, ?, ?)', out)
+                cur.execute('COMMIT')
+            except Exception:
+                cur.execute('ROLLBACK')
+                raise
+        return len(out)
+
+    def export_json(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [json.loads(r[0]) for r in self._db.execute('SELECT data FROM mappings ORDER BY pos, id')]
+
+
+__all__ = ['SqliteMappingStore', 'sig_key_of', 'signature_key', 'SCHEMA_VERSION']
@@ -0,0 +1,191 @@
+"""Content-addressed on-disk cache of decoded PCM.
+
+Cada entrada es `<clave>.pcm` (PCM crudo en el formato del mixer) más
+`<clave>.json` (metadatos).  La clave depende de ruta + mtime + tamaño del
+archivo fuente y del formato del mixer, así que un archivo modificado o un
+mixer con otro formato simplemente no encuentra su entrada.
+"""
+
+from __future__ import annotations
+
+import hashlib, json, mmap, os, threading, time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+# (frecuencia, formato, canales) tal como lo devuelve pygame.mixer.get_init()
+MixerFormat = Tuple[int, int, int]
+
+# Un .pcm sin .json más joven que esto puede ser un store() de otro proceso en curso
+_ORPHAN_GRACE_S = 30.0
+
+
+def _source_key(path: str, fmt: MixerFormat) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    freq, size, channels = fmt
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{freq}|{size}|{channels}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class PcmDiskCache:
+    """Stores raw decoded PCM so warm starts skip decoding entirely."""
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, key)
+        return base + '.pcm', base + '.json'
+
+    def key_for(self, path: str, fmt: MixerFormat) -> Optional[str]:
+        return _source_key(path, fmt)
+
+    def load(self, path: str, fmt: MixerFormat) -> Optional[Tuple[mmap.mmap, Dict[str, Any]]]:
+        """Return (mmap of the PCM, metadata) on hit; the caller closes the mmap."""
+        key = _source_key(path, fmt)
+        if not key:
+            return None
+        pcm_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(pcm_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size != meta.get('bytes'):
+                    raise ValueError('tamaño inconsistente')
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.misses += 1
+            return None
+        # Marca de último acceso para la recolección por tamaño
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return mm, meta
+
+    def store(self, path: str, fmt: MixerFormat, raw: bytes, meta: Optional[Dict[str, Any]] = None) -> bool:
+        key = _source_key(path, fmt)
+        if not key:
+            return False
+        pcm_path, meta_path = self._paths(key)
+        info = dict(meta or {})
+        info.update({'path': os.path.abspath(path), 'format': list(fmt), 'bytes': len(raw), 'created': time.time()})
+        tmp_pcm = f"{pcm_path}.{threading.get_ident()}.tmp"
+        tmp_meta = f"{meta_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            # Ambos a temporal y luego rename, el .json primero: gc() nunca ve
+            # un .pcm recién escrito sin su .json (lo tomaría por huérfano), y
+            # load() con .json pero sin .pcm es solo un miss
+            with open(tmp_pcm, 'wb') as f:
+                f.write(raw)
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(info, f)
+            os.replace(tmp_meta, meta_path)
+            os.replace(tmp_pcm, pcm_path)
+        except Exception as e:
+            for tmp in (tmp_pcm, tmp_meta):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            if _central_logger and _central_logger.enabled():
+                _central_logger.log(f"[pcm-cache] no se pudo escribir {path}: {e}")
+            return False
+        self.writes += 1
+        return True
+
+    def update_meta(self, path: str, fmt: MixerFormat, extra: Dict[str, Any]) -> bool:
+        key = _source_key(path, fmt)
+        if not key:
+            return False
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta.update(extra)
+            tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp, meta_path)
+        except Exception:
+            return False
+        return True
+
+    def gc(self) -> Dict[str, int]:
+        """Remove stale entries (source changed/missing) and enforce `max_bytes`."""
+        removed = stale = 0
+        with self._lock:
+            try:
+                names = os.listdir(self.root)
+            except OSError:
+                return {'removed': 0, 'stale': 0, 'bytes': 0}
+            entries = []
+            for name in names:
+                full = os.path.join(self.root, name)
+                if name.endswith('.tmp'):
+                    # restos de escrituras interrumpidas
+                    try:
+                        if time.time() - os.path.getmtime(full) > 60:
+                            os.remove(full)
+                    except OSError:
+                        pass
+                    continue
+                if not name.endswith('.json'):
+                    if name.endswith('.pcm') and name[:-4] + '.json' not in names:
+                        try:
+                            young = time.time() - os.path.getmtime(full) < _ORPHAN_GRACE_S
+                        except OSError:
+                            continue
+                        if not young:
+                            self._remove(name[:-4]); removed += 1
+                    continue
+                key = name[:-5]
+                try:
+                    with open(full, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    fmt = tuple(meta['format'])
+                    current = _source_key(meta['path'], fmt)  # type: ignore[arg-type]
+                    atime = os.path.getmtime(full)
+                except Exception:
+                    current, meta, atime = None, {}, 0.0
+                if current != key:
+                    self._remove(key); stale += 1
+                    continue
+                entries.append((atime, key, int(meta.get('bytes', 0))))
+            total = sum(e[2] for e in entries)
+            if self.max_bytes:
+                for _, key, size in sorted(entries):
+                    if total <= self.max_bytes:
+                        break
+                    self._remove(key)
+                    total -= size
+                    removed += 1
+        if (removed or stale) and _central_logger and _central_logger.enabled():
+            _central_logger.log(f"[pcm-cache] gc: {stale} obsoletas, {removed} por tamaño, {total} bytes")
+        return {'removed': removed, 'stale': stale, 'bytes': total}
+
+    def _remove(self, key: str):
+        for p in self._paths(key):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'writes': self.writes}
+
+
+__all__ = ['PcmDiskCache']
@@ -0,0 +1,153 @@
+"""Memory-bounded LRU cache of decoded pygame sounds with byte accounting."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Sonidos ya decodificados; se tipan como Any para no importar pygame aquí
+Sound = Any
+
+
+def sound_nbytes(snd: Sound) -> int:
+    """Tamaño decodificado en bytes (longitud de Sound.get_raw())."""
+    try:
+        return len(snd.get_raw())
+    except Exception:
+        return 0
+
+
+class SoundCache:
+    """LRU keyed by path that keeps the decoded total under `budget_bytes`.
+
+    Entries at or below `pin_below_bytes` (short/hot clips) and paths
+    passed to `pin` are never evicted, nor are sounds that are currently
+    playing on a channel.  A budget of 0 disables eviction.
+    """
+
+    def __init__(self, budget_bytes: int = 256 * 1024 * 1024, pin_below_bytes: int = 0,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.pin_below_bytes = max(0, int(pin_below_bytes))
+        self.on_evict = on_evict
+        self._lock = threading.RLock()
+        self._entries: 'OrderedDict[str, Sound]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._pinned: Set[str] = set()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, path: str) -> Optional[Sound]:
+        with self._lock:
+            snd = self._entries.get(path)
+            if snd is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return snd
+
+    def peek(self, path: str) -> Optional[Sound]:
+        """Consulta sin tocar el orden LRU ni los contadores."""
+        return self._entries.get(path)
+
+    def put(self, path: str, snd: Sound, nbytes: Optional[int] = None):
+        size = sound_nbytes(snd) if nbytes is None else int(nbytes)
+        with self._lock:
+            if path in self._entries:
+                self.bytes -= self._sizes.get(path, 0)
+            self._entries[path] = snd
+            self._entries.move_to_end(path)
+            self._sizes[path] = size
+            self.bytes += size
+            self._evict_locked(keep=path)
+
+    def pop(self, path: str, default: Optional[Sound] = None) -> Optional[Sound]:
+        with self._lock:
+            snd = self._entries.pop(path, None)
+            if snd is None:
+                return default
+            self.bytes -= self._sizes.pop(path, 0)
+            return snd
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def pin(self, path: str):
+        with self._lock:
+            self._pinned.add(path)
+
+    def unpin(self, path: str):
+        with self._lock:
+            self._pinned.discard(path)
+            self._evict_locked()
+
+    def is_pinned(self, path: str) -> bool:
+        if path in self._pinned:
+            return True
+        size = self._sizes.get(path)
+        return size is not None and size <= self.pin_below_bytes
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = max(0, int(budget_bytes))
+            self._evict_locked()
+
+    def size_of(self, path: str) -> int:
+        return self._sizes.get(path, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'budget_bytes': self.budget_bytes,
+                'pinned': sum(1 for p in self._entries if self.is_pinned(p)),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        if not self.budget_bytes or self.bytes <= self.budget_bytes:
+            return
+        for path in list(self._entries.keys()):
+            if self.bytes <= self.budget_bytes:
+                break
+            if path == keep or self.is_pinned(path):
+                continue
+            snd = self._entries[path]
+            try:
+                # No expulsar un sonido que está sonando (pygame lo cortaría)
+                if snd.get_num_channels() > 0:
+                    continue
+            except Exception:
+                pass
+            del self._entries[path]
+            self.bytes -= self._sizes.pop(path, 0)
+            self.evictions += 1
+            cb = self.on_evict
+            if cb:
+                try:
+                    cb(path)
+                except Exception:
+                    pass
+
+
+__all__ = ['SoundCache', 'sound_nbytes']
@@ -0,0 +1,78 @@
+"""Derived buffers for per-mapping start offset and fade-out.
+
+Volumen, paneo, fade-in y loops se aplican en el canal al reproducir y
+comparten el Sound decodificado.  Lo que el canal no sabe hacer (empezar a
+mitad de archivo, desvanecer al final natural del clip) se resuelve con un
+buffer derivado del PCM ya decodificado, que AudioPlayer construye una vez
+por (archivo, offset, fade-out) y cachea; nunca se vuelve a decodificar.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Optional, Tuple
+
+import pygame
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+MixerFormat = Tuple[int, int, int]
+VariantKey = Tuple[int, int]  # (start_ms, fade_out_ms)
+
+
+def needs_variant(start_ms: int, fade_out_ms: int, loops: int) -> bool:
+    # Con loops el fade al final se repetiría en cada vuelta: solo se aplica al detener
+    return start_ms > 0 or (fade_out_ms > 0 and loops == 0)
+
+
+def variant_key(start_ms: int, fade_out_ms: int, loops: int) -> VariantKey:
+    return (max(0, int(start_ms)), int(fade_out_ms) if loops == 0 else 0)
+
+
+def derive(snd: Any, fmt: MixerFormat, start_ms: int = 0, fade_out_ms: int = 0) -> Optional[Any]:
+    """New Sound starting at `start_ms` with a linear fade over the last `fade_out_ms`."""
+    freq, size, channels = fmt
+    frame = abs(size) // 8 * channels
+    raw = snd.get_raw()
+    off = int(freq * start_ms / 1000) * frame
+    if off >= len(raw):
+        return None
+    body = raw[off:]
+    fade = int(freq * fade_out_ms / 1000)
+    if fade > 0 and size == -16:
+        body = _fade_tail16(body, channels, fade)
+    return pygame.mixer.Sound(buffer=body)
+
+
+def _fade_tail16(body: bytes, channels: int, fade_frames: int) -> bytes:
+    frames = len(body) // (2 * channels)
+    n = min(frames, fade_frames)
+    if n <= 0:
+        return body
+    if np is not None:
+        a = np.frombuffer(body, dtype=np.int16, count=frames * channels).reshape(frames, channels).copy()
+        ramp = np.linspace(1.0, 0.0, n, dtype=np.float32)[:, None]
+        a[-n:] = (a[-n:].astype(np.float32) * ramp).astype(np.int16)
+        return a.tobytes()
+    a = array('h')
+    a.frombytes(body[: frames * channels * 2])
+    start = (frames - n) * channels
+    for i in range(n):
+        g = 1.0 - i / float(n)
+        base = start + i * channels
+        for c in range(channels):
+            a[base + c] = int(a[base + c] * g)
+    return a.tobytes()
+
+
+def pan_volumes(volume: float, pan: float) -> Tuple[float, float]:
+    """(left, right) channel gains for `volume` 0..1 and `pan` -1 (izq) .. 1 (der)."""
+    volume = min(1.0, max(0.0, float(volume)))
+    pan = min(1.0, max(-1.0, float(pan)))
+    return volume * (1.0 - max(0.0, pan)), volume * (1.0 + min(0.0, pan))
+
+
+__all__ = ['derive', 'needs_variant', 'variant_key', 'pan_volumes']
@@ -0,0 +1,170 @@
+"""Startup timing: per-phase breakdown plus `-X importtime`-style module cost.
+
+Pensado para `python -m src.app --profile-startup` y para el .exe de
+PyInstaller, donde `-X importtime` no está disponible: el medidor de imports
+envuelve `builtins.__import__` mientras está instalado y anota, por módulo
+nuevo, el tiempo propio y el acumulado (con sus imports anidados), igual que
+el informe de CPython.
+"""
+
+from __future__ import annotations
+
+import builtins, importlib.util, sys, threading, time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+
+class ImportTimer:
+    """Times first imports of modules while installed (any thread)."""
+
+    def __init__(self):
+        self.records: List[Tuple[str, float, float, int, str]] = []  # (módulo, self_s, cum_s, nivel, hilo)
+        self._orig = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        if self._orig is not None:
+            return
+        orig = self._orig = builtins.__import__
+        local = self._local
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            target = name
+            if level:
+                try:
+                    target = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+                except Exception:
+                    return orig(name, globals, locals, fromlist, level)
+            mod = sys.modules.get(target)
+            if mod is not None:
+                # `from paquete import submodulo`: el submódulo se carga dentro de orig()
+                new = [f for f in (fromlist or ()) if f != '*' and not hasattr(mod, f)
+                       and f"{target}.{f}" not in sys.modules]
+                if not new:
+                    return orig(name, globals, locals, fromlist, level)
+                target = ', '.join(f"{target}.{f}" for f in new)
+            stack = getattr(local, 'stack', None)
+            if stack is None:
+                stack = local.stack = []
+            stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                cum = time.perf_counter() - t0
+                child = stack.pop()
+                if stack:
+                    stack[-1] += cum
+                with self._lock:
+                    self.records.append((target, cum - child, cum, len(stack), threading.current_thread().name))
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        if self._orig is not None:
+            builtins.__import__ = self._orig
+            self._orig = None
+
+    def top(self, n: int = 25) -> List[Tuple[str, float, float, int, str]]:
+        with self._lock:
+            recs = [r for r in self.records if r[3] == 0]
+        return sorted(recs, key=lambda r: r[2], reverse=True)[:n]
+
+
+class StartupProfiler:
+    """Named phases measured from `t0` (process start as seen by src.app)."""
+
+    def __init__(self, t0: Optional[float] = None, imports: bool = True):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases: List[Tuple[str, float, float, str]] = []  # (fase, inicio, fin, hilo)
+        self.marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.imports: Optional[ImportTimer] = ImportTimer() if imports else None
+        if self.imports is not None:
+            self.imports.install()
+
+    def phase(self, name: str) -> '_Phase':
+        return _Phase(self, name)
+
+    def mark(self, name: str):
+        """Instante puntual (p.ej. 'window-visible')."""
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.t0)
+
+    def _add(self, name: str, start: float, end: float):
+        with self._lock:
+            self.phases.append((name, start - self.t0, end - self.t0, threading.current_thread().name))
+
+    def report(self, top_imports: int = 25) -> str:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+            marks = sorted(self.marks.items(), key=lambda m: m[1])
+        lines = ["startup profile (ms desde el arranque)", f"{'fase':<28} {'inicio':>9} {'dur':>9}  hilo"]
+        for name, start, end, thread in phases:
+            lines.append(f"{name:<28} {start * 1000:9.1f} {(end - start) * 1000:9.1f}  {thread}")
+        for name, t in marks:
+            lines.append(f"@ {name:<26} {t * 1000:9.1f}")
+        if self.imports is not None:
+            lines.append("")
+            lines.append(f"import time: {'self [us]':>10} | {'cumulative':>10} | imported package")
+            for mod, self_s, cum_s, _lvl, thread in self.imports.top(top_imports):
+                suffix = '' if thread == 'MainThread' else f"  ({thread})"
+                lines.append(f"import time: {self_s * 1e6:10.0f} | {cum_s * 1e6:10.0f} | {mod}{suffix}")
+        return '\n'.join(lines)
+
+    def dump(self, stream: Optional[TextIO] = None, path: Optional[str] = None):
+        """Print the report; falls back to `path` when there is no console (frozen build)."""
+        if self.imports is not None:
+            self.imports.uninstall()
+        text = self.report()
+        stream = stream if stream is not None else sys.stdout
+        if stream is not None:
+            try:
+                print(text, file=stream, flush=True)
+                return
+            except Exception:
+                pass
+        if path:
+            try:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(text + '\n\n')
+            except Exception:
+                pass
+
+
+class _Phase:
+    __slots__ = ('_prof', '_name', '_start')
+
+    def __init__(self, prof: StartupProfiler, name: str):
+        self._prof = prof
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any):
+        self._prof._add(self._name, self._start, time.perf_counter())
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: Any):
+        return False
+
+
+_NULL = _NullPhase()
+
+
+def phase(profiler: Optional[StartupProfiler], name: str):
+    """`with phase(prof, 'x'):` que no hace nada si no hay profiler."""
+    return profiler.phase(name) if profiler is not None else _NULL
+
+
+__all__ = ['ImportTimer', 'StartupProfiler', 'phase']
@@ -0,0 +1,167 @@
+"""Trigger dispatch queue: decouples input hook threads from audio playback.
+
+Los callbacks de pynput/pywinusb solo encolan el disparo; un único worker
+drena la cola y ejecuta la reproducción fuera del hilo del hook.
+"""
+
+from __future__ import annotations
+
+import threading, time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+try:
+    from . import logger as _central_logger  # type: ignore
+except Exception:  # pragma: no cover
+    _central_logger = None
+
+Callback = Callable[[], None]
+
+OVERFLOW_POLICIES = ('drop_oldest', 'coalesce')
+
+
+class LatencyStats:
+    """Acumulador simple de latencia encolado→reproducción (segundos)."""
+
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, dt: float):
+        self.count += 1
+        self.total += dt
+        self.last = dt
+        if dt > self.max:
+            self.max = dt
+
+    def to_dict(self) -> Dict[str, float]:
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_ms': mean * 1000.0,
+            'max_ms': self.max * 1000.0,
+            'last_ms': self.last * 1000.0,
+        }
+
+
+class TriggerDispatcher:
+    """Bounded trigger queue fed by all listeners and drained by one worker.
+
+    `submit` only appends to a deque under a short lock (shared with the
+    worker's pop) and wakes the worker, so hook callbacks return in
+    microseconds.  When the queue is
+    full the oldest pending trigger is dropped; with the ``coalesce``
+    policy a trigger whose key is already pending is collapsed into it.
+    """
+
+    def __init__(self, capacity: int = 64, policy: str = 'drop_oldest'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy desconocida: {policy}")
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self._queue: Deque[Tuple[Hashable, Callback, float]] = deque()
+        self._pending: Set[Hashable] = set()
+        # Cola y pendientes cambian juntos (varios hilos de hook + el worker)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[Hashable, LatencyStats] = {}
+        self._total = LatencyStats()
+        self.submitted = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='trigger-dispatch', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        self._wake.set()
+        t = self._thread
+        if t and t is not threading.current_thread():
+            t.join(timeout)
+        self._thread = None
+
+    def submit(self, key: Hashable, cb: Callback):
+        """Encola un disparo. Seguro para llamar desde hilos de hook."""
+        now = time.perf_counter()
+        q = self._queue
+        with self._lock:
+            self.submitted += 1
+            if self.policy == 'coalesce':
+                if key in self._pending:
+                    self.coalesced += 1
+                    return
+                self._pending.add(key)
+            while len(q) >= self.capacity:
+                old = q.popleft()
+                self._pending.discard(old[0])
+                self.dropped += 1
+            q.append((key, cb, now))
+        self._wake.set()
+
+    def clear(self):
+        with self._lock:
+            self._queue.clear()
+            self._pending.clear()
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'pending': len(self._queue),
+            'latency': self._total.to_dict(),
+            'per_trigger': {str(k): s.to_dict() for k, s in list(self._stats.items())},
+        }
+
+    def reset_stats(self):
+        self._stats = {}
+        self._total = LatencyStats()
+        self.submitted = self.dropped = self.coalesced = self.errors = 0
+
+    def _run(self):
+        q = self._queue
+        while not self._stop_event.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while q and not self._stop_event.is_set():
+                with self._lock:
+                    if not q:
+                        break
+                    key, cb, t0 = q.popleft()
+                    self._pending.discard(key)
+                try:
+                    cb()
+                except Exception as e:
+                    self.errors += 1
+                    if _central_logger and _central_logger.enabled():
+                        _central_logger.log(f"[dispatch] error en trigger {key}: {e}")
+                    continue
+                dt = time.perf_counter() - t0
+                st = self._stats.get(key)
+                if st is None:
+                    st = self._stats[key] = LatencyStats()
+                st.add(dt)
+                self._total.add(dt)
+
+
+__all__ = ['TriggerDispatcher', 'LatencyStats', 'OVERFLOW_POLICIES']
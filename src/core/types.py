@@ -1,16 +1,165 @@
-from dataclasses import dataclass
-from typing import Literal, Optional, Dict, Any
+"""Runtime form of an input signature.
+
+`EventSignature` es inmutable, con `__slots__` e internado: la misma
+(type, vendor_id, product_id, code) devuelve siempre el mismo objeto mientras
+siga vivo, así que compararlo o usarlo como clave de dict es barato y no hace
+falta formatear claves de texto.  La instancia internada no se modifica nunca
+después de crearse: `human` se calcula de los campos cuando alguien lo lee
+(UI, config) y una etiqueta explícita distinta de la de por defecto va en una
+instancia aparte, igual (==, hash) a la internada.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import weakref
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Literal, Optional, Tuple
+
+SignatureType = Literal['hid', 'keyboard', 'mouse', 'multi', 'midi']
+
+_KEY_PRETTY = {'ctrl': 'Ctrl', 'alt': 'Alt', 'shift': 'Shift', 'meta': 'Win'}
+_MOUSE_PRETTY = {'left': 'Izq', 'right': 'Der', 'middle': 'Centro'}
+
+
+def _hex4(v: Optional[int]) -> str:
+    return f"{v:04X}" if isinstance(v, int) else '????'
+
+
+def default_human(type: str, vendor_id: Optional[int], product_id: Optional[int], code: str) -> str:
+    """Etiqueta por defecto, la misma que generaban los listeners al capturar."""
+    parts = code.split('+') if code else []
+    if type == 'keyboard':
+        pretty = [_KEY_PRETTY.get(k, k.upper() if len(k) == 1 else k.capitalize()) for k in parts]
+        return ("Tecla " if len(parts) == 1 else "Combo ") + '+'.join(pretty)
+    if type == 'mouse':
+        pretty = [_MOUSE_PRETTY.get(b, b.capitalize()) for b in parts]
+        return ("Mouse " if len(parts) == 1 else "Combo Mouse ") + '+'.join(pretty)
+    if type == 'hid':
+        dev = f"{_hex4(vendor_id)}:{_hex4(product_id)}"
+        if len(parts) == 1:
+            return f"HID {dev} [{code}]"
+        return f"HID Combo {dev} [{'+'.join(sorted(parts))}]"
+    if type == 'multi':
+        return f"Multi {code}"
+    if type == 'midi':
+        # code = '<msg_type>:<channel>:<note/control>'
+        bits = code.split(':')
+        if len(bits) == 3 and bits[1].isdigit():
+            msg, ch, num = bits[0], int(bits[1]) + 1, bits[2]
+            if msg == 'control_change':
+                return f"MIDI CC {num} (ch {ch})"
+            return f"MIDI {msg.replace('_', ' ').title()} Nota {num} (ch {ch})"
+        return f"MIDI {code}"
+    return f"{type} {code}"
+
+
+@lru_cache(maxsize=1024)
+def _default_human_cached(type: str, vendor_id: Optional[int], product_id: Optional[int], code: str) -> str:
+    return default_human(type, vendor_id, product_id, code)
 
 
-@dataclass
 class EventSignature:
-    type: Literal['hid', 'keyboard', 'mouse', 'multi', 'midi']
-    # For HID: vendor_id, product_id, and raw pattern (hex string)
-    # For MIDI: code = '<msg_type>:<channel>:<note/control>', e.g. 'note_on:1:60'
-    vendor_id: Optional[int] = None
-    product_id: Optional[int] = None
-    code: str = ''  # normalized string payload (for MIDI: msg_type:channel:note/control)
-    human: str = ''  # human-readable label (for MIDI: e.g. 'MIDI Note On C4 (ch 1)')
+    """Immutable, interned (type, vendor_id, product_id, code) with a lazy `human` label.
+
+    For HID: vendor_id, product_id and the raw pattern (hex string) as code.
+    For MIDI: code = '<msg_type>:<channel>:<note/control>', e.g. 'note_on:1:60'.
+    `human` no participa en la igualdad ni en el hash.
+    """
+
+    __slots__ = ('type', 'vendor_id', 'product_id', 'code', '_human', '_key', '_hash', '__weakref__')
+
+    # ident -> weakref; el lookup va sin lock (dict.get es atómico), el lock solo al crear
+    _pool: Dict[Tuple[Any, ...], 'weakref.ref[EventSignature]'] = {}
+    _pool_lock = threading.RLock()  # el callback del weakref puede saltar (GC) dentro del lock
+    # Refs fuertes a las últimas creadas: una firma sin mapeo que se repite
+    # (capturas, MIDI) no se destruye y reconstruye en cada evento
+    _recent: 'deque[EventSignature]' = deque(maxlen=256)
+
+    type: SignatureType
+    vendor_id: Optional[int]
+    product_id: Optional[int]
+    code: str
+
+    def __new__(cls, type: SignatureType, vendor_id: Optional[int] = None, product_id: Optional[int] = None,
+                code: str = '', human: str = ''):
+        ident = (type, vendor_id, product_id, code)
+        ref = cls._pool.get(ident)
+        self = ref() if ref is not None else None
+        if self is None:
+            with cls._pool_lock:
+                ref = cls._pool.get(ident)
+                self = ref() if ref is not None else None
+                if self is None:
+                    self = cls._build(ident, '')
+                    cls._pool[ident] = weakref.ref(self, lambda _r, k=ident: cls._discard(k, _r))
+                    cls._recent.append(self)
+        if human and human != _default_human_cached(*ident):
+            # Etiqueta explícita (p.ej. MIDI CC con su valor): instancia aparte;
+            # la internada es compartida y no se toca
+            return cls._build(ident, human)
+        return self
+
+    @classmethod
+    def _discard(cls, ident: Tuple[Any, ...], ref: 'weakref.ref[EventSignature]'):
+        with cls._pool_lock:
+            if cls._pool.get(ident) is ref:
+                del cls._pool[ident]
+
+    @classmethod
+    def _build(cls, ident: Tuple[Any, ...], human: str) -> 'EventSignature':
+        type, vendor_id, product_id, code = ident
+        self = object.__new__(cls)
+        code = sys.intern(code)
+        put = object.__setattr__
+        put(self, 'type', sys.intern(type))
+        put(self, 'vendor_id', vendor_id)
+        put(self, 'product_id', product_id)
+        put(self, 'code', code)
+        put(self, '_human', human)
+        put(self, '_key', sys.intern(f"{type}:{vendor_id}:{product_id}:{code}"))
+        put(self, '_hash', hash(ident))
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('EventSignature es inmutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('EventSignature es inmutable')
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, EventSignature):
+            return NotImplemented
+        return (self._hash == other._hash and self.type == other.type and self.code == other.code
+                and self.vendor_id == other.vendor_id and self.product_id == other.product_id)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (EventSignature, (self.type, self.vendor_id, self.product_id, self.code, self._human))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"EventSignature({self.key})"
+
+    @property
+    def human(self) -> str:
+        return self._human or _default_human_cached(self.type, self.vendor_id, self.product_id, self.code)
+
+    @property
+    def key(self) -> str:
+        """'type:vid:pid:code' (formato de las claves de firma en config y SQLite), fijado al crear."""
+        return self._key
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -0,0 +1,210 @@
+"""Channel allocation for AudioPlayer: polyphony limits, retrigger modes, voice stealing.
+
+En lugar de `Sound.play()` (pygame elige un canal libre y, si no hay, el
+disparo se pierde en silencio) cada reproducción pasa por aquí: se aplica el
+modo de redisparo del mapeo, el límite de voces por sonido y, si no queda
+canal libre en el pool (general o grupo del mapeo), se roba la voz más
+antigua o la más baja.  Todo se cuenta.
+"""
+
+from __future__ import annotations
+
+import threading, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pygame
+
+RETRIGGER_MODES = ('overlap', 'restart', 'ignore', 'toggle')
+STEAL_POLICIES = ('oldest', 'quietest', 'none')
+
+
+class _Voice:
+    __slots__ = ('channel', 'sound', 'key', 'started', 'group', 'fade_out_ms')
+
+    def __init__(self, channel: Any, sound: Any, key: str, group: str, fade_out_ms: int = 0):
+        self.channel = channel
+        self.sound = sound
+        self.key = key
+        self.group = group
+        self.fade_out_ms = fade_out_ms
+        self.started = time.monotonic()
+
+    def alive(self) -> bool:
+        # Los streams (audio_stream.WavChannelStream) cambian de Sound en cada bloque
+        probe = getattr(self.sound, 'is_playing_on', None)
+        if probe is not None:
+            return probe(self.channel)
+        try:
+            return bool(self.channel.get_busy()) and self.channel.get_sound() is self.sound
+        except Exception:
+            return False
+
+    def loudness(self) -> float:
+        try:
+            left, right = self.channel.get_volume(), self.sound.get_volume()
+            return float(left) * float(right)
+        except Exception:
+            return 1.0
+
+
+class VoiceManager:
+    """Allocates pygame channels to sounds; thread-safe."""
+
+    def __init__(self, num_channels: int, steal: str = 'oldest', groups: Optional[Dict[str, int]] = None):
+        self.steal = steal if steal in STEAL_POLICIES else 'oldest'
+        self._lock = threading.Lock()
+        self._voices: Dict[int, _Voice] = {}
+        self._group_sizes: Dict[str, int] = dict(groups or {})
+        self.counters: Dict[str, int] = {
+            'played': 0, 'dropped': 0, 'stolen': 0, 'ignored': 0, 'restarted': 0, 'toggled_off': 0,
+        }
+        self.resize(num_channels)
+
+    def resize(self, num_channels: int):
+        """(Re)build the channel pools; call after set_num_channels or a mixer restart."""
+        with self._lock:
+            n = max(1, int(num_channels))
+            self._channels = [pygame.mixer.Channel(i) for i in range(n)]
+            self._voices.clear()
+            # Los grupos reservan canales desde el final; el resto es el pool general
+            self._pools: Dict[str, List[int]] = {}
+            end = n
+            for name, size in self._group_sizes.items():
+                size = max(0, min(int(size), end - 1))
+                if size:
+                    self._pools[name] = list(range(end - size, end))
+                    end -= size
+            self._pools[''] = list(range(0, end))
+
+    def set_groups(self, groups: Dict[str, int]):
+        self._group_sizes = dict(groups)
+        self.resize(len(self._channels))
+
+    def play(self, sound: Any, key: str, mode: str = 'overlap', max_voices: int = 0,
+             group: str = '', loops: int = 0, maxtime: int = 0, fade_ms: int = 0,
+             volume: Optional[Tuple[float, float]] = None, fade_out_ms: int = 0) -> Optional[Any]:
+        """Play `sound` (a Sound or a channel stream) for `key`; returns the Channel or None."""
+        with self._lock:
+            pool_name = group if group in self._pools else ''
+            active = self._active_for(key)
+            if active:
+                if mode == 'toggle':
+                    for v in active:
+                        self._stop(v)
+                    self.counters['toggled_off'] += 1
+                    return None
+                if mode == 'ignore':
+                    self.counters['ignored'] += 1
+                    return None
+            idx: Optional[int] = None
+            if active and mode == 'restart':
+                # Reutilizar el canal de la voz más antigua de este sonido
+                oldest = min(active, key=lambda v: v.started)
+                for v in active:
+                    if v is not oldest:
+                        self._stop(v)
+                idx = self._index_of(oldest)
+                self.counters['restarted'] += 1
+            elif max_voices > 0 and len(active) >= max_voices:
+                oldest = min(active, key=lambda v: v.started)
+                idx = self._index_of(oldest)
+                self.counters['stolen'] += 1
+            if idx is None:
+                idx = self._free_in(pool_name)
+            if idx is None:
+                idx = self._steal_in(pool_name)
+                if idx is None:
+                    self.counters['dropped'] += 1
+                    return None
+                self.counters['stolen'] += 1
+            ch = self._channels[idx]
+            start = getattr(sound, 'start_on', None)
+            try:
+                if start is not None:
+                    start(ch, loops=loops, maxtime=maxtime, fade_ms=fade_ms)
+                else:
+                    ch.play(sound, loops=loops, maxtime=maxtime, fade_ms=fade_ms)
+                if volume is not None:
+                    # play() restablece el volumen del canal: aplicar después
+                    ch.set_volume(*volume)
+            except Exception:
+                self.counters['dropped'] += 1
+                self._voices.pop(idx, None)
+                return None
+            self._voices[idx] = _Voice(ch, sound, key, pool_name, fade_out_ms)
+            self.counters['played'] += 1
+            return ch
+
+    def stop_key(self, key: str):
+        with self._lock:
+            for v in self._active_for(key):
+                self._stop(v)
+
+    def clear(self):
+        with self._lock:
+            self._voices.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self.counters)
+            out['active'] = sum(1 for v in self._voices.values() if v.alive())
+            out['channels'] = len(self._channels)
+            return out
+
+    # ---- internos (con lock) ----
+    def _active_for(self, key: str) -> List[_Voice]:
+        out = []
+        for idx, v in list(self._voices.items()):
+            if not v.alive():
+                del self._voices[idx]
+            elif v.key == key:
+                out.append(v)
+        return out
+
+    def _index_of(self, voice: _Voice) -> int:
+        for idx, v in self._voices.items():
+            if v is voice:
+                return idx
+        return self._channels.index(voice.channel)
+
+    def _stop(self, voice: _Voice):
+        try:
+            if voice.fade_out_ms > 0:
+                voice.channel.fadeout(voice.fade_out_ms)
+            else:
+                voice.channel.stop()
+        except Exception:
+            pass
+        self._voices.pop(self._index_of(voice), None)
+
+    def _free_in(self, pool: str) -> Optional[int]:
+        for idx in self._pools[pool]:
+            v = self._voices.get(idx)
+            if v is not None and v.alive():
+                continue
+            try:
+                if self._channels[idx].get_busy():
+                    continue  # ocupado por algo ajeno (p. ej. preview directa)
+            except Exception:
+                continue
+            return idx
+        return None
+
+    def _steal_in(self, pool: str) -> Optional[int]:
+        if self.steal == 'none':
+            return None
+        victims = [(idx, self._voices[idx]) for idx in self._pools[pool] if idx in self._voices]
+        if not victims:
+            return None
+        if self.steal == 'quietest':
+            idx, _ = min(victims, key=lambda e: (e[1].loudness(), e[1].started))
+        else:
+            idx, _ = min(victims, key=lambda e: e[1].started)
+        try:
+            self._channels[idx].stop()
+        except Exception:
+            pass
+        return idx
+
+
+__all__ = ['VoiceManager', 'RETRIGGER_MODES', 'STEAL_POLICIES']
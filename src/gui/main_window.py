@@ -1,52 +1,191 @@
+import os
+import threading
+from functools import partial
 from PyQt6.QtWidgets import (
     QApplication,
     QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton, QFileDialog,
     QLineEdit, QMessageBox, QSystemTrayIcon, QHBoxLayout, QCheckBox,
-    QTabWidget, QTextEdit, QTableWidget, QTableWidgetItem, QAbstractItemView,
-    QHeaderView, QStyle, QToolButton, QMenu
+    QTabWidget, QPlainTextEdit, QTableView, QAbstractItemView,
+    QHeaderView, QStyle, QMenu
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject
-from PyQt6.QtGui import QCursor, QBrush, QColor  # Añadimos QBrush/QColor para resaltar duplicados
+from PyQt6.QtGui import QCursor
 
 from src.core.config_store import ConfigStore
-from src.core.audio_player import AudioPlayer
-from src.core.device_listener import DeviceListener, MultiDeviceListener
+from src.core.trigger_dispatcher import TriggerDispatcher
 from src.core.types import EventSignature
-from src.core.hid_devices import list_hid_devices
 from .tray import TrayController
-from src.core.logger import log, has_listeners
+from .mapping_table import MappingTableModel, ActionButtonsDelegate, COL_INDEX, COL_ACTIONS
+from src.core.logger import log, enabled
 from src.core.mapping_manager import MappingManager, MappingItem
+from src.core.mapping_store import SqliteMappingStore
+from src.core.startup_profile import phase
+# pygame (AudioPlayer), pynput/pywinusb (listeners, HID) se importan en
+# _background_init, después de mostrar la ventana
 
 
-class _LogBridge(QObject):
-    line = pyqtSignal(str)
+class _PreloadBridge(QObject):
+    progress = pyqtSignal(int, int)  # (hechos, total) desde hilos del pool
 
 
+class _InitBridge(QObject):
+    hid_changed = pyqtSignal(object, object)  # (HidDeviceInfo añadidos, (vid, pid) quitados)
+    hid_refreshed = pyqtSignal(str)  # error ('' si fue bien)
+    ready = pyqtSignal()  # audio/backends o dispositivos listos: correr acciones aplazadas
+    done = pyqtSignal()
+
 
 class MainWindow(QWidget):
     capture_ready = pyqtSignal(int, object)  # (row_idx, EventSignature)
-    def __init__(self):
+    LOG_POLL_MS = 50
+    LOG_BATCH = 1000  # líneas por tick como máximo; el exceso se marca como descartado
+    LOG_MAX_LINES = 5000
+    startup_finished = pyqtSignal()
+
+    def __init__(self, profiler=None):
         super().__init__()
+        self._profiler = profiler
         self._init_window()
 
     def _init_window(self):
         self.setWindowTitle("Soundpad v1.0.1 - by Aragón")
         self.resize(880, 560)
         # state
-        self.config = ConfigStore()
-        self.audio = AudioPlayer()
+        with phase(self._profiler, 'config'):
+            self.config = ConfigStore()
+        # Mixer, backends de entrada y enumeración HID: en segundo plano (start_background_init)
+        self.audio = None
+        self._backend_ready = threading.Event()
+        self._devices_ready = threading.Event()
+        self._hid_enum = None  # enumerador HID compartido (cacheado), tras el arranque
+        self._device_touched = False  # el usuario ya eligió dispositivo: no restaurar el guardado
+        self._init_thread = None
+        self._init_bridge = _InitBridge()
+        self._init_bridge.hid_changed.connect(self._apply_hid_changes)
+        self._init_bridge.hid_refreshed.connect(self._on_hid_refreshed)
+        self._init_bridge.ready.connect(self._run_deferred)
+        self._init_bridge.done.connect(self.startup_finished.emit)
+        # Acciones pedidas antes de terminar el arranque: función -> (necesita dispositivos, acción)
+        self._deferred = {}
+        self._preload_bridge = _PreloadBridge()
+        self._preload_bridge.progress.connect(self._on_preload_progress)
+        # Cola de disparo: los hooks de entrada solo encolan, un worker reproduce
+        dcfg = self.config.data.get('dispatch', {}) or {}
+        try:
+            self.dispatcher = TriggerDispatcher(
+                capacity=int(dcfg.get('capacity', 64)),
+                policy=dcfg.get('policy', 'drop_oldest'),
+            )
+        except ValueError:
+            self.dispatcher = TriggerDispatcher()
+        self.dispatcher.start()
         self.listener = None
         self._was_listening = False
         self._capture_listener = None
         self.device_map = []
         # ui and wiring
-        self._build_ui()
-        self._apply_styles()
-        self._load_config()
-        self._populate_devices()
-        self._wire_tray()
+        with phase(self._profiler, 'ui'):
+            self._build_ui()
+            self._apply_styles()
+        with phase(self._profiler, 'mappings'):
+            self._load_config()
+        # Solo las entradas fijas; los HID llegan con _apply_hid_changes
+        self._populate_devices([])
+        with phase(self._profiler, 'tray'):
+            self._wire_tray()
         self.capture_ready.connect(self._on_capture_ready)
 
+    # ---- arranque en segundo plano ----
+    def start_background_init(self):
+        """Init mixer, input backends and HID enumeration off the GUI thread."""
+        if self._init_thread is not None:
+            return
+        self._init_thread = threading.Thread(target=self._background_init, name='startup-init', daemon=True)
+        self._init_thread.start()
+
+    def _ensure_backend(self, devices: bool = False, then=None) -> bool:
+        """True si el arranque ya terminó; si no, aplaza `then` hasta que termine.
+
+        Nunca bloquea el hilo de la GUI: la acción se repite desde `_run_deferred`
+        (señal `ready`).  Pedir otra vez la misma acción reemplaza la aplazada.
+        """
+        ev = self._devices_ready if devices else self._backend_ready
+        if not ev.is_set():
+            self.start_background_init()
+            if then is not None:
+                self._deferred[getattr(then, 'func', then)] = (devices, then)
+            self._set_status("Inicializando audio y dispositivos... (se hará al terminar)")
+            return False
+        if devices and self._hid_enum is not None:
+            # Puede haber señales hid_changed encoladas aún sin procesar: igualar ya el selector
+            self._sync_hid_entries()
+        return True
+
+    def _run_deferred(self):
+        for key, (devices, action) in list(self._deferred.items()):
+            ev = self._devices_ready if devices else self._backend_ready
+            if ev.is_set() and self._deferred.pop(key, None) is not None:
+                action()
+
+    def _background_init(self):
+        try:
+            with phase(self._profiler, 'audio-init'):
+                self.audio = self._create_audio()
+            with phase(self._profiler, 'input-backends'):
+                import src.core.device_listener  # noqa: F401  (pynput, pywinusb)
+                from src.core.hid_decoder import set_ignore_masks
+                hcfg = self.config.data.get('hid', {}) or {}
+                set_ignore_masks(hcfg.get('ignore_masks', {}), auto_noise=hcfg.get('auto_noise', True),
+                                 rest=hcfg.get('rest'), baseline=hcfg.get('baseline_bytes'))
+        except Exception as e:
+            log(f"[startup] error al inicializar audio/entradas: {e}")
+        finally:
+            self._backend_ready.set()
+            self._init_bridge.ready.emit()
+        error = ''
+        try:
+            with phase(self._profiler, 'hid-enumerate'):
+                from src.core.hid_enum import shared_enumerator
+                enum = shared_enumerator()
+                # La primera enumeración llega como "todo añadido"; después, solo los cambios
+                enum.subscribe(self._on_hid_enum_changed)
+                self._hid_enum = enum
+                enum.refresh()
+                error = enum.error
+        except Exception as e:
+            error = str(e)
+        self._devices_ready.set()
+        self._init_bridge.ready.emit()
+        self._init_bridge.hid_refreshed.emit(error)
+        self._init_bridge.done.emit()
+
+    def _on_hid_enum_changed(self, added, removed):
+        # Hilo del enumerador: resolver las etiquetas aquí y pasar al hilo de la GUI
+        enum = self._hid_enum
+        infos = [i for i in (enum.info(k) for k in added) if i is not None] if enum else []
+        self._init_bridge.hid_changed.emit(infos, list(removed))
+
+    def _create_audio(self):
+        from src.core.audio_player import AudioPlayer
+        acfg = self.config.data.get('audio', {}) or {}
+        audio = AudioPlayer(
+            not_ready_policy=acfg.get('not_ready_policy', 'play_when_ready'),
+            cache_budget_mb=float(acfg.get('cache_budget_mb', 256)),
+            pin_below_kb=float(acfg.get('pin_below_kb', 512)),
+            cache_dir=os.path.join(self.config.dir, 'pcm-cache') if acfg.get('disk_cache', True) else None,
+            disk_cache_mb=float(acfg.get('disk_cache_mb', 1024)),
+            latency_profile=acfg.get('latency_profile', 'balanced'),
+            steal_policy=acfg.get('steal_policy', 'oldest'),
+            channel_groups=acfg.get('channel_groups') or {},
+            stream_threshold_mb=float(acfg.get('stream_threshold_mb', 32)),
+            stream_threshold_s=float(acfg.get('stream_threshold_s', 120)),
+            normalize_dbfs=acfg.get('normalize_dbfs'),
+            trim_silence=bool(acfg.get('trim_silence', False)),
+            silence_db=float(acfg.get('silence_db', -50.0)),
+        )
+        audio.on_progress = self._preload_bridge.progress.emit
+        return audio
+
     def _build_ui(self):
         # Delegar a helper estable para evitar problemas de indentación
         self._init_ui_core()
@@ -65,16 +204,28 @@ class MainWindow(QWidget):
         layout.addLayout(device_row)
 
         self.mapping_manager = MappingManager()
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["#", "Evento", "Audio", "Acciones"])
+        # Modelo sobre el manager + botones pintados por delegate: sin items ni widgets por fila
+        self.table_model = MappingTableModel(self.mapping_manager, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.actions_delegate = ActionButtonsDelegate(self.table)
+        self.actions_delegate.triggered.connect(self._on_row_action)
+        self.table.setItemDelegate(self.actions_delegate)
+        self.table.setMouseTracking(True)
         self.table.verticalHeader().setVisible(False)
         self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
         self.table.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.table.setWordWrap(False)
+        # Tamaños fijos: ResizeToContents recorrería todas las filas
+        vheader = self.table.verticalHeader()
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setDefaultSectionSize(self.table.fontMetrics().height() + 12)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(COL_INDEX, QHeaderView.ResizeMode.Fixed)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(COL_ACTIONS, QHeaderView.ResizeMode.Fixed)
+        self._fit_fixed_columns()
         self.table.setAlternatingRowColors(True)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         layout.addWidget(self.table)
@@ -95,17 +246,25 @@ class MainWindow(QWidget):
         layout.addWidget(self.toggle_listen_btn)
 
         self.device_selector.currentIndexChanged.connect(self._on_device_changed)
+        self.device_selector.activated.connect(self._on_device_activated)
         self.apply_btn.clicked.connect(self._apply_changes)
         self.toggle_listen_btn.clicked.connect(self._toggle_listening)
         self.add_row_btn.clicked.connect(self._add_row)
         self.remove_row_btn.clicked.connect(self._remove_selected_row)
         self.dup_btn.clicked.connect(self._show_duplicates)
-        self.refresh_devices_btn.clicked.connect(self._populate_devices)
+        self.refresh_devices_btn.clicked.connect(self._refresh_devices)
         self.log_chk.stateChanged.connect(self._on_log_toggle)
 
         self.tabs = QTabWidget()
         self.main_tab = QWidget(); self.main_tab.setLayout(layout)
-        self.log_view = QTextEdit(); self.log_view.setReadOnly(True)
+        self.log_view = QPlainTextEdit(); self.log_view.setReadOnly(True)
+        # Tope de bloques: Qt descarta las líneas más viejas de a una, sin limpiar todo
+        self.log_view.setMaximumBlockCount(self.LOG_MAX_LINES)
+        self.log_view.setUndoRedoEnabled(False)
+        self._log_cursor = None
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(self.LOG_POLL_MS)
+        self._log_timer.timeout.connect(self._drain_log)
         self.tabs.addTab(self.main_tab, "Principal")
         self.tabs.addTab(self.log_view, "Log")
         outer = QVBoxLayout(); outer.addWidget(self.tabs)
@@ -119,7 +278,7 @@ class MainWindow(QWidget):
         # Simple dark theme to ensure text contrast (labels/items were blending)
         style = """
 QWidget { font-size: 11px; }
-QTableWidget {
+QTableView {
     background: #202225;
     alternate-background-color: #26292c;
     color: #ffffff; /* texto normal ahora blanco para contraste */
@@ -127,8 +286,8 @@ QTableWidget {
     selection-background-color: #2c2f33;
     selection-color: #ffffff; /* texto seleccionado blanco */
 }
-QTableWidget::item { color: #ffffff; }
-QTableWidget::item:selected { color: #ffffff; }
+QTableView::item { color: #ffffff; }
+QTableView::item:selected { color: #ffffff; }
 QHeaderView::section {
     background: #2c2f33;
     color: #dddddd;
@@ -157,37 +316,35 @@ QTabBar::tab:selected { background: #3a3d41; }
         import os
         from src.core import logger
         if self.log_chk.isChecked():
-            # Enable MIDI + HID debug env flags so listener prints become structured logs
+            # Los reports HID pasan al log (nivel debug)
             os.environ['SP_DEBUG_HID'] = '1'
-            # Register UI sink
-            if not hasattr(self, '_log_bridge'):
-                self._log_bridge = _LogBridge()
-                self._log_bridge.line.connect(self.log_view.append)
-            def sink(line: str):
-                try:
-                    # simple overflow control
-                    if self.log_view.document().blockCount() > 4800:
-                        self.log_view.clear()
-                        self.log_view.append('[log] limpiado por overflow')
-                    self._log_bridge.line.emit(line)
-                except Exception:
-                    pass
-            self._log_sink = sink
-            logger.register(self._log_sink)
+            # Pull por lotes desde el GUI: el logger nunca llama a Qt desde otros hilos
+            if self._log_cursor is None:
+                self._log_cursor = logger.subscribe()
+            self._log_timer.start()
             logger.log('Logging habilitado')
             self.tabs.setCurrentWidget(self.log_view)
         else:
-            if hasattr(self, '_log_sink'):
-                try:
-                    from src.core import logger
-                    logger.unregister(self._log_sink)
-                except Exception:
-                    pass
-                del self._log_sink
+            self._log_timer.stop()
+            if self._log_cursor is not None:
+                self._drain_log()
+                self._log_cursor.close()
+                self._log_cursor = None
             for k in ['SP_DEBUG_HID']:
                 if k in os.environ:
                     del os.environ[k]
 
+    def _drain_log(self):
+        cur = self._log_cursor
+        if cur is None:
+            return
+        lines, dropped = cur.pull(self.LOG_BATCH)
+        if dropped:
+            lines.insert(0, f"[log] {dropped} líneas descartadas (el log va más rápido que la vista)")
+        if lines:
+            # Un solo append por tick
+            self.log_view.appendPlainText('\n'.join(lines))
+
     def _wire_tray(self):
         self.tray = TrayController(self)
         self.tray.request_show.connect(self._on_tray_show)
@@ -197,73 +354,65 @@ QTabBar::tab:selected { background: #3a3d41; }
         self.tray.show()
 
     def _add_row(self):
-        item = self.mapping_manager.add()
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self._refresh_row(row, item)
-
-    def _refresh_row(self, row: int, item: MappingItem):
-        # Wrapper to avoid indentation issues in original method body
-        self._do_refresh_row(row, item)
-
-    def _do_refresh_row(self, row: int, item: MappingItem): self._build_row(row, item)
+        self.table_model.append()
+        self._fit_fixed_columns()
 
-    def _build_row(self, row: int, item: MappingItem):
-        # Wrapper interno que delega a función global para evitar errores de indentación en build
-        build_row(self, row, item)
+    def _refresh_row(self, row: int, item=None):
+        self.table_model.refresh_row(row)
 
-    def _ensure_action_widgets(self, row: int):
-        if self.table.cellWidget(row, 3) is not None:
+    def _fit_fixed_columns(self):
+        fm = self.table.fontMetrics()
+        header = self.table.horizontalHeader()
+        header.resizeSection(COL_INDEX, fm.horizontalAdvance(str(max(9, len(self.mapping_manager)))) + 16)
+        header.resizeSection(COL_ACTIONS, self.actions_delegate.width_for(fm) + 4)
+
+    def _on_row_action(self, row: int, action: str):
+        handler = {
+            'map': self._map_row,
+            'audio': self._browse_audio,
+            'play': self._preview_audio,
+            'params': self._edit_params,
+            'clear': self._clear_row,
+        }.get(action)
+        if handler:
+            handler(row)
+
+    def _edit_params(self, row: int):
+        item = self.mapping_manager.get_by_row(row)
+        if not item:
             return
-        container = QWidget()
-        layout = QHBoxLayout(container)
-        layout.setContentsMargins(0, 0, 0, 0)
-        buttons = []
-        map_btn = QToolButton(); map_btn.setText("Capturar"); buttons.append(map_btn)
-        browse_btn = QToolButton(); browse_btn.setText("Audio"); buttons.append(browse_btn)
-        play_btn = QToolButton(); play_btn.setText("▶"); buttons.append(play_btn)
-        clear_btn = QToolButton(); clear_btn.setText("Limpiar"); buttons.append(clear_btn)
-        for b in buttons:
-            layout.addWidget(b)
-        layout.addStretch(1)
-        self.table.setCellWidget(row, 3, container)
-        map_btn.clicked.connect(lambda _, r=row: self._map_row(r))
-        browse_btn.clicked.connect(lambda _, r=row: self._browse_audio(r))
-        clear_btn.clicked.connect(lambda _, r=row: self._clear_row(r))
-        play_btn.clicked.connect(lambda _, r=row: self._preview_audio(r))
+        from .sound_params_dialog import SoundParamsDialog
+        dlg = SoundParamsDialog(item, self)
+        if dlg.exec():
+            dlg.apply_to(item)
+            self._set_status(f"Parámetros de la fila {row+1} actualizados (Aplicar para guardar)")
 
     def _clear_row(self, row: int):
         item = self.mapping_manager.get_by_row(row)
         if not item: return
-        item.signature = None
-        item.audio = ''
+        self.mapping_manager.clear(item)
         self._refresh_row(row, item)
-        self._update_duplicate_highlight()
 
     def _preview_audio(self, row: int):
         item = self.mapping_manager.get_by_row(row)
         if item and item.audio:
-            self.audio.play(item.audio)
+            if not self._ensure_backend(then=partial(self._preview_audio, row)):
+                return
+            if self.audio is None:
+                return
+            self.audio.play(item.audio, **item.play_options())
             self._set_status(f"Reproduciendo preview fila {row+1}")
 
     def _remove_selected_row(self):
         # Con selección desactivada, tomamos la última fila como objetivo
         if self.table.selectionMode() == QAbstractItemView.SelectionMode.NoSelection:
-            row = self.table.rowCount() - 1
+            row = self.table_model.rowCount() - 1
         else:
-            row = self.table.currentRow()
+            row = self.table.currentIndex().row()
         if row < 0:
             return
-        item = self.mapping_manager.get_by_row(row)
-        if not item:
-            return
-        self.mapping_manager.remove_ids([item.id])
-        self.table.removeRow(row)
-        # Renumber
-        for r in range(self.table.rowCount()):
-            if self.table.item(r,0):
-                self.table.item(r,0).setText(str(r+1))
-        self._update_duplicate_highlight()
+        # La numeración (#) sale de la fila, no hay que renumerar
+        self.table_model.remove_row(row)
 
     def _show_duplicates(self):
         dups = self.mapping_manager.detect_duplicates()
@@ -272,27 +421,10 @@ QTabBar::tab:selected { background: #3a3d41; }
             return
         msg = []
         for k, lst in dups.items():
-            codes = ', '.join(str(i.id) for i in lst)
+            rows = sorted(self.mapping_manager.row_of(i.id) for i in lst)
+            codes = ', '.join(str(r + 1) for r in rows if r is not None)
             msg.append(f"{k} -> filas {codes}")
         QMessageBox.warning(self, "Duplicados", "Se encontraron duplicados:\n" + '\n'.join(msg))
-        self._update_duplicate_highlight()
-
-    def _update_duplicate_highlight(self):
-        dups = self.mapping_manager.detect_duplicates()
-        dup_ids = {i.id for lst in dups.values() for i in lst}
-        for r in range(self.table.rowCount()):
-            item = self.mapping_manager.get_by_row(r)
-            is_dup = item and item.id in dup_ids
-            for c in range(0,3):
-                it = self.table.item(r,c)
-                if not it:
-                    continue
-                if is_dup:
-                    # Fondo ámbar oscuro para duplicados, texto ya está en blanco
-                    it.setBackground(QColor('#665500'))
-                else:
-                    # Restaurar fondo por defecto (usar brush vacío para que aplique alternating colors)
-                    it.setBackground(QBrush())
 
     def closeEvent(self, event):
         # Minimize to tray instead of closing
@@ -313,13 +445,76 @@ QTabBar::tab:selected { background: #3a3d41; }
         try:
             if self.listener:
                 self.listener.stop()
+            self.dispatcher.stop()
+            if self.audio is not None:
+                self.audio.shutdown()
+            # Escribir el guardado diferido pendiente antes de salir
+            self.config.close()
         finally:
             self.tray.hide()
             self.close()
             QApplication.instance().quit()
 
-    def _populate_devices(self):
-        if has_listeners():
+    def _refresh_devices(self):
+        self.refresh_devices_btn.setEnabled(False)
+        self._set_status("Buscando dispositivos HID...")
+        if self._hid_enum is None:
+            # Aún arrancando: el arranque ya enumera y emite hid_refreshed al acabar
+            self.start_background_init()
+            return
+        # En el hilo del enumerador; los cambios llegan por hid_changed y el fin por hid_refreshed
+        self._hid_enum.refresh_async(force=True, done=self._init_bridge.hid_refreshed.emit)
+
+    def _on_hid_refreshed(self, error: str):
+        self.refresh_devices_btn.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "HID", f"No se pudieron listar dispositivos HID: {error}")
+        else:
+            count = sum(1 for t, _ in self.device_map if t == 'hid')
+            self._set_status(f"Dispositivos: {count} HID")
+
+    def _hid_index(self, vid, pid) -> int:
+        for i, (t, info) in enumerate(self.device_map):
+            if t == 'hid' and info.get('vendor_id') == vid and info.get('product_id') == pid:
+                return i
+        return -1
+
+    def _apply_hid_changes(self, added, removed):
+        """Add/remove HID entries in the selector without rebuilding it (keeps the selection)."""
+        for vid, pid in removed:
+            i = self._hid_index(vid, pid)
+            if i < 0:
+                continue
+            # Primero el mapa: removeItem emite currentIndexChanged con los índices nuevos
+            del self.device_map[i]
+            self.device_selector.removeItem(i)
+            if enabled():
+                log(f"HID desconectado VID:{vid:04X} PID:{pid:04X}")
+        sel = self.config.data.get('selected_device', {"type": "keyboard"})
+        for dev in added:
+            if self._hid_index(dev.vendor_id, dev.product_id) >= 0:
+                continue  # ya aplicado (_sync_hid_entries se adelantó a la señal)
+            self._add_hid_entry(dev)
+            if (not self._device_touched and sel.get('type') == 'hid'
+                    and sel.get('vendor_id') == dev.vendor_id and sel.get('product_id') == dev.product_id):
+                self.device_selector.setCurrentIndex(len(self.device_map) - 1)
+
+    def _sync_hid_entries(self):
+        enum = self._hid_enum
+        current = {(d.vendor_id, d.product_id): d for d in enum.devices()}
+        shown = [(info.get('vendor_id'), info.get('product_id')) for t, info in self.device_map if t == 'hid']
+        self._apply_hid_changes([d for k, d in current.items() if k not in shown],
+                                [k for k in shown if k not in current])
+
+    def _add_hid_entry(self, dev):
+        label = f"HID: {dev.vendor_name or 'Vendor'} {dev.product_name or 'Product'} (VID:{dev.vendor_id:04X} PID:{dev.product_id:04X})"
+        self.device_selector.addItem(label)
+        self.device_map.append(("hid", dev.__dict__))
+        if enabled():
+            log(f"HID detectado {label}")
+
+    def _populate_devices(self, hid_list):
+        if enabled():
             log('Dispositivos: refrescando listado')
         self.device_selector.clear()
         self.device_map = []
@@ -327,7 +522,7 @@ QTabBar::tab:selected { background: #3a3d41; }
         # Special option: All devices
         self.device_selector.addItem("Todos los dispositivos")
         self.device_map.append(("all", {}))
-        if has_listeners():
+        if enabled():
             log('Añadido alias Todos los dispositivos')
 
         # Global options
@@ -335,20 +530,12 @@ QTabBar::tab:selected { background: #3a3d41; }
         self.device_map.append(("keyboard", {}))
         self.device_selector.addItem("Global Mouse")
         self.device_map.append(("mouse", {}))
-        if has_listeners():
+        if enabled():
             log('Añadidos global keyboard/mouse')
 
-        # HID devices (deduplicados por VID:PID en list_hid_devices)
-        try:
-            hid_list = list_hid_devices()
-            for dev in hid_list:
-                label = f"HID: {dev.vendor_name or 'Vendor'} {dev.product_name or 'Product'} (VID:{dev.vendor_id:04X} PID:{dev.product_id:04X})"
-                self.device_selector.addItem(label)
-                self.device_map.append(("hid", dev.__dict__))
-                if has_listeners():
-                    log(f"HID detectado {label}")
-        except Exception as e:
-            QMessageBox.warning(self, "HID", f"No se pudieron listar dispositivos HID: {e}")
+        # HID devices (uno por VID:PID)
+        for dev in hid_list:
+            self._add_hid_entry(dev)
 
         # MIDI eliminado
 
@@ -362,13 +549,16 @@ QTabBar::tab:selected { background: #3a3d41; }
                     self.device_selector.setCurrentIndex(i)
                     break
 
+    def _on_device_activated(self, idx: int):
+        self._device_touched = True
+
     def _on_device_changed(self, idx: int):
         if 0 <= idx < len(self.device_map):
             dtype, _ = self.device_map[idx]
-            if has_listeners():
+            if enabled():
                 log(f"Dispositivo seleccionado idx={idx} tipo={dtype}")
         else:
-            if has_listeners():
+            if enabled():
                 log(f"Dispositivo seleccionado inválido idx={idx}")
 
     def _browse_audio(self, row_idx: int):
@@ -380,15 +570,17 @@ QTabBar::tab:selected { background: #3a3d41; }
             if item:
                 item.audio = path
                 self._refresh_row(row_idx, item)
-                self._update_duplicate_highlight()
         self._resume_listening_if_needed()
 
     def _map_row(self, row_idx: int):
+        if not self._ensure_backend(devices=True, then=partial(self._map_row, row_idx)):
+            return
         self._was_listening = self.listener.is_running if self.listener else False
         self._stop_listening()
         item = self.mapping_manager.get_by_row(row_idx)
         if not item:
             return
+        from src.core.device_listener import DeviceListener, MultiDeviceListener
         dtype, dinfo = self.device_map[self.device_selector.currentIndex()]
         tmp_listener = MultiDeviceListener() if dtype == 'all' else DeviceListener(dtype, dinfo)
         self._capture_listener = tmp_listener
@@ -398,13 +590,12 @@ QTabBar::tab:selected { background: #3a3d41; }
                 tmp_listener.stop()
             except Exception:
                 pass
-            item.signature = sig
+            self.mapping_manager.set_signature(item, sig)
             self._refresh_row(row_idx, item)
-            self._update_duplicate_highlight()
             self._capture_listener = None
             self._set_status(f"Captura fila {row_idx+1}: {sig.human}")
             self._resume_listening_if_needed()
-            if has_listeners():
+            if enabled():
                 log(f"Captura completada fila={row_idx+1} sig={sig.type}:{sig.code}")
         tmp_listener.capture_next(on_captured)
         try:
@@ -431,31 +622,49 @@ QTabBar::tab:selected { background: #3a3d41; }
         pass
 
     def _apply_changes(self):
+        if not self._ensure_backend(devices=True, then=self._apply_changes):
+            return
         # stop existing listener
         if self.listener:
             self.listener.stop()
             self.listener = None
 
-        # build mapping (signature + audio only)
-        mapping = []
-        for m in self.mapping_manager.items():
-            if m.signature and m.audio:
-                mapping.append({'signature': m.signature.to_dict(), 'audio': m.audio})
+        from src.core.device_listener import DeviceListener, MultiDeviceListener
+        from src.core.sound_variants import needs_variant, variant_key
+        if self.audio is None:
+            QMessageBox.critical(self, "Audio", "No se pudo inicializar el audio.")
+            return
+        # build mapping (signature + audio + opciones de reproducción); con
+        # SQLite las filas no materializadas se leen en bloque sin crear MappingItem
+        store = self.mapping_manager.store
+        mapping = [m for m in self.mapping_manager.rows(signed_only=True) if m.get('signature') and m.get('audio')]
+        play_opts = [MappingItem.play_options_of(m) for m in mapping]
+        self.audio.set_load_modes({m['audio']: m.get('load_mode', 'auto') for m in mapping})
+        variants = {}
+        for opts, m in zip(play_opts, mapping):
+            if needs_variant(opts['start_ms'], opts['fade_out_ms'], opts['loops']):
+                variants.setdefault(m['audio'], set()).add(variant_key(opts['start_ms'], opts['fade_out_ms'], opts['loops']))
+        self.audio.set_variants(variants)
         self.audio.preload([m['audio'] for m in mapping])
 
         dtype, dinfo = self.device_map[self.device_selector.currentIndex()]
         if dtype == 'all':
-            self.listener = MultiDeviceListener()
+            self.listener = MultiDeviceListener(self.dispatcher)
         else:
-            self.listener = DeviceListener(dtype, dinfo)
-        for m in mapping:
+            self.listener = DeviceListener(dtype, dinfo, self.dispatcher)
+        for opts, m in zip(play_opts, mapping):
             sig = EventSignature.from_dict(m['signature'])
             audio_path = m['audio']
-            self.listener.bind(sig, lambda p=audio_path: self.audio.play(p))
+            self.listener.bind(sig, lambda p=audio_path, o=opts: self.audio.play(p, **o))
 
         # save config
         self.config.data['selected_device'] = {'type': dtype, **dinfo}
-        self.config.data['mappings'] = mapping
+        if store is not None:
+            # Los mapeos viven en mappings.db: solo se escriben las filas cambiadas
+            self.mapping_manager.sync_to_store()
+            self.config.data.pop('mappings', None)
+        else:
+            self.config.data['mappings'] = mapping
         self.config.save()
 
         # Auto-start listening after applying
@@ -468,6 +677,16 @@ QTabBar::tab:selected { background: #3a3d41; }
         except Exception:
             pass
 
+    def _on_preload_progress(self, done: int, total: int):
+        if total <= 0:
+            return
+        if done >= total:
+            self._set_status(f"Audio listo ({total} archivos)")
+            if enabled():
+                log(f"[audio] cache {self.audio.cache_stats()}")
+        else:
+            self._set_status(f"Cargando audio {done}/{total}...")
+
     def _start_listening(self):
         if not self.listener:
             self._apply_changes()
@@ -483,9 +702,15 @@ QTabBar::tab:selected { background: #3a3d41; }
         if self.listener and self.listener.is_running:
             self.listener.stop()
             self.toggle_listen_btn.setText("Iniciar escucha")
-        # Stop any currently playing sounds when stopping listening
+        # Descartar disparos pendientes y detener sonidos en curso
+        self.dispatcher.clear()
+        if enabled():
+            log(f"[dispatch] stats {self.dispatcher.stats()['latency']}")
+            if self.audio is not None:
+                log(f"[audio] voces {self.audio.voice_stats()}")
         try:
-            self.audio.stop_all()
+            if self.audio is not None:
+                self.audio.stop_all()
         except Exception:
             pass
 
@@ -507,20 +732,39 @@ QTabBar::tab:selected { background: #3a3d41; }
 
     def _load_config(self):
         data = self.config.data
-        rows = data.get('mappings', [])
-        self.mapping_manager.load(rows)
-        self.table.setRowCount(0)
-        for item in self.mapping_manager.items():
-            r = self.table.rowCount()
-            self.table.insertRow(r)
-            self._refresh_row(r, item)
-        self._update_duplicate_highlight()
+        db_path = os.path.join(self.config.dir, 'mappings.db')
+        if data.get('mapping_store') == 'sqlite':
+            try:
+                store = SqliteMappingStore(db_path)
+                if 'mappings' in data:
+                    # Migración desde config.json (o reimportación tras editarlo a mano)
+                    store.import_json(data.get('mappings') or [])
+                    data.pop('mappings', None)
+                    self.config.save()
+                self.mapping_manager.attach_store(store)
+            except Exception as e:
+                log(f"[config] no se pudo abrir {db_path}: {e}")
+                self.mapping_manager.load(data.get('mappings', []))
+        else:
+            rows = data.get('mappings')
+            if rows is None and os.path.exists(db_path):
+                # Vuelta a JSON: exportar lo que había en la base de datos
+                try:
+                    store = SqliteMappingStore(db_path)
+                    rows = store.export_json()
+                    store.close()
+                except Exception:
+                    rows = None
+            self.mapping_manager.load(rows or [])
+        # La vista solo pide (y materializa) las filas visibles
+        self.table_model.reset()
+        self._fit_fixed_columns()
     # MIDI opciones eliminadas
 
     # _current_midi_options removido
 
     def _set_status(self, msg: str):
-        if has_listeners():
+        if enabled():
             log(msg)
         # Optional: could add a status bar later
         try:
@@ -528,31 +772,3 @@ QTabBar::tab:selected { background: #3a3d41; }
                 self.status_lbl.setText(msg)
         except Exception:
             pass
-
-# --- Función helper fuera de la clase (evita problemas de indentación en pyinstaller) ---
-def build_row(win: MainWindow, row: int, item: MappingItem):
-    # Column 0: index
-    idx_item = QTableWidgetItem(str(row + 1))
-    idx_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-    idx_item.setForeground(Qt.GlobalColor.white)
-    win.table.setItem(row, 0, idx_item)
-
-    # Column 1: event signature
-    ev_text = item.signature.human if item.signature else "<sin evento>"
-    ev_item = QTableWidgetItem(ev_text)
-    ev_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-    ev_item.setToolTip(ev_text)
-    ev_item.setForeground(Qt.GlobalColor.white)
-    win.table.setItem(row, 1, ev_item)
-
-    # Column 2: audio path
-    audio_text = item.audio if item.audio else "<sin audio>"
-    audio_item = QTableWidgetItem(audio_text)
-    audio_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-    audio_item.setToolTip(audio_text)
-    audio_item.setForeground(Qt.GlobalColor.white)
-    win.table.setItem(row, 2, audio_item)
-
-    # Column 3: ensure action buttons
-    win._ensure_action_widgets(row)
-    # Selección desactivada: nada adicional
@@ -0,0 +1,237 @@
+from typing import List, Optional, Tuple
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QToolTip, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QRect, pyqtSignal
+from PyQt6.QtGui import QBrush, QColor, QPen, QPainter
+
+from src.core.mapping_manager import MappingManager, MappingItem
+
+COL_INDEX, COL_EVENT, COL_AUDIO, COL_ACTIONS = range(4)
+
+# (acción, texto, tooltip)
+ACTIONS: Tuple[Tuple[str, str, str], ...] = (
+    ('map', "Capturar", "Capturar evento"),
+    ('audio', "Audio", "Elegir archivo de audio"),
+    ('play', "▶", "Preview"),
+    ('params', "⚙", "Parámetros de sonido"),
+    ('clear', "Limpiar", "Quitar evento y audio"),
+)
+
+_WHITE = QBrush(Qt.GlobalColor.white)
+_DUP = QBrush(QColor('#665500'))  # fondo ámbar oscuro para duplicados
+
+
+class MappingTableModel(QAbstractTableModel):
+    """Vista de MappingManager para QTableView: las filas se leen (y materializan) al pintarse.
+
+    No hay items ni widgets por fila, así que cargar 2000 mapeos es un
+    `reset()`; el estado de duplicado se consulta al índice del manager y sus
+    cambios llegan como `dataChanged` de las filas afectadas.
+    """
+
+    HEADERS = ("#", "Evento", "Audio", "Acciones")
+
+    def __init__(self, manager: MappingManager, parent=None):
+        super().__init__(parent)
+        self._mm = manager
+        self._pending: Optional[dict] = None  # cambios de duplicados durante un remove
+        manager.on_duplicates_changed = self._on_duplicates_changed
+
+    @property
+    def manager(self) -> MappingManager:
+        return self._mm
+
+    # ---- QAbstractTableModel ----
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._mm)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return _WHITE
+        if col == COL_ACTIONS:
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            if col == COL_INDEX:
+                return str(row + 1) if role == Qt.ItemDataRole.DisplayRole else None
+            item = self._mm.get_by_row(row)
+            if item is None:
+                return None
+            if col == COL_EVENT:
+                return item.signature.human if item.signature else "<sin evento>"
+            return item.audio if item.audio else "<sin audio>"
+        if role == Qt.ItemDataRole.BackgroundRole:
+            item = self._mm.get_by_row(row)
+            if item is not None and self._mm.is_duplicate(item.id):
+                return _DUP
+        return None
+
+    # ---- mutaciones desde la ventana ----
+    def item(self, row: int) -> Optional[MappingItem]:
+        return self._mm.get_by_row(row)
+
+    def reset(self):
+        """Tras cargar/adjuntar el manager: la vista vuelve a pedir solo las filas visibles."""
+        self.beginResetModel()
+        self.endResetModel()
+
+    def refresh_row(self, row: int):
+        if 0 <= row < len(self._mm):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, COL_ACTIONS - 1))
+
+    def append(self) -> MappingItem:
+        row = len(self._mm)
+        self.beginInsertRows(QModelIndex(), row, row)
+        item = self._mm.add()
+        self.endInsertRows()
+        return item
+
+    def remove_row(self, row: int) -> bool:
+        item = self._mm.get_by_row(row)
+        if item is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._pending = {}
+        try:
+            self._mm.remove_ids([item.id])
+        finally:
+            changed, self._pending = self._pending, None
+            self.endRemoveRows()
+        # Los eventos de duplicados ya vienen con las filas nuevas
+        self._on_duplicates_changed(changed)
+        return True
+
+    def _on_duplicates_changed(self, changed):
+        if self._pending is not None:
+            self._pending.update(changed)
+            return
+        for r in changed:
+            if 0 <= r < len(self._mm):
+                self.dataChanged.emit(self.index(r, 0), self.index(r, COL_ACTIONS - 1),
+                                      [Qt.ItemDataRole.BackgroundRole])
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Pinta los botones de acción de la columna Acciones sin crear widgets.
+
+    Los clics se resuelven por geometría en `editorEvent` y salen por
+    `triggered(fila, acción)`.  Se instala como delegate de toda la vista
+    (con `setMouseTracking(True)`) para poder apagar el hover al salir de la
+    columna; el resto de columnas se pintan como siempre.
+    """
+
+    triggered = pyqtSignal(int, str)
+
+    _PAD_X, _GAP, _MARGIN = 6, 3, 2
+    _BG, _BG_HOVER, _BG_DOWN = QColor('#3a3d41'), QColor('#4a4e52'), QColor('#2c2f33')
+    _BORDER, _TEXT = QColor('#505458'), QColor('#e6e6e6')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._hover: Optional[Tuple[int, str]] = None
+        self._down: Optional[Tuple[int, str]] = None
+
+    def _rects(self, option) -> List[Tuple[str, QRect]]:
+        fm = option.fontMetrics
+        r = option.rect
+        h = r.height() - 2 * self._MARGIN
+        x = r.x() + self._MARGIN
+        out = []
+        for action, text, _tip in ACTIONS:
+            w = fm.horizontalAdvance(text) + 2 * self._PAD_X
+            out.append((action, QRect(x, r.y() + self._MARGIN, w, h)))
+            x += w + self._GAP
+        return out
+
+    def _hit(self, option, pos) -> Optional[str]:
+        for action, rect in self._rects(option):
+            if rect.contains(pos):
+                return action
+        return None
+
+    def width_for(self, fm) -> int:
+        return (sum(fm.horizontalAdvance(t) + 2 * self._PAD_X for _a, t, _tip in ACTIONS)
+                + self._GAP * (len(ACTIONS) - 1) + 2 * self._MARGIN)
+
+    def sizeHint(self, option, index):
+        hint = super().sizeHint(option, index)
+        hint.setWidth(self.width_for(option.fontMetrics))
+        return hint
+
+    def paint(self, painter, option, index):
+        # Fondo (alternado) como cualquier celda; la columna Acciones no tiene texto
+        super().paint(painter, option, index)
+        if index.column() != COL_ACTIONS:
+            return
+        row = index.row()
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        for (action, rect), (_a, text, _tip) in zip(self._rects(option), ACTIONS):
+            if self._down == (row, action):
+                bg = self._BG_DOWN
+            elif self._hover == (row, action):
+                bg = self._BG_HOVER
+            else:
+                bg = self._BG
+            painter.setPen(QPen(self._BORDER))
+            painter.setBrush(bg)
+            painter.drawRoundedRect(rect.adjusted(0, 0, -1, -1), 3, 3)
+            painter.setPen(self._TEXT)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        et = event.type()
+        if et not in (QEvent.Type.MouseMove, QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
+            return False
+        action = self._hit(option, event.position().toPoint()) if index.column() == COL_ACTIONS else None
+        key = (index.row(), action) if action else None
+        if et == QEvent.Type.MouseMove:
+            if key != self._hover:
+                old, self._hover = self._hover, key
+                if old is not None:
+                    self._update(model.index(old[0], COL_ACTIONS))
+                if key is not None:
+                    self._update(index)
+            return False
+        if index.column() != COL_ACTIONS or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        if et == QEvent.Type.MouseButtonPress:
+            self._down = key
+            self._update(index)
+            return key is not None
+        pressed, self._down = self._down, None
+        self._update(index)
+        if key is not None and key == pressed:
+            self.triggered.emit(index.row(), action)
+            return True
+        return False
+
+    def helpEvent(self, event, view, option, index):
+        if index.column() == COL_ACTIONS and event.type() == QEvent.Type.ToolTip:
+            action = self._hit(option, event.pos())
+            for a, _text, tip in ACTIONS:
+                if a == action:
+                    QToolTip.showText(event.globalPos(), tip, view)
+                    return True
+            QToolTip.hideText()
+            return True
+        return super().helpEvent(event, view, option, index)
+
+    def _update(self, index):
+        view = self.parent()
+        if isinstance(view, QAbstractItemView) and index.isValid():
+            view.viewport().update(view.visualRect(index))
@@ -0,0 +1,69 @@
+from PyQt6.QtWidgets import (
+    QDialog, QFormLayout, QDialogButtonBox, QSpinBox, QDoubleSpinBox, QComboBox, QLineEdit, QSlider,
+)
+from PyQt6.QtCore import Qt
+
+from src.core.mapping_manager import MappingItem
+from src.core.voice_manager import RETRIGGER_MODES
+from src.core.audio_stream import LOAD_MODES
+
+
+class SoundParamsDialog(QDialog):
+    """Edita los parámetros de reproducción de un mapeo."""
+
+    def __init__(self, item: MappingItem, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Parámetros fila {item.id}")
+        form = QFormLayout(self)
+
+        self.volume = QSpinBox(); self.volume.setRange(0, 100); self.volume.setSuffix(" %")
+        self.volume.setValue(int(round(item.volume * 100)))
+        self.pan = QSlider(Qt.Orientation.Horizontal); self.pan.setRange(-100, 100)
+        self.pan.setValue(int(round(item.pan * 100)))
+        self.pan.setToolTip("Izquierda ← → Derecha")
+        self.fade_in = self._ms_spin(item.fade_in_ms)
+        self.fade_out = self._ms_spin(item.fade_out_ms)
+        self.start = self._ms_spin(item.start_ms, 3_600_000)
+        self.loops = QSpinBox(); self.loops.setRange(-1, 999); self.loops.setSpecialValueText("∞")
+        self.loops.setValue(item.loops)
+        self.retrigger = QComboBox(); self.retrigger.addItems(RETRIGGER_MODES)
+        self.retrigger.setCurrentText(item.retrigger if item.retrigger in RETRIGGER_MODES else 'overlap')
+        self.max_voices = QSpinBox(); self.max_voices.setRange(0, 64); self.max_voices.setSpecialValueText("sin límite")
+        self.max_voices.setValue(item.max_voices)
+        self.group = QLineEdit(item.group); self.group.setPlaceholderText("(pool general)")
+        self.load_mode = QComboBox(); self.load_mode.addItems(LOAD_MODES)
+        self.load_mode.setCurrentText(item.load_mode if item.load_mode in LOAD_MODES else 'auto')
+
+        form.addRow("Volumen", self.volume)
+        form.addRow("Paneo", self.pan)
+        form.addRow("Fade in", self.fade_in)
+        form.addRow("Fade out", self.fade_out)
+        form.addRow("Inicio", self.start)
+        form.addRow("Repeticiones", self.loops)
+        form.addRow("Redisparo", self.retrigger)
+        form.addRow("Voces máx.", self.max_voices)
+        form.addRow("Grupo", self.group)
+        form.addRow("Carga", self.load_mode)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    @staticmethod
+    def _ms_spin(value: int, maximum: int = 60_000) -> QSpinBox:
+        sb = QSpinBox(); sb.setRange(0, maximum); sb.setSingleStep(50); sb.setSuffix(" ms")
+        sb.setValue(value)
+        return sb
+
+    def apply_to(self, item: MappingItem):
+        item.volume = self.volume.value() / 100.0
+        item.pan = self.pan.value() / 100.0
+        item.fade_in_ms = self.fade_in.value()
+        item.fade_out_ms = self.fade_out.value()
+        item.start_ms = self.start.value()
+        item.loops = self.loops.value()
+        item.retrigger = self.retrigger.currentText()
+        item.max_voices = self.max_voices.value()
+        item.group = self.group.text().strip()
+        item.load_mode = self.load_mode.currentText()
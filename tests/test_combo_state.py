@@ -0,0 +1,52 @@
+from src.core.combo_state import ComboState, split_combo
+
+
+def test_split_combo_keeps_plus_key():
+    assert split_combo('ctrl+a') == ['ctrl', 'a']
+    assert split_combo('ctrl++') == ['ctrl', '+']
+
+
+def test_combo_fires_once_until_an_input_is_released():
+    state = ComboState()
+    state.add('a')
+    assert state.press('a') == ('a',)
+    # Auto-repeat: sigue pulsada, no vuelve a disparar
+    assert state.press('a') == ()
+    state.release('a')
+    assert state.press('a') == ('a',)
+
+
+def test_rearm_needs_a_new_press_of_one_of_its_inputs():
+    state = ComboState(solo_excluded=('ctrl',))
+    state.add('ctrl+a')
+    state.add('a')
+    state.press('ctrl')
+    assert state.press('a') == ('ctrl+a', 'a')
+    # Soltar y volver a pulsar la 'a' con ctrl mantenido rearma el combo
+    state.release('a')
+    assert state.press('a') == ('ctrl+a', 'a')
+    # Ctrl solo está excluido como disparo suelto
+    state.release('a')
+    state.release('ctrl')
+    assert state.press('ctrl') == ()
+
+
+def test_unknown_input_blocks_exact_combo():
+    state = ComboState()
+    state.add('ctrl+a')
+    state.press('shift')  # sin bit: no está en ningún combo
+    state.press('ctrl')
+    assert state.press('a') == ()
+    state.release('shift')
+    state.release('a')
+    assert state.press('a') == ('ctrl+a',)
+    assert state.pressed_count() == 2
+
+
+def test_reset_clears_pressed_and_fired():
+    state = ComboState()
+    state.add('a')
+    assert state.press('a') == ('a',)
+    state.reset()
+    assert state.pressed_count() == 0
+    assert state.press('a') == ('a',)
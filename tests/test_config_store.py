@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+
+from src.core.config_store import ConfigStore, validate
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_save_is_debounced_and_flushed_on_close(tmp_path):
+    store = ConfigStore(debounce_s=60, directory=str(tmp_path))
+    for i in range(5):
+        store.data['mappings'].append({'id': i})
+        store.save()
+    assert not os.path.exists(store.path)  # aún dentro del debounce
+    store.close()
+    assert [m['id'] for m in _read(store.path)['mappings']] == [0, 1, 2, 3, 4]
+    assert not any(n.endswith('.tmp') for n in os.listdir(tmp_path))
+
+
+def test_writer_never_overwrites_a_newer_flush(tmp_path):
+    store = ConfigStore(debounce_s=0, directory=str(tmp_path))
+    for i in range(300):
+        store.data['v'] = i
+        store.save()
+        if i % 7 == 0:
+            store.flush()
+    store.data['v'] = 'last'
+    store.save()
+    store.close()
+    assert _read(store.path)['v'] == 'last'
+    assert not store._thread.is_alive()
+
+
+def test_corrupt_main_falls_back_to_latest_valid_backup(tmp_path):
+    store = ConfigStore(debounce_s=0, directory=str(tmp_path), rotate_every_s=0)
+    for v in (1, 2, 3):
+        store.data['v'] = v
+        store.save()
+        store.flush()
+    store.close()
+    assert _read(store.path + '.bak1')['v'] == 2
+    with open(store.path, 'w', encoding='utf-8') as f:
+        f.write('{"mappings": [')  # truncado
+    again = ConfigStore(directory=str(tmp_path))
+    assert again.data['v'] == 2
+    assert again.loaded_from == store.path + '.bak1'
+
+
+def test_main_file_stays_in_place_and_rotation_is_rate_limited(tmp_path, monkeypatch):
+    store = ConfigStore(debounce_s=0, directory=str(tmp_path), backups=3)
+    seen = []
+    orig = os.replace
+
+    def spy(src, dst):
+        # En ningún momento de la rotación falta config.json
+        seen.append(os.path.exists(store.path) or not store._main_valid)
+        return orig(src, dst)
+
+    monkeypatch.setattr(os, 'replace', spy)
+    for v in range(6):
+        store.data['v'] = v
+        store.save()
+        store.flush()
+    monkeypatch.undo()
+    store.close()
+    assert all(seen)
+    # Una sola rotación por sesión (intervalo por defecto): bak1 es el primer guardado
+    assert _read(store.path + '.bak1')['v'] == 0
+    assert not os.path.exists(store.path + '.bak2')
+
+
+def test_validate_rejects_bad_shapes():
+    assert validate({'mappings': [], 'selected_device': {'type': 'hid'}})
+    assert not validate([])
+    assert not validate({'mappings': {}})
+    assert not validate({'mappings': [1]})
+    assert not validate({'audio': []})
+
+
+def test_concurrent_saves_end_with_current_data(tmp_path):
+    store = ConfigStore(debounce_s=0.01, directory=str(tmp_path))
+
+    def mutate(k):
+        for i in range(200):
+            store.data[k] = i
+            store.save()
+
+    threads = [threading.Thread(target=mutate, args=(f"k{n}",)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+    data = _read(store.path)
+    assert all(data[f"k{n}"] == 199 for n in range(4))
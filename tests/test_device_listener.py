@@ -0,0 +1,102 @@
+import time
+
+from src.core.device_listener import DeviceListener, MultiDeviceListener
+from src.core.hid_decoder import button_code
+from src.core.input_backends import SyntheticBackend
+from src.core.trigger_dispatcher import TriggerDispatcher
+from src.core.types import EventSignature
+
+VID, PID = 0x1234, 0x5678
+
+
+def _wait(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return cond()
+
+
+def test_keyboard_combo_fires_once_per_press():
+    backend = SyntheticBackend()
+    hits = []
+    l = DeviceListener('keyboard', {}, backend=backend)
+    l.bind(EventSignature(type='keyboard', code='ctrl+k'), lambda: hits.append('ctrl+k'))
+    l.bind(EventSignature(type='keyboard', code='k'), lambda: hits.append('k'))
+    l.start()
+    try:
+        assert backend.wait_attached(keyboards=1)
+        backend.key('Key.ctrl_l', True)
+        backend.key('k', True)
+        backend.key('k', True)  # auto-repeat
+        backend.key('k', False)
+        backend.key('Key.ctrl_l', False)
+        # El combo completo y la tecla recién pulsada, una sola vez pese al auto-repeat
+        assert hits == ['ctrl+k', 'k']
+        backend.tap('k')
+        assert hits == ['ctrl+k', 'k', 'k']
+    finally:
+        l.stop()
+
+
+def test_hid_first_report_can_be_a_press():
+    backend = SyntheticBackend()
+    dev = backend.add_device(VID, PID)
+    hits = []
+    l = DeviceListener('hid', {'vendor_id': VID, 'product_id': PID}, backend=backend)
+    l.bind(EventSignature(type='hid', vendor_id=VID, product_id=PID, code=button_code(1, 0, 0)),
+           lambda: hits.append(1))
+    l.start()
+    try:
+        assert _wait(lambda: dev.opened)
+        backend.report(VID, PID, [1, 0x01])
+        backend.report(VID, PID, [1, 0x01])
+        assert hits == [1]
+        backend.report(VID, PID, [1, 0x00])
+        backend.report(VID, PID, [1, 0x01])
+        assert hits == [1, 1]
+    finally:
+        l.stop()
+
+
+def test_callbacks_run_on_dispatcher_worker():
+    backend = SyntheticBackend()
+    d = TriggerDispatcher()
+    d.start()
+    hits = []
+    l = DeviceListener('mouse', {}, d, backend=backend)
+    l.bind(EventSignature(type='mouse', code='left'), lambda: hits.append(1))
+    l.start()
+    try:
+        assert backend.wait_attached(mice=1)
+        backend.click('left', True)
+        backend.click('left', False)
+        assert _wait(lambda: hits == [1])
+    finally:
+        l.stop()
+        d.stop()
+
+
+def test_multi_device_combo_across_keyboard_and_hid():
+    backend = SyntheticBackend()
+    backend.add_device(VID, PID)
+    d = TriggerDispatcher()
+    d.start()
+    hits = []
+    m = MultiDeviceListener(d, backend=backend)
+    m.bind(EventSignature(type='multi', code=f"hid:{VID}:{PID}:01-0007+kb:ctrl"), lambda: hits.append(1))
+    m.start()
+    try:
+        assert backend.wait_attached(keyboards=1, mice=1)
+        assert _wait(lambda: any(dv.opened for dv in backend.devices))
+        backend.key('Key.ctrl_l', True)
+        backend.report(VID, PID, [1, 0x00, 0x07])
+        backend.key('Key.ctrl_l', False)
+        assert _wait(lambda: hits == [1])
+        # Sin la tecla no hay combo
+        backend.report(VID, PID, [1, 0x00, 0x08])
+        backend.report(VID, PID, [1, 0x00, 0x07])
+        time.sleep(0.05)
+        assert hits == [1]
+    finally:
+        m.stop()
+        d.stop()
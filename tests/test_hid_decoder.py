@@ -0,0 +1,71 @@
+from src.core.combo_state import ComboState
+from src.core.hid_decoder import HidReportDecoder, button_code, key_code
+
+
+def _fire(state, decoder, data):
+    pressed, released = decoder.feed(data)
+    for name in released:
+        state.release(name)
+    return list(state.press_many(pressed)) if pressed else []
+
+
+def test_keyboard_array_b_does_not_fire_a():
+    a, b = key_code(0, 0x04), key_code(0, 0x05)
+    state = ComboState()
+    state.add(a)
+    dec = HidReportDecoder(keyboard=True)
+    assert _fire(state, dec, [0, 0, 0, 0x04, 0, 0, 0, 0, 0]) == [a]
+    assert _fire(state, dec, [0, 0, 0, 0, 0, 0, 0, 0, 0]) == []
+    # B (0x05) comparte bits con A (0x04): en modo teclado es otra tecla
+    assert dec.feed([0, 0, 0, 0x05, 0, 0, 0, 0, 0]) == ([b], [])
+    dec.feed([0, 0, 0, 0, 0, 0, 0, 0, 0])
+    assert _fire(state, dec, [0, 0, 0, 0x05, 0, 0, 0, 0, 0]) == []
+    assert _fire(state, dec, [0, 0, 0, 0, 0, 0, 0, 0, 0]) == []
+    assert _fire(state, dec, [0, 0, 0, 0x04, 0, 0, 0, 0, 0]) == [a]
+
+
+def test_keyboard_modifiers_are_bits():
+    dec = HidReportDecoder(keyboard=True)
+    assert dec.feed([0, 0x02, 0, 0x04, 0, 0, 0, 0, 0]) == ([button_code(0, 0, 1), key_code(0, 0x04)], [])
+    assert dec.feed([0, 0, 0, 0, 0, 0, 0, 0, 0]) == ([], [button_code(0, 0, 1), key_code(0, 0x04)])
+
+
+def test_bitmap_batch_with_unbound_bit_does_not_fire_subset():
+    state = ComboState()
+    state.add(button_code(0, 1, 2))
+    dec = HidReportDecoder(auto_noise=False)
+    assert _fire(state, dec, [0, 0, 0x05]) == []
+
+
+def test_first_report_can_be_a_press():
+    # Botonera que solo envía reports al cambiar algo: el primero ya es una pulsación
+    state = ComboState()
+    state.add(button_code(1, 0, 0))
+    dec = HidReportDecoder(auto_noise=False)
+    assert _fire(state, dec, [1, 0x01, 0]) == [button_code(1, 0, 0)]
+    assert dec.feed([1, 0, 0]) == ([], [button_code(1, 0, 0)])
+
+
+def test_declared_baseline_bytes_take_first_value_as_rest():
+    dec = HidReportDecoder(auto_noise=False, baseline={1: [1, 2]})
+    # Hat en neutro (0x0F) y eje centrado (0x80) declarados: reposo, no pulsaciones
+    assert dec.feed([1, 0, 0x0F, 0x80]) == ((), ())
+    assert dec.feed([1, 0, 0x0E, 0x80]) == ([], [button_code(1, 1, 0)])
+    # El byte de botones no declarado sigue comparándose contra cero
+    dec2 = HidReportDecoder(auto_noise=False, baseline={1: [1]})
+    assert dec2.feed([1, 0x02, 0x0F]) == ([button_code(1, 0, 1)], [])
+    # Otro report ID tiene su propia referencia (cero)
+    assert dec.feed([2, 0x01]) == ([button_code(2, 0, 0)], [])
+
+
+def test_configured_rest_value():
+    dec = HidReportDecoder(auto_noise=False, rest={1: '0F00'})
+    assert dec.feed([1, 0x0F, 0x00]) == ((), ())
+    assert dec.feed([1, 0x0F, 0x04]) == ([button_code(1, 1, 2)], [])
+
+
+def test_ignore_mask():
+    dec = HidReportDecoder(ignore={1: [1]}, auto_noise=False)
+    dec.feed([1, 0, 0x80])
+    assert dec.feed([1, 0, 0x81]) == ((), [])
+    assert dec.feed([1, 0x01, 0x7F]) == ([button_code(1, 0, 0)], [])
@@ -0,0 +1,43 @@
+from src.core import logger
+
+
+def test_read_returns_records_in_order_from_a_cursor():
+    start = logger._head
+    for i in range(10):
+        logger.log('msg %d', i)
+    recs, nxt, dropped = logger.read(start)
+    assert [r.message() for r in recs] == [f"msg {i}" for i in range(10)]
+    assert nxt == start + 10 and dropped == 0
+
+
+def test_wraparound_counts_overwritten_records_as_dropped():
+    start = logger._head
+    n = logger._CAPACITY + 250
+    for i in range(n):
+        logger.log('w %d', i)
+    recs, nxt, dropped = logger.read(start)
+    assert dropped == 250
+    assert recs[0].message() == 'w 250'
+    assert nxt == start + n
+    assert logger.oldest_seq() == start + n - logger._CAPACITY
+
+
+def test_cursor_pull_keeps_only_the_latest_batch():
+    cur = logger.subscribe(replay=False)
+    try:
+        assert logger.enabled()
+        for i in range(30):
+            logger.log('c %d', i)
+        lines, dropped = cur.pull(limit=10)
+        assert dropped == 20
+        assert [l.split('] ', 1)[1] for l in lines] == [f"c {i}" for i in range(20, 30)]
+        assert cur.pull() == ([], 0)
+    finally:
+        cur.close()
+
+
+def test_lazy_formatting_survives_bad_args():
+    start = logger._head
+    logger.log('%d items', 'x')
+    rec = logger.read(start)[0][0]
+    assert rec.message() == "%d items ('x',)"
@@ -0,0 +1,75 @@
+from src.core.mapping_manager import MappingItem, MappingManager
+from src.core.mapping_store import SqliteMappingStore, sig_key_of
+from src.core.types import EventSignature
+
+
+def _row(mid, code=None, audio=''):
+    sig = {'type': 'keyboard', 'vendor_id': None, 'product_id': None, 'code': code} if code else None
+    return {'id': mid, 'signature': sig, 'audio': audio}
+
+
+def _store(tmp_path, rows):
+    store = SqliteMappingStore(str(tmp_path / 'mappings.db'))
+    store.import_json(rows)
+    return store
+
+
+def test_duplicate_keys_use_the_signature_index(tmp_path):
+    store = _store(tmp_path, [_row(1, 'a'), _row(2, 'b'), _row(3, 'a'), _row(4)])
+    key = sig_key_of(_row(1, 'a')['signature'])
+    assert store.duplicate_keys() == {key: [1, 3]}
+    assert store.find(key) == [1, 3]
+    assert store.sig_keys() == {1: key, 2: sig_key_of(_row(2, 'b')['signature']), 3: key}
+    store.close()
+
+
+def test_import_gives_ids_to_rows_without_one_and_export_is_lossless(tmp_path):
+    rows = [_row(0, 'a'), dict(_row(5, 'b'), extra='x'), _row(5, 'c')]
+    store = _store(tmp_path, rows)
+    out = store.export_json()
+    assert [r['id'] for r in out] == [6, 5, 7]
+    assert out[1]['extra'] == 'x'
+    store.close()
+
+
+def test_upsert_keeps_unknown_fields_and_reindexes(tmp_path):
+    store = _store(tmp_path, [dict(_row(1, 'a'), extra=1)])
+    store.upsert(_row(1, 'z', 'x.wav'))
+    assert store.get(1)['extra'] == 1
+    assert store.find(sig_key_of(_row(1, 'z')['signature'])) == [1]
+    assert store.duplicate_keys() == {}
+    store.close()
+
+
+def test_manager_tracks_duplicates_incrementally(tmp_path):
+    store = _store(tmp_path, [_row(1, 'a'), _row(2, 'b'), _row(3)])
+    mgr = MappingManager()
+    changes = []
+    mgr.on_duplicates_changed = changes.append
+    mgr.attach_store(store)
+    assert mgr.duplicate_ids() == set()
+    item = mgr.get_by_row(1)
+    mgr.set_signature(item, EventSignature(type='keyboard', code='a'))
+    assert mgr.duplicate_ids() == {1, 2}
+    assert changes == [{0: True, 1: True}]
+    mgr.remove_ids([1])
+    assert mgr.duplicate_ids() == set()
+    assert changes[-1] == {0: False}
+    # Solo la fila cambiada se escribe; la borrada se elimina
+    assert mgr.sync_to_store() == 2
+    assert store.ids() == [2, 3]
+    assert store.duplicate_keys() == {}
+    store.close()
+
+
+def test_rows_do_not_materialize_items(tmp_path):
+    store = _store(tmp_path, [_row(i, chr(97 + i), f"{i}.wav") for i in range(1, 6)] + [_row(9)])
+    mgr = MappingManager()
+    mgr.attach_store(store)
+    mgr.get_by_row(0).audio = 'edited.wav'
+    rows = mgr.rows(signed_only=True)
+    assert [r['id'] for r in rows] == [1, 2, 3, 4, 5]
+    assert rows[0]['audio'] == 'edited.wav'
+    assert len(mgr._items) == 1
+    assert MappingItem.play_options_of(rows[1]) == MappingItem.from_dict(rows[1]).play_options()
+    store.close()
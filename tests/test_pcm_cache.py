@@ -0,0 +1,55 @@
+import os
+import time
+
+from src.core.pcm_cache import PcmDiskCache
+
+FMT = (44100, -16, 2)
+
+
+def _source(tmp_path, name='a.wav', data=b'x'):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return str(p)
+
+
+def test_store_then_load_hits(tmp_path):
+    src = _source(tmp_path)
+    cache = PcmDiskCache(str(tmp_path / 'cache'))
+    assert cache.load(src, FMT) is None
+    assert cache.store(src, FMT, b'\1\2' * 100, {'rms': 0.5})
+    mm, meta = cache.load(src, FMT)
+    try:
+        assert mm[:4] == b'\1\2\1\2' and meta['bytes'] == 200 and meta['rms'] == 0.5
+    finally:
+        mm.close()
+    # Otro formato de mixer es otra clave
+    assert cache.load(src, (48000, -16, 2)) is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'writes': 1}
+
+
+def test_gc_drops_stale_entries_and_enforces_size(tmp_path):
+    cache = PcmDiskCache(str(tmp_path / 'cache'), max_bytes=250)
+    a, b = _source(tmp_path, 'a.wav'), _source(tmp_path, 'b.wav')
+    cache.store(a, FMT, b'\0' * 200)
+    cache.store(b, FMT, b'\0' * 200)
+    assert cache.gc()['removed'] == 1
+    # El fuente cambió: la entrada queda obsoleta
+    survivor = a if cache.load(a, FMT) else b
+    time.sleep(0.01)
+    with open(survivor, 'ab') as f:
+        f.write(b'more')
+    assert cache.gc()['stale'] == 1
+    assert os.listdir(tmp_path / 'cache') == []
+
+
+def test_gc_keeps_young_orphan_pcm(tmp_path):
+    root = tmp_path / 'cache'
+    cache = PcmDiskCache(str(root))
+    cache.store(_source(tmp_path), FMT, b'\0' * 10)
+    orphan = root / 'dead.pcm'
+    orphan.write_bytes(b'1')
+    cache.gc()
+    assert orphan.exists()  # puede ser un store() en curso
+    os.utime(orphan, (0, 0))
+    cache.gc()
+    assert not orphan.exists()
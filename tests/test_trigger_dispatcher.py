@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from src.core.trigger_dispatcher import TriggerDispatcher
+
+
+def _drain(d, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while d.pending() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_overflow_drops_oldest():
+    d = TriggerDispatcher(capacity=3)
+    ran = []
+    for i in range(5):
+        d.submit(i, lambda i=i: ran.append(i))
+    assert d.pending() == 3
+    assert d.dropped == 2
+    d.start()
+    _drain(d)
+    d.stop()
+    assert ran == [2, 3, 4]
+
+
+def test_coalesce_collapses_pending_key():
+    d = TriggerDispatcher(capacity=8, policy='coalesce')
+    ran = []
+    for _ in range(4):
+        d.submit('a', lambda: ran.append('a'))
+    d.submit('b', lambda: ran.append('b'))
+    assert d.pending() == 2
+    assert d.coalesced == 3
+    d.start()
+    _drain(d)
+    # Ya no está pendiente: el siguiente disparo de 'a' vuelve a encolarse
+    d.submit('a', lambda: ran.append('a'))
+    _drain(d)
+    d.stop()
+    assert ran == ['a', 'b', 'a']
+
+
+def test_coalesce_from_many_threads_enqueues_a_key_once():
+    d = TriggerDispatcher(capacity=64, policy='coalesce')
+    start = threading.Barrier(8)
+
+    def producer():
+        start.wait()
+        for _ in range(2000):
+            d.submit('k', lambda: None)
+
+    threads = [threading.Thread(target=producer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert d.pending() == 1
+    assert d.submitted == 16000
+    assert d.coalesced == 15999
+
+
+def test_errors_are_counted_and_do_not_stop_the_worker():
+    d = TriggerDispatcher()
+    ran = []
+    d.start()
+    d.submit('bad', lambda: 1 / 0)
+    d.submit('ok', lambda: ran.append(1))
+    _drain(d)
+    time.sleep(0.02)
+    d.stop()
+    assert ran == [1]
+    assert d.errors == 1
+    assert d.stats()['per_trigger']['ok']['count'] == 1
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        TriggerDispatcher(policy='nope')
@@ -0,0 +1,42 @@
+import copy
+import pickle
+
+import pytest
+
+from src.core.types import EventSignature, default_human
+
+
+def test_same_fields_give_the_same_instance():
+    a = EventSignature(type='hid', vendor_id=1, product_id=2, code='01/0.0')
+    b = EventSignature(type='hid', vendor_id=1, product_id=2, code='01/0.0')
+    assert a is b
+    assert a != EventSignature(type='hid', vendor_id=1, product_id=3, code='01/0.0')
+    assert {a: 1}[EventSignature.from_dict(a.to_dict())] == 1
+
+
+def test_explicit_label_never_changes_the_interned_instance():
+    plain = EventSignature(type='midi', code='control_change:0:7')
+    labeled = EventSignature(type='midi', code='control_change:0:7', human='CC 7 = 64')
+    assert labeled is not plain
+    assert labeled == plain and hash(labeled) == hash(plain)
+    assert labeled.human == 'CC 7 = 64'
+    assert plain.human == default_human('midi', None, None, 'control_change:0:7')
+    assert EventSignature(type='midi', code='control_change:0:7') is plain
+    # La etiqueta por defecto explícita no crea otra instancia
+    assert EventSignature(type='midi', code='control_change:0:7', human=plain.human) is plain
+
+
+def test_immutable_and_copy_keeps_identity():
+    sig = EventSignature(type='keyboard', code='ctrl+a')
+    with pytest.raises(AttributeError):
+        sig.code = 'b'
+    assert copy.copy(sig) is sig and copy.deepcopy(sig) is sig
+    assert pickle.loads(pickle.dumps(sig)) is sig
+    assert sig.key == 'keyboard:None:None:ctrl+a'
+
+
+def test_default_labels():
+    assert default_human('keyboard', None, None, 'ctrl+a') == 'Combo Ctrl+A'
+    assert default_human('mouse', None, None, 'left') == 'Mouse Izq'
+    assert default_human('hid', 0x1234, 0xABCD, '01/0.0') == 'HID 1234:ABCD [01/0.0]'
+    assert default_human('midi', None, None, 'note_on:0:60') == 'MIDI Note On Nota 60 (ch 1)'